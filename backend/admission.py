@@ -0,0 +1,146 @@
+"""
+Admission control cho các endpoint verify.
+
+- Tối đa ADMISSION_MAX_CONCURRENCY request verify chạy cùng lúc.
+- Request vượt giới hạn vào hàng đợi có giới hạn (ADMISSION_MAX_QUEUE), bài ngắn được
+  ưu tiên (ADMISSION_PREFER_SMALL=1) vì xong nhanh -> giảm latency trung bình.
+- Hàng đợi đầy, hoặc chờ quá ADMISSION_MAX_WAIT giây -> AdmissionRejected
+  (endpoint trả 503 + Retry-After ngay, thay vì để mọi request cùng timeout).
+  Bài dài không bị "đói" vô hạn: tối đa chờ ADMISSION_MAX_WAIT rồi bị từ chối.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "2.0"))
+ADMISSION_PREFER_SMALL = os.getenv("ADMISSION_PREFER_SMALL", "1") == "1"
+
+class AdmissionRejected(Exception):
+    """Quá tải: request bị từ chối, client nên thử lại sau `retry_after` giây"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Hệ thống đang quá tải ({reason}), thử lại sau {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ("event", "granted", "cancelled")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+class AdmissionTicket:
+    """Slot đã được cấp; release() gọi nhiều lần vẫn an toàn"""
+
+    def __init__(self, controller):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller._release(time.monotonic() - self._started)
+
+class AdmissionController:
+    def __init__(self, max_concurrency=ADMISSION_MAX_CONCURRENCY, max_queue=ADMISSION_MAX_QUEUE,
+                 max_wait=ADMISSION_MAX_WAIT, prefer_small=ADMISSION_PREFER_SMALL):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.prefer_small = prefer_small
+
+        self._lock = threading.Lock()
+        self._heap = [] # (cost, seq, waiter)
+        self._seq = itertools.count()
+        self.active = 0
+        self.queued = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self._service_time = 1.0 # EWMA thời gian xử lý 1 request (giây), để tính Retry-After
+
+    def acquire(self, cost=0):
+        """
+        Xin 1 slot chạy verify (cost: độ dài bài, càng nhỏ càng được ưu tiên).
+        Trả về AdmissionTicket, hoặc raise AdmissionRejected.
+        """
+        t0 = time.monotonic()
+        with self._lock:
+            if self.active < self.max_concurrency and not self.queued:
+                self.active += 1
+                self.admitted_total += 1
+                ADMISSION_WAIT.observe(0.0)
+                return AdmissionTicket(self)
+            if self.queued >= self.max_queue:
+                raise self._reject("queue_full")
+            waiter = _Waiter()
+            priority = cost if self.prefer_small else 0
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+            self.queued += 1
+
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if not waiter.granted:
+                # Hết thời gian chờ: bỏ khỏi hàng đợi (xoá lười trong heap)
+                waiter.cancelled = True
+                self.queued -= 1
+                raise self._reject("timeout")
+        ADMISSION_WAIT.observe(time.monotonic() - t0)
+        return AdmissionTicket(self)
+
+    @contextmanager
+    def admit(self, cost=0):
+        ticket = self.acquire(cost)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _release(self, service_time):
+        with self._lock:
+            self._service_time = 0.9 * self._service_time + 0.1 * service_time
+            self.active -= 1
+            while self._heap and self.active < self.max_concurrency:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self.queued -= 1
+                self.active += 1
+                self.admitted_total += 1
+                waiter.event.set()
+
+    def _reject(self, reason):
+        """Gọi khi đang giữ lock"""
+        self.rejected_total += 1
+        ADMISSION_REJECTIONS.inc(reason=reason)
+        # Ước lượng thời gian để hàng đợi hiện tại chạy hết
+        drain = self._service_time * (self.queued + 1) / max(self.max_concurrency, 1)
+        return AdmissionRejected(reason, max(1, math.ceil(drain)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+                "in_flight": self.active,
+                "queue_depth": self.queued,
+                "admitted_total": self.admitted_total,
+                "rejected_total": self.rejected_total,
+                "avg_service_seconds": self._service_time,
+            }
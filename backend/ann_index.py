@@ -0,0 +1,413 @@
+"""
+Bản sao in-process (FAISS HNSW) của các claim REAL, để retrieval không phải
+round-trip tới pgvector cho mỗi request.
+
+- Build lúc khởi động từ 1 lượt export hàng loạt (server-side cursor, embedding::real[]).
+- Lưu vector đã chuẩn hoá (inner product = cosine), id claim và nội dung dạng
+  1 blob UTF-8 + mảng offsets (không giữ hàng trăm nghìn object str).
+- search() trả về đúng định dạng của AdvancedFactChecker.search_evidence,
+  distance = cosine distance giống toán tử `<=>` của pgvector.
+- Copy-on-write: search() chỉ lấy tham chiếu tới snapshot hiện tại (khoá rất ngắn) rồi
+  tìm ngoài khoá -> các request tìm song song, không chờ cập nhật. Mỗi snapshot gồm:
+    base : HNSW build 1 lần trong reload(), không bao giờ bị sửa
+    delta: claim thêm / sửa qua change feed (backend/change_feed.py), tìm brute-force trên
+           prefix của buffer append-only -> dòng ghi thêm sau không ảnh hưởng snapshot cũ
+    dead : dòng đã bị thay / xoá (tombstone), bỏ qua khi tìm kiếm
+  apply_changes() dựng snapshot mới ngoài khoá rồi thay tham chiếu. Tombstone vượt
+  ANN_MAX_TOMBSTONE_RATIO hoặc delta vượt ANN_MAX_DELTA thì build lại toàn bộ.
+- Chưa build được / lỗi khi tìm -> Verifier quay về truy vấn Postgres.
+
+Bật bằng ENABLE_ANN_REPLICA=1. Đo recall / bộ nhớ: python scripts/evaluate_ann_replica.py
+"""
+
+import os
+import threading
+import time
+from array import array
+
+import faiss
+import numpy as np
+
+ENABLE_ANN_REPLICA = os.getenv("ENABLE_ANN_REPLICA", "0") == "1"
+ANN_DIMENSION = int(os.getenv("ANN_DIMENSION", "768")) # Chỉ dùng khi bảng claims chưa có claim REAL
+ANN_HNSW_M = int(os.getenv("ANN_HNSW_M", "32"))
+ANN_EF_CONSTRUCTION = int(os.getenv("ANN_EF_CONSTRUCTION", "200"))
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", "64"))
+ANN_EXPORT_BATCH = int(os.getenv("ANN_EXPORT_BATCH", "10000"))
+ANN_MAX_TOMBSTONE_RATIO = float(os.getenv("ANN_MAX_TOMBSTONE_RATIO", "0.2"))
+# Delta tìm brute-force (~n * dim phép nhân / query): quá ngưỡng thì gộp vào HNSW
+ANN_MAX_DELTA = int(os.getenv("ANN_MAX_DELTA", "20000"))
+
+EXPORT_SQL = """
+    SELECT id, content, embedding::real[], article_id
+    FROM claims
+    WHERE system_label = 'REAL' AND embedding IS NOT NULL
+    ORDER BY id
+"""
+
+FETCH_CHANGED_SQL = """
+    SELECT id, content, embedding::real[], article_id
+    FROM claims
+    WHERE id = ANY(%s) AND system_label = 'REAL' AND embedding IS NOT NULL
+"""
+
+def _normalized(vectors):
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2) # Copy: normalize tại chỗ
+    if len(vectors):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+class _Base:
+    """Phần build 1 lần trong reload(); bất biến sau khi tạo nên tìm song song không cần khoá"""
+
+    def __init__(self, dimension, m, ef_construction, ef_search, ids=(), contents=(), vectors=None, article_ids=None):
+        self.index = faiss.IndexHNSWFlat(dimension, m, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = ef_construction
+        self.index.hnsw.efSearch = ef_search
+        self.ids = array("q", ids)                                 # dòng -> claim id
+        self.article_ids = array("q", (a or 0 for a in article_ids or [0] * len(self.ids))) # 0 = không thuộc bài nào
+        self.offsets = array("q", [0])                             # dòng -> vị trí nội dung trong blob
+        self.content_blob = bytearray()
+        for content in contents:
+            self.content_blob += content.encode("utf-8")
+            self.offsets.append(len(self.content_blob))
+        if len(self.ids):
+            self.index.add(_normalized(vectors))
+        self.row_of = {claim_id: row for row, claim_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def content(self, row):
+        return self.content_blob[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+class _Delta:
+    """
+    Buffer append-only của các dòng thêm qua change feed (chỉ 1 writer).
+    Snapshot chỉ đọc prefix [0, size) nên ghi thêm phía sau không cần khoá;
+    hết chỗ thì cấp buffer mới (snapshot cũ vẫn giữ buffer cũ).
+    """
+
+    def __init__(self, dimension, capacity=1024):
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.ids = array("q")
+        self.article_ids = array("q")
+        self.contents = []
+
+    def append(self, size, ids, contents, vectors, article_ids):
+        """Ghi các dòng mới từ vị trí size; trả về buffer chứa chúng (self hoặc buffer mới)"""
+        buffer = self
+        needed = size + len(ids)
+        if needed > len(self.vectors) or len(self.ids) != size:
+            buffer = _Delta(self.vectors.shape[1], max(needed, 2 * len(self.vectors)))
+            buffer.vectors[:size] = self.vectors[:size]
+            buffer.ids.extend(self.ids[:size])
+            buffer.article_ids.extend(self.article_ids[:size])
+            buffer.contents.extend(self.contents[:size])
+        buffer.vectors[size:needed] = _normalized(vectors)
+        buffer.ids.extend(ids)
+        buffer.article_ids.extend(a or 0 for a in article_ids)
+        buffer.contents.extend(contents)
+        return buffer
+
+class _Snapshot:
+    """Trạng thái replica tại 1 thời điểm; không bị sửa sau khi được công bố"""
+
+    def __init__(self, base, delta, delta_size=0, delta_row_of=None, dead=frozenset()):
+        self.base = base
+        self.delta = delta
+        self.delta_size = delta_size
+        self.delta_row_of = delta_row_of or {} # claim id -> dòng delta mới nhất
+        self.dead = dead                       # dòng (base: 0.., delta: len(base)..) bị thay / xoá
+
+    @property
+    def rows(self):
+        return len(self.base) + self.delta_size
+
+    def __len__(self):
+        return self.rows - len(self.dead)
+
+    def current_row(self, claim_id):
+        if claim_id in self.delta_row_of:
+            row = len(self.base) + self.delta_row_of[claim_id]
+        else:
+            row = self.base.row_of.get(claim_id)
+        return None if row is None or row in self.dead else row
+
+    def alive(self, row, exclude_article=None):
+        return row not in self.dead and (exclude_article is None or self.article_id(row) != exclude_article)
+
+    def claim_id(self, row):
+        n = len(self.base)
+        return self.base.ids[row] if row < n else self.delta.ids[row - n]
+
+    def article_id(self, row):
+        n = len(self.base)
+        return self.base.article_ids[row] if row < n else self.delta.article_ids[row - n]
+
+    def content(self, row):
+        n = len(self.base)
+        return self.base.content(row) if row < n else self.delta.contents[row - n]
+
+    def search_delta(self, queries, k):
+        """Brute-force trên delta: (sims, rows) dạng giống faiss, rows đã cộng offset base"""
+        if not self.delta_size:
+            return None, None
+        sims = queries @ self.delta.vectors[:self.delta_size].T
+        k = min(k, self.delta_size)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(sims, top, axis=1), top + len(self.base)
+
+class ClaimANNIndex:
+    def __init__(self, db_pool=None, dimension=ANN_DIMENSION, m=ANN_HNSW_M,
+                 ef_construction=ANN_EF_CONSTRUCTION, ef_search=ANN_EF_SEARCH):
+        self.db_pool = db_pool
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._lock = threading.Lock()        # Chỉ bảo vệ việc đọc / thay tham chiếu snapshot
+        self._write_lock = threading.RLock() # Tuần tự hoá reload / apply_changes (1 writer)
+        self._state = _Snapshot(self._new_base(), _Delta(self.dimension))
+
+        # Horizon (xid) của change feed: replica đã có mọi thay đổi của transaction có xid nhỏ hơn
+        self.change_horizon = None
+        self.change_seq = 0 # seq lớn nhất đã áp dụng (chỉ để theo dõi)
+        self.changes_applied = 0
+        self.reloads = 0
+        self.searches = 0
+        self.build_seconds = None
+        self.export_seconds = None
+        self.built_at = None
+
+    def _new_base(self, ids=(), contents=(), vectors=None, article_ids=None):
+        return _Base(self.dimension, self.m, self.ef_construction, self.ef_search, ids, contents, vectors, article_ids)
+
+    def _snapshot(self):
+        with self._lock:
+            return self._state
+
+    def _publish(self, state, **attrs):
+        with self._lock:
+            self._state = state
+            for name, value in attrs.items():
+                setattr(self, name, value)
+
+    @classmethod
+    def from_database(cls, db_pool, **kwargs):
+        replica = cls(db_pool=db_pool, **kwargs)
+        replica.reload()
+        return replica
+
+    # ================= BUILD =================
+    def _export(self):
+        """
+        Export toàn bộ claim REAL (theo từng lô ANN_EXPORT_BATCH dòng) cùng horizon
+        của change feed (xmin của snapshot), trong 1 snapshot REPEATABLE READ.
+        Transaction có xid >= horizon có thể đã nằm trong export -> feed gửi lại, vô hại
+        vì apply_changes idempotent.
+        """
+        ids, contents, article_ids, chunks = [], [], [], []
+        with self.db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cur.execute("SELECT to_regclass('claims_changes') IS NOT NULL")
+                change_horizon = None
+                if cur.fetchone()[0]:
+                    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+                    change_horizon = cur.fetchone()[0]
+            # Named cursor = server-side cursor: không kéo cả bảng vào RAM 1 lần
+            with conn.cursor(name="ann_replica_export") as cur:
+                cur.itersize = ANN_EXPORT_BATCH
+                cur.execute(EXPORT_SQL)
+                while True:
+                    rows = cur.fetchmany(ANN_EXPORT_BATCH)
+                    if not rows:
+                        break
+                    ids.extend(r[0] for r in rows)
+                    contents.extend(r[1] for r in rows)
+                    article_ids.extend(r[3] for r in rows)
+                    chunks.append(np.asarray([r[2] for r in rows], dtype=np.float32))
+        vectors = np.concatenate(chunks) if chunks else np.zeros((0, self.dimension), dtype=np.float32)
+        return change_horizon, ids, contents, article_ids, vectors
+
+    def reload(self):
+        """Build lại toàn bộ từ Postgres rồi thay nguyên khối (search vẫn chạy trên bản cũ)"""
+        with self._write_lock:
+            t0 = time.perf_counter()
+            change_horizon, ids, contents, article_ids, vectors = self._export()
+            export_seconds = time.perf_counter() - t0
+            self.load(ids, contents, vectors, article_ids, change_horizon=change_horizon)
+            self.export_seconds = export_seconds
+            self.build_seconds = time.perf_counter() - t0 - export_seconds
+            self.reloads += 1
+
+    def load(self, ids, contents, vectors, article_ids=None, change_horizon=None):
+        """Build snapshot mới (HNSW base, delta rỗng) từ dữ liệu đã có rồi thay nguyên khối"""
+        with self._write_lock:
+            if len(vectors):
+                self.dimension = np.asarray(vectors).shape[1]
+            state = _Snapshot(self._new_base(ids, contents, vectors, article_ids), _Delta(self.dimension))
+            self._publish(state, change_horizon=change_horizon, built_at=time.time())
+
+    # ================= CẬP NHẬT TĂNG DẦN =================
+    def apply_changes(self, changes):
+        """
+        Áp dụng 1 lô thay đổi từ change feed: list (seq, op, claim_id).
+        Claim bị chạm tới được đọc lại trạng thái hiện tại từ DB (còn là REAL -> thêm
+        bản mới vào delta, không -> tombstone), nên thứ tự / trùng lặp sự kiện không ảnh hưởng.
+        TRUNCATE -> build lại từ DB: feed có thể gửi lại TRUNCATE đã nằm trong export,
+        xoá trắng rồi chỉ thêm các claim đi kèm trong lô sẽ làm mất claim chèn sau đó.
+        """
+        if not changes:
+            return
+        with self._write_lock:
+            max_seq = max(self.change_seq, max(seq for seq, _, _ in changes))
+            if any(op == "TRUNCATE" for _, op, _ in changes):
+                self.reload()
+                self.change_seq, self.changes_applied = max_seq, self.changes_applied + len(changes)
+                return
+
+            touched = list(dict.fromkeys(c for _, _, c in changes if c is not None))
+            rows = []
+            if touched:
+                with self.db_pool.connection() as conn, conn.cursor() as cur:
+                    cur.execute(FETCH_CHANGED_SQL, (touched,))
+                    rows = cur.fetchall()
+            self._apply_rows(touched, rows)
+            self.change_seq, self.changes_applied = max_seq, self.changes_applied + len(changes)
+
+            state = self._snapshot()
+            needs_compaction = (
+                len(state.dead) > ANN_MAX_TOMBSTONE_RATIO * max(len(state), 1)
+                or state.delta_size > ANN_MAX_DELTA
+            )
+            if needs_compaction:
+                print(f"🧹 [ANN] {len(state.dead)} tombstone, delta {state.delta_size} dòng, build lại replica...")
+                self.reload()
+
+    def _apply_rows(self, touched, rows):
+        """
+        Dựng snapshot mới ngoài khoá: claim bị chạm tới -> dòng cũ thành tombstone,
+        bản hiện tại (rows) nối vào delta; sau đó thay tham chiếu.
+        """
+        with self._write_lock:
+            state = self._snapshot()
+            dead = set(state.dead)
+            for claim_id in touched:
+                row = state.current_row(claim_id)
+                if row is not None:
+                    dead.add(row)
+
+            delta, delta_size = state.delta, state.delta_size
+            delta_row_of = dict(state.delta_row_of)
+            if rows:
+                delta = delta.append(
+                    delta_size, [r[0] for r in rows], [r[1] for r in rows],
+                    np.asarray([r[2] for r in rows], dtype=np.float32).reshape(len(rows), self.dimension),
+                    [r[3] for r in rows],
+                )
+                for offset, r in enumerate(rows):
+                    delta_row_of[r[0]] = delta_size + offset
+                delta_size += len(rows)
+            self._publish(_Snapshot(state.base, delta, delta_size, delta_row_of, frozenset(dead)))
+
+    # ================= TÌM KIẾM =================
+    def __len__(self):
+        return len(self._snapshot())
+
+    def search(self, claim_vectors, top_k=1, exclude_articles=None):
+        """
+        Tìm evidence cho list vector claim. Trả về list (cùng thứ tự), mỗi phần tử là list
+        ứng viên (id, content, system_label, distance) sắp xếp theo distance tăng dần.
+        exclude_articles: article_id (cùng thứ tự) mà ứng viên không được thuộc về, None = không loại.
+        Chạy trên snapshot lấy lúc bắt đầu, không giữ khoá trong lúc tìm.
+        """
+        queries = _normalized(claim_vectors)
+        if not len(queries):
+            return []
+        with self._lock:
+            state = self._state
+            self.searches += len(queries)
+        total = state.rows
+        if not total:
+            return [[] for _ in range(len(queries))]
+
+        # Có tombstone / loại trừ bài -> lấy dư ứng viên để sau khi lọc vẫn đủ top_k
+        k = top_k if not (state.dead or exclude_articles) else top_k * 2 + 8
+        base_total = len(state.base)
+        if base_total:
+            base_sims, base_rows = state.base.index.search(queries, min(k, base_total))
+        delta_sims, delta_rows = state.search_delta(queries, k)
+
+        excludes = exclude_articles or [None] * len(queries)
+        candidates = []
+        for i, (query, exclude) in enumerate(zip(queries, excludes)):
+            hits = []
+            if base_total:
+                hits.extend(zip(base_sims[i], base_rows[i]))
+                wider = min(k, base_total)
+                while wider < base_total and self._count_alive(state, hits, exclude) < top_k:
+                    # Base bị lọc hết: tìm rộng dần (phần delta đã là brute-force)
+                    wider = min(base_total, wider * 4)
+                    s_row, i_row = state.base.index.search(query[None, :], wider)
+                    hits = list(zip(s_row[0], i_row[0]))
+            if delta_rows is not None:
+                hits.extend(zip(delta_sims[i], delta_rows[i]))
+                if self._count_alive(state, hits, exclude) < top_k and state.delta_size > len(delta_rows[i]):
+                    s_row, i_row = state.search_delta(query[None, :], state.delta_size)
+                    hits.extend(zip(s_row[0], i_row[0]))
+            alive = sorted(
+                {int(r): float(s) for s, r in hits if r >= 0 and state.alive(int(r), exclude)}.items(),
+                key=lambda item: -item[1],
+            )
+            candidates.append([
+                (int(state.claim_id(r)), state.content(r), "REAL", float(1.0 - s)) for r, s in alive[:top_k]
+            ])
+        return candidates
+
+    @staticmethod
+    def _count_alive(state, hits, exclude):
+        return sum(1 for _, r in hits if r >= 0 and state.alive(int(r), exclude))
+
+    def set_ef_search(self, ef_search):
+        self.ef_search = ef_search
+        self._snapshot().base.index.hnsw.efSearch = ef_search
+
+    def vectors(self):
+        """(claim ids, vector đã chuẩn hoá) của các dòng còn sống — dùng cho đánh giá recall"""
+        state = self._snapshot()
+        rows = [r for r in range(state.rows) if r not in state.dead]
+        base_vectors = state.base.index.storage.reconstruct_n(0, len(state.base)) if len(state.base) \
+            else np.zeros((0, self.dimension), dtype=np.float32)
+        all_vectors = np.concatenate([base_vectors, state.delta.vectors[:state.delta_size]])
+        return np.asarray([state.claim_id(r) for r in rows], dtype=np.int64), all_vectors[rows]
+
+    def stats(self):
+        state = self._snapshot()
+        base, delta = state.base, state.delta
+        memory = {
+            # Vector + đồ thị HNSW (ước lượng: float32 vector + M*2 láng giềng int32 ở tầng 0)
+            "index": len(base) * (self.dimension * 4 + self.m * 2 * 4) + delta.vectors.nbytes,
+            "ids": (len(base.ids) + len(base.article_ids) + len(delta.ids) + len(delta.article_ids)) * base.ids.itemsize,
+            "content": len(base.content_blob) + len(base.offsets) * base.offsets.itemsize,
+        }
+        memory["total"] = sum(memory.values())
+        return {
+            "size": len(state),
+            "rows": state.rows,
+            "delta_rows": state.delta_size,
+            "tombstones": len(state.dead),
+            "dimension": self.dimension,
+            "hnsw_m": self.m,
+            "ef_search": base.index.hnsw.efSearch,
+            "change_horizon": self.change_horizon,
+            "change_seq": self.change_seq,
+            "changes_applied": self.changes_applied,
+            "reloads": self.reloads,
+            "searches": self.searches,
+            "build_seconds": self.build_seconds,
+            "export_seconds": self.export_seconds,
+            "built_at": self.built_at,
+            "memory_bytes": memory,
+        }
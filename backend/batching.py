@@ -0,0 +1,132 @@
+"""
+Dynamic micro-batching cho inference.
+
+Nhiều request /api/v1/verify chạy song song (threadpool của FastAPI) sẽ đẩy
+công việc encode / rerank vào chung 1 hàng đợi. Worker gom các job lại thành
+1 batch và flush khi:
+    - Tổng số item đạt max_batch_size, hoặc
+    - Hết max_wait_ms kể từ job đầu tiên của batch.
+Kết quả được tách ra và trả về đúng cho từng caller qua Future.
+Batcher tạo trước khi fork (pre-fork serving) tự khởi động lại worker thread
+trong process con ở lần submit đầu tiên.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+class _Job:
+    __slots__ = ("items", "future")
+
+    def __init__(self, items):
+        self.items = items
+        self.future = Future()
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch_size=64, max_wait_ms=5.0, name="batcher"):
+        """
+        fn: hàm nhận list item, trả về kết quả có thể slice (list / numpy array)
+            với len(result) == len(items).
+        """
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        # Thống kê
+        self.batches = 0
+        self.items = 0
+        self.jobs = 0
+
+        self._start_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name=f"{self.name}-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        """Đưa 1 job vào hàng đợi, trả về Future chứa kết quả của riêng job đó"""
+        job = _Job(list(items))
+        if not job.items:
+            job.future.set_result([])
+            return job.future
+        if self._pid != os.getpid():
+            # Process con sau fork: worker thread của process cha không tồn tại ở đây
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+        self._queue.put(job)
+        return job.future
+
+    def run(self, items):
+        """Submit và chờ kết quả (dùng trong code sync)"""
+        return self.submit(items).result()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+
+            jobs = [job]
+            size = len(job.items)
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+
+            # Gom thêm job cho tới khi đủ size hoặc hết deadline
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                jobs.append(nxt)
+                size += len(nxt.items)
+
+            self._flush(jobs)
+            if stop:
+                return
+
+    def _flush(self, jobs):
+        items = [item for job in jobs for item in job.items]
+        try:
+            results = self.fn(items)
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        self.jobs += len(jobs)
+
+        offset = 0
+        for job in jobs:
+            n = len(job.items)
+            job.future.set_result(results[offset:offset + n])
+            offset += n
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "jobs": self.jobs,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+        }
@@ -0,0 +1,95 @@
+"""
+Ngân sách thời gian / số claim cho 1 request verify.
+
+Extension cắt nội dung ở 4000 ký tự, nhưng client khác gửi nguyên bài -> latency tăng
+theo số câu. Khi có ngân sách:
+    - claim được xếp theo độ nổi bật (salience), chỉ giữ max_claims claim đầu
+    - chấm theo nhóm nhỏ BUDGET_CHUNK_SIZE claim, dừng khi nhóm tiếp theo không kịp xong
+      trước deadline (ước lượng bằng thời gian của nhóm trước)
+    - kết luận tính trên các claim đã chấm, kết quả có partial = True
+"""
+
+import os
+import re
+import time
+
+from backend.metrics import VERIFY_BUDGET_STOPS
+
+# Ngân sách mặc định (0 = không giới hạn), request có thể truyền time_budget_ms / max_claims riêng
+VERIFY_TIME_BUDGET_MS = float(os.getenv("VERIFY_TIME_BUDGET_MS", "0"))
+VERIFY_MAX_CLAIMS = int(os.getenv("VERIFY_MAX_CLAIMS", "0"))
+# Nhóm nhỏ hơn -> kiểm tra deadline thường xuyên hơn, nhưng nhiều lượt retrieval / rerank hơn
+BUDGET_CHUNK_SIZE = int(os.getenv("BUDGET_CHUNK_SIZE", "8"))
+
+# Số câu đầu bài được coi là phần "lead" (tin tức viết theo kim tự tháp ngược)
+LEAD_SENTENCES = 5
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+def salience_scores(claims, claim_probs=None):
+    """
+    Điểm nổi bật của từng claim (theo thứ tự trong bài), cao = chấm trước:
+        - vị trí: câu ở đầu bài chứa thông tin chính
+        - con số (số liệu, ngày tháng, số tiền) và tên riêng (từ viết hoa giữa câu):
+          claim cụ thể, kiểm chứng được
+        - xác suất CLAIM của claim extractor (claim_probs, nếu bật)
+    """
+    scores = []
+    for i, claim in enumerate(claims):
+        numbers = len(NUMBER_PATTERN.findall(claim))
+        proper_nouns = sum(1 for w in claim.split()[1:] if w[:1].isupper())
+        score = (0.5 / (1 + i / LEAD_SENTENCES)
+                 + 0.3 * min(numbers, 2) / 2
+                 + 0.2 * min(proper_nouns, 3) / 3)
+        if claim_probs:
+            score *= claim_probs.get(claim, 1.0)
+        scores.append(score)
+    return scores
+
+class VerifyBudget:
+    def __init__(self, time_budget_ms=None, max_claims=None):
+        self.time_budget_ms = (VERIFY_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms) or None
+        self.max_claims = (VERIFY_MAX_CLAIMS if max_claims is None else max_claims) or None
+        self.started = time.perf_counter()
+        self.deadline = self.started + self.time_budget_ms / 1000 if self.time_budget_ms else None
+        self.dropped = 0     # bị cắt bởi max_claims
+        self.unprocessed = 0 # chưa kịp chấm khi hết thời gian
+
+    @classmethod
+    def create(cls, time_budget_ms=None, max_claims=None):
+        """None nếu không có giới hạn nào (verify như bình thường)"""
+        budget = cls(time_budget_ms, max_claims)
+        return budget if budget.deadline is not None or budget.max_claims else None
+
+    def select(self, claims, claim_probs=None):
+        """Xếp claim theo salience giảm dần (bằng điểm giữ thứ tự trong bài), cắt còn max_claims"""
+        scores = salience_scores(claims, claim_probs)
+        ranked = [claims[i] for i in sorted(range(len(claims)), key=lambda i: -scores[i])]
+        if self.max_claims and len(ranked) > self.max_claims:
+            self.dropped = len(ranked) - self.max_claims
+            VERIFY_BUDGET_STOPS.inc(reason="max_claims")
+            ranked = ranked[:self.max_claims]
+        return ranked
+
+    def chunk_size(self, step):
+        return min(step, BUDGET_CHUNK_SIZE) if self.deadline is not None else step
+
+    def should_stop(self, next_chunk_seconds, remaining):
+        """Nhóm tiếp theo (mất khoảng next_chunk_seconds) không kịp xong trước deadline"""
+        if self.deadline is None or time.perf_counter() + next_chunk_seconds <= self.deadline:
+            return False
+        self.unprocessed = remaining
+        VERIFY_BUDGET_STOPS.inc(reason="deadline")
+        return True
+
+    @property
+    def partial(self):
+        return bool(self.dropped or self.unprocessed)
+
+    def stats(self):
+        return {
+            "time_budget_ms": self.time_budget_ms,
+            "max_claims": self.max_claims,
+            "claims_dropped": self.dropped,
+            "claims_unprocessed": self.unprocessed,
+            "elapsed_ms": (time.perf_counter() - self.started) * 1000,
+        }
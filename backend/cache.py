@@ -0,0 +1,256 @@
+"""
+Cache kết quả cho Backend.
+
+VerdictCache: cache in-process cho kết quả verify cả bài báo.
+    - Key = hash(clean_text(bài báo) + model_version)
+    - LRU (giới hạn số phần tử) + TTL (hết hạn theo thời gian)
+    - Được xoá toàn bộ khi load model mới
+
+PairScoreStore: cache bền vững (file SQLite) cho xác suất NLI của từng cặp
+    (hash claim, id evidence trong bảng claims, hash nội dung evidence, model_version).
+    - Sống qua restart -> claim phổ biến gần như không tốn CrossEncoder
+    - Evidence bị sửa / xoá (change feed) -> xoá điểm của evidence đó
+    - Dọn theo tuổi (PAIR_SCORE_TTL_DAYS), kích thước (PAIR_SCORE_MAX_ROWS) và
+      model_version không còn active (lúc khởi động / reload model)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from backend.metrics import VERDICT_CACHE_LOOKUPS, PAIR_CACHE_LOOKUPS
+
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "1024"))
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", "600"))
+
+PAIR_SCORE_DB = os.getenv("PAIR_SCORE_DB", "data/pair_scores.sqlite3")
+PAIR_SCORE_TTL_DAYS = float(os.getenv("PAIR_SCORE_TTL_DAYS", "30"))      # 0 = không dọn theo tuổi
+PAIR_SCORE_MAX_ROWS = int(os.getenv("PAIR_SCORE_MAX_ROWS", "2000000"))  # 0 = không giới hạn
+PAIR_SCORE_PRUNE_EVERY = int(os.getenv("PAIR_SCORE_PRUNE_EVERY", "10000")) # Số dòng ghi giữa 2 lần dọn
+# Số key mỗi query IN (...) (4 tham số / key, dưới giới hạn 999 biến của SQLite cũ)
+PAIR_SCORE_QUERY_CHUNK = 240
+
+def text_hash(text):
+    """SHA-256 của văn bản đã chuẩn hoá"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class VerdictCache:
+    def __init__(self, max_size=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(cleaned_text, model_version):
+        return text_hash(f"{model_version}\x00{cleaned_text}")
+
+    def get(self, key):
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                VERDICT_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                VERDICT_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            VERDICT_CACHE_LOOKUPS.inc(result="hit")
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+class PairScoreStore:
+    def __init__(self, path=PAIR_SCORE_DB, ttl_days=PAIR_SCORE_TTL_DAYS, max_rows=PAIR_SCORE_MAX_ROWS):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.max_rows = max_rows
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 1 connection dùng chung giữa các thread, bảo vệ bằng lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL: nhiều worker process có thể đọc/ghi cùng file
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            columns = [r[1] for r in self._conn.execute("PRAGMA table_info(pair_scores)")]
+            if columns and "evidence_hash" not in columns:
+                # File tạo bởi bản cũ (key không có hash nội dung evidence): chỉ là cache -> tạo lại
+                self._conn.execute("DROP TABLE pair_scores")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pair_scores (
+                    claim_hash TEXT NOT NULL,
+                    evidence_id INTEGER NOT NULL,
+                    evidence_hash TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    p_refuted REAL NOT NULL,
+                    p_supported REAL NOT NULL,
+                    p_nei REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (claim_hash, evidence_id, evidence_hash, model_version)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pair_scores_evidence_idx ON pair_scores(evidence_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pair_scores_created_idx ON pair_scores(created_at)")
+            self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.pruned = 0
+        self._writes_since_prune = 0
+
+    @staticmethod
+    def make_key(claim, evidence_id, evidence, model_version):
+        """
+        Key gồm cả hash nội dung evidence: claim bị sửa nội dung (UPDATE cùng id) không
+        bao giờ trả về điểm cũ, kể cả khi thay đổi xảy ra lúc Backend không chạy.
+        """
+        return (text_hash(claim), int(evidence_id), text_hash(evidence), model_version)
+
+    def get_many(self, keys):
+        """Trả về dict key -> (p_refuted, p_supported, p_nei) cho các key đã có (1 query / PAIR_SCORE_QUERY_CHUNK key)"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), PAIR_SCORE_QUERY_CHUNK):
+                chunk = keys[start:start + PAIR_SCORE_QUERY_CHUNK]
+                rows = self._conn.execute(f"""
+                    SELECT claim_hash, evidence_id, evidence_hash, model_version, p_refuted, p_supported, p_nei
+                    FROM pair_scores
+                    WHERE (claim_hash, evidence_id, evidence_hash, model_version)
+                          IN (VALUES {", ".join(["(?, ?, ?, ?)"] * len(chunk))})
+                """, [v for key in chunk for v in key]).fetchall()
+                found.update((tuple(r[:4]), r[4:]) for r in rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        PAIR_CACHE_LOOKUPS.inc(len(found), result="hit")
+        PAIR_CACHE_LOOKUPS.inc(len(keys) - len(found), result="miss")
+        return found
+
+    def put_many(self, items):
+        """items: list (key, probs). Cứ PAIR_SCORE_PRUNE_EVERY dòng ghi thì dọn theo tuổi / kích thước"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(*key, *map(float, probs), now) for key, probs in items]
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO pair_scores
+                (claim_hash, evidence_id, evidence_hash, model_version, p_refuted, p_supported, p_nei, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.commit()
+            self._writes_since_prune += len(rows)
+            due = self._writes_since_prune >= PAIR_SCORE_PRUNE_EVERY
+        if due:
+            self.prune()
+
+    def invalidate_evidence(self, evidence_ids):
+        """Xoá điểm của các evidence bị sửa / xoá (change feed của bảng claims)"""
+        evidence_ids = list(dict.fromkeys(int(i) for i in evidence_ids))
+        deleted = 0
+        with self._lock:
+            for start in range(0, len(evidence_ids), PAIR_SCORE_QUERY_CHUNK):
+                chunk = evidence_ids[start:start + PAIR_SCORE_QUERY_CHUNK]
+                deleted += self._conn.execute(
+                    f"DELETE FROM pair_scores WHERE evidence_id IN ({', '.join('?' * len(chunk))})", chunk
+                ).rowcount
+            self._conn.commit()
+            self.invalidated += deleted
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self.invalidated += self._conn.execute("DELETE FROM pair_scores").rowcount
+            self._conn.commit()
+
+    def prune(self, keep_versions=None):
+        """
+        Dọn store: dòng cũ hơn ttl_days, dòng của model_version không nằm trong keep_versions
+        (None = giữ mọi version), rồi bỏ dòng cũ nhất khi vượt max_rows. Trả về số dòng đã xoá.
+        """
+        deleted = 0
+        with self._lock:
+            self._writes_since_prune = 0
+            if self.ttl_days > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM pair_scores WHERE created_at < ?", (time.time() - self.ttl_days * 86400,)
+                ).rowcount
+            if keep_versions is not None:
+                keep_versions = list(keep_versions)
+                deleted += self._conn.execute(
+                    f"DELETE FROM pair_scores WHERE model_version NOT IN ({', '.join('?' * len(keep_versions))})",
+                    keep_versions,
+                ).rowcount
+            if self.max_rows > 0:
+                excess = self._conn.execute("SELECT COUNT(*) FROM pair_scores").fetchone()[0] - self.max_rows
+                if excess > 0:
+                    deleted += self._conn.execute("""
+                        DELETE FROM pair_scores WHERE (claim_hash, evidence_id, evidence_hash, model_version) IN (
+                            SELECT claim_hash, evidence_id, evidence_hash, model_version
+                            FROM pair_scores ORDER BY created_at LIMIT ?
+                        )
+                    """, (excess,)).rowcount
+            self._conn.commit()
+            self.pruned += deleted
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM pair_scores").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "size": size,
+                "max_rows": self.max_rows,
+                "ttl_days": self.ttl_days,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidated": self.invalidated,
+                "pruned": self.pruned,
+            }
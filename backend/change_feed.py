@@ -0,0 +1,209 @@
+"""
+Change feed của bảng claims: stream INSERT / đổi nhãn / DELETE / TRUNCATE tới các
+subscriber trong process (ANN replica, verdict cache) để cập nhật tăng dần thay vì
+build lại toàn bộ.
+
+- Trigger trong Postgres (init_db_full.py) ghi mỗi thay đổi vào bảng claims_changes
+  (seq + xid của transaction ghi) và gửi NOTIFY 'claims_changes' (payload rỗng -> Postgres
+  gộp thành 1 thông báo / transaction, kể cả khi rebuild_knowledge_base.py chèn hàng chục
+  nghìn dòng).
+- Watermark là horizon theo xid, không phải seq: seq cấp lúc INSERT, transaction lấy seq
+  nhỏ có thể COMMIT sau khi seq lớn hơn đã được đọc -> đọc "seq > watermark" sẽ bỏ sót.
+  Mỗi lượt đọc lấy horizon mới = pg_snapshot_xmin(pg_current_snapshot()): mọi transaction
+  có xid < horizon đã kết thúc, nên các dòng có horizon cũ <= xid < horizon mới là đầy đủ
+  và không còn dòng nào của chúng xuất hiện muộn. Transaction mở lâu (kể cả của database
+  khác trên cùng server) chỉ làm chậm feed, không làm mất thay đổi.
+- ClaimsChangeFeed LISTEN trên 1 connection riêng (autocommit), mỗi lần có NOTIFY thì
+  đọc các dòng trong khoảng horizon theo lô (xid, seq) và gọi subscriber. Subscriber phải
+  idempotent: sau lỗi / kết nối lại, cả khoảng được đọc lại từ horizon cũ.
+- Mất kết nối: kết nối lại và đọc tiếp từ horizon -> không mất thay đổi nào.
+  Chỉ khi feed đứng yên lâu hơn CHANGE_FEED_RETENTION_HOURS (dòng chưa đọc có thể đã bị
+  dọn) mới báo on_gap (subscriber tự build lại toàn bộ).
+- Mỗi worker (kể cả pre-fork) chạy feed riêng của nó.
+"""
+
+import os
+import select
+import threading
+import time
+from datetime import timedelta
+
+import psycopg2
+
+from backend.metrics import CHANGE_FEED_EVENTS
+
+ENABLE_CHANGE_FEED = os.getenv("ENABLE_CHANGE_FEED", "1") == "1"
+CHANGE_FEED_CHANNEL = "claims_changes"
+CHANGE_FEED_BATCH = int(os.getenv("CHANGE_FEED_BATCH", "5000"))
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "5"))
+CHANGE_FEED_RECONNECT_SECONDS = float(os.getenv("CHANGE_FEED_RECONNECT_SECONDS", "5"))
+CHANGE_FEED_RETENTION_HOURS = float(os.getenv("CHANGE_FEED_RETENTION_HOURS", "24"))
+
+# xid8 -> bigint để psycopg2 trả về int (xid8 thực tế không vượt quá 2^63)
+HORIZON_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, NOW()"
+
+FETCH_CHANGES_SQL = """
+    SELECT seq, op, claim_id, xid::text::bigint
+    FROM claims_changes
+    WHERE (xid, seq) > (%s::text::xid8, %s) AND xid < %s::text::xid8
+    ORDER BY xid, seq
+    LIMIT %s
+"""
+
+class ClaimsChangeFeed:
+    def __init__(self, db_config, since=None, channel=CHANGE_FEED_CHANNEL):
+        """
+        since: horizon (xid) mà subscriber đã có mọi thay đổi của transaction nhỏ hơn
+               (vd ClaimANNIndex.change_horizon); None -> bắt đầu từ lúc kết nối.
+        """
+        self.db_config = db_config
+        self.channel = channel
+        self.horizon = since
+        self.horizon_at = None # Giờ DB lúc tính horizon gần nhất (phát hiện dòng bị dọn)
+        self.last_seq = None
+        self._subscribers = [] # (on_changes, on_gap)
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+        self.connected = False
+        self.reconnects = 0
+        self.events_total = 0
+        self.gaps_total = 0
+        self.last_event_at = None
+        self._next_cleanup = 0.0
+
+    def subscribe(self, on_changes, on_gap=None):
+        """
+        on_changes(changes): list (seq, op, claim_id) theo thứ tự (xid, seq)
+                             (op: INSERT | UPDATE | DELETE | TRUNCATE, claim_id=None với TRUNCATE);
+                             có thể nhận lại thay đổi đã áp dụng -> phải idempotent
+        on_gap(): thay đổi đã bị dọn trước khi đọc được -> subscriber phải build lại toàn bộ
+        """
+        self._subscribers.append((on_changes, on_gap))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="claims-change-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=CHANGE_FEED_POLL_SECONDS + 1)
+        self._close()
+
+    # ================= VÒNG LẶP =================
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                if self._stop.is_set():
+                    break
+                self._catch_up()
+                while not self._stop.is_set():
+                    # Chờ NOTIFY; hết thời gian vẫn đọc lại (phòng thông báo bị lỡ)
+                    select.select([self._conn], [], [], CHANGE_FEED_POLL_SECONDS)
+                    self._conn.poll()
+                    self._conn.notifies.clear()
+                    self._catch_up()
+                    self._cleanup()
+            except (psycopg2.Error, OSError) as e:
+                print(f"⚠️ [ChangeFeed] Mất kết nối: {e}. Thử lại sau {CHANGE_FEED_RECONNECT_SECONDS}s...")
+            except Exception as e:
+                # Lỗi của subscriber: đọc lại từ horizon ở lần kết nối sau
+                print(f"❌ [ChangeFeed] Lỗi khi áp dụng thay đổi: {e}")
+            self._close()
+            self.reconnects += 1
+            self._stop.wait(CHANGE_FEED_RECONNECT_SECONDS)
+
+    def _connect(self):
+        self._conn = psycopg2.connect(**self.db_config)
+        self._conn.autocommit = True
+        with self._conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('claims_changes') IS NOT NULL")
+            if not cur.fetchone()[0]:
+                print("⚠️ [ChangeFeed] Chưa có bảng claims_changes (chạy lại init_db_full.py), tắt change feed")
+                self._stop.set()
+                return
+            cur.execute(f"LISTEN {self.channel}")
+            if self.horizon is None:
+                cur.execute(HORIZON_SQL)
+                self.horizon, self.horizon_at = cur.fetchone()
+        self.connected = True
+
+    def _close(self):
+        self.connected = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+            self._conn = None
+
+    def _catch_up(self):
+        """Đọc mọi thay đổi của các transaction đã kết thúc sau horizon (theo lô) và chuyển cho subscriber"""
+        with self._conn.cursor() as cur:
+            cur.execute(HORIZON_SQL)
+            new_horizon, now = cur.fetchone()
+            retention = timedelta(hours=CHANGE_FEED_RETENTION_HOURS)
+            if self.horizon_at is not None and now - self.horizon_at > retention:
+                # Feed đứng yên quá lâu: dòng chưa đọc có thể đã bị _cleanup xoá
+                print(f"⚠️ [ChangeFeed] Không đọc thay đổi từ {self.horizon_at}, build lại toàn bộ")
+                self.gaps_total += 1
+                for _, on_gap in self._subscribers:
+                    if on_gap:
+                        on_gap()
+                self.horizon, self.horizon_at = new_horizon, now
+                return
+            if new_horizon <= self.horizon:
+                self.horizon_at = now
+                return
+
+            # seq >= 1 -> (horizon, 0) đứng trước mọi dòng có xid = horizon
+            position = (self.horizon, 0)
+            while True:
+                cur.execute(FETCH_CHANGES_SQL, (*position, new_horizon, CHANGE_FEED_BATCH))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                changes = [(seq, op, claim_id) for seq, op, claim_id, _ in rows]
+                for on_changes, _ in self._subscribers:
+                    on_changes(changes)
+                position = (rows[-1][3], rows[-1][0])
+                self.last_seq = max(self.last_seq or 0, max(seq for seq, _, _ in changes))
+                self.events_total += len(changes)
+                self.last_event_at = time.time()
+                for _, op, _ in changes:
+                    CHANGE_FEED_EVENTS.inc(op=op)
+                if len(rows) < CHANGE_FEED_BATCH:
+                    break
+            # Chỉ tiến horizon khi mọi subscriber đã áp dụng xong cả khoảng
+            self.horizon, self.horizon_at = new_horizon, now
+
+    def _cleanup(self):
+        """Dọn thay đổi cũ hơn CHANGE_FEED_RETENTION_HOURS (mọi worker cùng chạy cũng không sao)"""
+        if time.monotonic() < self._next_cleanup:
+            return
+        self._next_cleanup = time.monotonic() + 3600
+        with self._conn.cursor() as cur:
+            cur.execute(
+                # Chỉ xoá dòng của transaction đã kết thúc
+                """
+                DELETE FROM claims_changes
+                WHERE changed_at < NOW() - %s * INTERVAL '1 hour'
+                  AND xid < pg_snapshot_xmin(pg_current_snapshot())
+                """,
+                (CHANGE_FEED_RETENTION_HOURS,),
+            )
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "horizon": self.horizon,
+            "last_seq": self.last_seq,
+            "events_total": self.events_total,
+            "gaps_total": self.gaps_total,
+            "reconnects": self.reconnects,
+            "last_event_at": self.last_event_at,
+        }
@@ -0,0 +1,122 @@
+"""
+Connection pool dùng chung cho Backend API.
+
+- 1 pool được tạo trong lifespan của FastAPI và chia sẻ cho mọi endpoint
+  (verify, report, approve-report) thay vì psycopg2.connect() mỗi request.
+- Khi pool hết connection, request sẽ chờ tối đa `wait_timeout` giây rồi báo
+  PoolTimeout (thay vì dồn hàng trăm connection vào Postgres).
+- Câu truy vấn nóng (retrieval) được PREPARE phía server 1 lần / connection.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+from psycopg2 import pool as pg_pool
+
+from backend.metrics import stage, DB_POOL_TIMEOUTS
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+class PoolTimeout(Exception):
+    """Không lấy được connection trong thời gian cho phép"""
+
+class PooledConnection(extensions.connection):
+    """Connection nhớ những prepared statement đã tạo trên session của nó"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+class DatabasePool:
+    def __init__(self, db_config, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, wait_timeout=DB_POOL_TIMEOUT):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.wait_timeout = wait_timeout
+        self._pool = pg_pool.ThreadedConnectionPool(
+            minconn, maxconn, connection_factory=PooledConnection, **db_config
+        )
+        # ThreadedConnectionPool báo lỗi ngay khi hết connection -> dùng semaphore để chờ
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.in_use = 0
+        self.acquired_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts_total = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        Mượn 1 connection từ pool. Commit khi thành công, rollback khi lỗi,
+        connection hỏng sẽ bị loại khỏi pool.
+        """
+        t0 = time.perf_counter()
+        with stage("db_wait"):
+            acquired = self._slots.acquire(timeout=self.wait_timeout)
+        if not acquired:
+            with self._lock:
+                self.timeouts_total += 1
+            DB_POOL_TIMEOUTS.inc()
+            raise PoolTimeout(f"Không lấy được DB connection sau {self.wait_timeout}s")
+        waited = time.perf_counter() - t0
+
+        conn = None
+        try:
+            conn = self._pool.getconn()
+            with self._lock:
+                self.in_use += 1
+                self.acquired_total += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self.in_use -= 1
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pool_min": self.minconn,
+                "pool_max": self.maxconn,
+                "pool_in_use": self.in_use,
+                "pool_idle": len(self._pool._pool),
+                "acquired_total": self.acquired_total,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": (
+                    self.wait_seconds_total / self.acquired_total if self.acquired_total else 0.0
+                ),
+                "timeouts_total": self.timeouts_total,
+            }
+
+def execute_prepared(cur, name, param_types, sql, params):
+    """
+    Chạy câu SQL dạng prepared statement phía server.
+    `sql` dùng placeholder $1, $2... ; PREPARE chỉ chạy 1 lần cho mỗi connection
+    (cursor phải thuộc connection lấy từ DatabasePool).
+    """
+    prepared = cur.connection.prepared_statements
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {sql}")
+        prepared.add(name)
+
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders})", params)
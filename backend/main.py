@@ -1,13 +1,29 @@
 import uvicorn
-import psycopg2
+import anyio
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import signal
+import time
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 from contextlib import asynccontextmanager
 
 from backend.verifier import AdvancedFactChecker
+from backend.admission import AdmissionController, AdmissionRejected
+from backend.db import DatabasePool, PoolTimeout
+from backend.serve import read_memory
+from backend.verdict_store import ENABLE_PRECOMPUTED_VERDICTS
+from backend.metrics import (
+    REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, DB_POOL_IN_USE, BATCHER_QUEUE_DEPTH, MODEL_INFO,
+    ADMISSION_QUEUE_DEPTH, ADMISSION_IN_FLIGHT,
+    start_request_timings, server_timing_header,
+)
+
+BULK_MAX_ARTICLES = int(os.getenv("BULK_MAX_ARTICLES", "500"))
 
 # --- DB CONFIG ---
 DB_CONFIG = {
@@ -19,13 +35,30 @@ DB_CONFIG = {
 }
 
 checker_instance = None
+db_pool = None
+# Giới hạn số request verify chạy đồng thời + hàng đợi có giới hạn
+admission = AdmissionController()
+# Pre-fork serving (backend/serve.py): model đã load sẵn trong process cha
+preloaded_models = None
+prefork_parent_pid = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global checker_instance
-    checker_instance = AdvancedFactChecker()
+    global checker_instance, db_pool
+    # Endpoint sync chạy trên threadpool của anyio: đủ thread cho cả request đang chạy lẫn
+    # đang chờ admission, để hàng đợi thật sự nằm trong AdmissionController (có giới hạn)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, admission.max_concurrency + admission.max_queue + 16)
+    # Pool dùng chung cho verify / report / approve-report
+    db_pool = DatabasePool(DB_CONFIG)
+    # preloaded_models khác None -> dùng lại trọng số của process cha, không load lại
+    checker_instance = AdvancedFactChecker(db_pool=db_pool, preloaded=preloaded_models)
+    register_gauges()
     yield
+    checker_instance.close()
     checker_instance = None
+    db_pool.close()
+    db_pool = None
 
 app = FastAPI(title="Fact-Check API Pro", lifespan=lifespan)
 
@@ -36,6 +69,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- METRICS ---
+def register_gauges():
+    """Gauge đọc trạng thái lúc /metrics được scrape"""
+    DB_POOL_IN_USE.set_function(lambda: db_pool.stats()["pool_in_use"])
+    BATCHER_QUEUE_DEPTH.set_function(
+        lambda: {(b.name,): b.stats()["queue_depth"] for b in checker_instance.batchers()}
+    )
+    MODEL_INFO.set_function(lambda: {(checker_instance.model_version,): 1})
+    ADMISSION_QUEUE_DEPTH.set_function(lambda: admission.stats()["queue_depth"])
+    ADMISSION_IN_FLIGHT.set_function(lambda: admission.stats()["in_flight"])
+
+def overloaded(e: AdmissionRejected):
+    """503 + Retry-After: client thử lại sau thay vì chờ tới timeout"""
+    return HTTPException(503, str(e), headers={"Retry-After": str(e.retry_after)})
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """
+    Đếm request + latency theo route, gắn header Server-Timing với thời gian từng bước
+    (clean_text, sent_tokenize, encode, db_wait, pgvector_search, cross_encoder, aggregation).
+    Response dạng stream: header chỉ chứa các bước chạy xong trước byte đầu tiên.
+    """
+    timings = start_request_timings()
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - t0
+
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched" # Không dùng URL thật -> tránh bùng nổ label
+    HTTP_REQUESTS.inc(method=request.method, route=route_path, status=response.status_code)
+    HTTP_LATENCY.observe(elapsed, method=request.method, route=route_path)
+
+    timings["total"] = elapsed
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
 # --- SCHEMAS (Chuẩn Production) ---
 
 class EvidenceDetail(BaseModel):
@@ -51,9 +120,22 @@ class VerificationResult(BaseModel):
     explanation: str
     model_version: str
     details: List[EvidenceDetail]
+    partial: bool = False # True: hết ngân sách (time_budget_ms / max_claims), chưa chấm hết claim
+    stats: Optional[Dict[str, Any]] = None # Tỉ lệ lọc câu, số claim theo từng tầng cascade
 
 class NewsRequest(BaseModel):
     text: str
+    url: Optional[str] = None # URL tab -> tra verdict tính sẵn cho bài đã crawl
+    # Ngân sách cho bài dài: claim nổi bật nhất chấm trước, dừng khi hết thời gian / đủ số claim
+    time_budget_ms: Optional[float] = Field(None, gt=0)
+    max_claims: Optional[int] = Field(None, gt=0)
+
+class BatchNewsRequest(BaseModel):
+    texts: List[str]
+    stream: bool = False # True: trả NDJSON theo thứ tự hoàn thành
+
+class BatchVerificationResult(BaseModel):
+    results: List[VerificationResult] # Cùng thứ tự với texts
 
 # Schema cho Report (Context đầy đủ)
 class UserReportRequest(BaseModel):
@@ -73,7 +155,96 @@ class UserReportRequest(BaseModel):
 @app.post("/api/v1/verify", response_model=VerificationResult)
 def verify_news(request: NewsRequest):
     if not checker_instance: raise HTTPException(503, "Loading...")
-    return checker_instance.verify(request.text)
+    try:
+        with admission.admit(cost=len(request.text)):
+            return checker_instance.verify(
+                request.text, url=request.url,
+                time_budget_ms=request.time_budget_ms, max_claims=request.max_claims,
+            )
+    except AdmissionRejected as e:
+        raise overloaded(e)
+    except PoolTimeout as e:
+        raise HTTPException(503, str(e))
+
+@app.post("/api/v1/verify/stream")
+def verify_news_stream(request: NewsRequest):
+    """
+    Stream kết quả dạng NDJSON (mỗi dòng 1 JSON):
+        {"type": "start",  "data": {"model_version": ..., "total_claims": N}}
+        {"type": "claim",  "data": EvidenceDetail}      # ngay khi từng claim chấm xong
+        {"type": "result", "data": VerificationResult}  # kết luận cuối cùng
+    """
+    if not checker_instance: raise HTTPException(503, "Loading...")
+    try:
+        # Giữ slot trong suốt thời gian stream
+        ticket = admission.acquire(cost=len(request.text))
+    except AdmissionRejected as e:
+        raise overloaded(e)
+
+    def event_stream():
+        try:
+            for event, payload in checker_instance.iter_verify(
+                request.text, url=request.url,
+                time_budget_ms=request.time_budget_ms, max_claims=request.max_claims,
+            ):
+                if event == "claim":
+                    payload = EvidenceDetail(**payload).model_dump()
+                elif event == "result":
+                    payload = VerificationResult(**payload).model_dump()
+                yield json.dumps({"type": event, "data": payload}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Header 200 đã gửi -> báo lỗi trong stream
+            yield json.dumps({"type": "error", "data": {"detail": str(e)}}, ensure_ascii=False) + "\n"
+        finally:
+            ticket.release()
+
+    # Client ngắt trước khi stream bắt đầu -> generator không chạy, background task vẫn trả slot
+    return StreamingResponse(
+        event_stream(), media_type="application/x-ndjson", background=BackgroundTask(ticket.release)
+    )
+
+@app.post("/api/v1/verify/batch")
+def verify_news_batch(request: BatchNewsRequest):
+    """
+    Verify hàng loạt cho công cụ kiểm duyệt nội bộ.
+    Claim của nhiều bài được gộp chung batch encode / retrieval / rerank.
+        stream=false: {"results": [VerificationResult, ...]} theo thứ tự đầu vào
+        stream=true : NDJSON, mỗi dòng {"index": i, "result": VerificationResult}
+                      theo thứ tự hoàn thành
+    """
+    if not checker_instance: raise HTTPException(503, "Loading...")
+    if len(request.texts) > BULK_MAX_ARTICLES:
+        raise HTTPException(413, f"Tối đa {BULK_MAX_ARTICLES} bài mỗi lần gọi")
+    try:
+        # Cả lô chiếm 1 slot, cost = tổng độ dài -> nhường bài lẻ của người dùng
+        ticket = admission.acquire(cost=sum(len(t) for t in request.texts))
+    except AdmissionRejected as e:
+        raise overloaded(e)
+
+    if request.stream:
+        def event_stream():
+            try:
+                for index, result in checker_instance.iter_verify_many(request.texts):
+                    payload = {"index": index, "result": VerificationResult(**result).model_dump()}
+                    yield json.dumps(payload, ensure_ascii=False) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+            finally:
+                ticket.release()
+
+        return StreamingResponse(
+            event_stream(), media_type="application/x-ndjson", background=BackgroundTask(ticket.release)
+        )
+
+    results = [None] * len(request.texts)
+    try:
+        for index, result in checker_instance.iter_verify_many(request.texts):
+            results[index] = result
+    except PoolTimeout as e:
+        raise HTTPException(503, str(e))
+    finally:
+        ticket.release()
+    return BatchVerificationResult(results=results)
 
 @app.post("/api/v1/report")
 def report_news(req: UserReportRequest):
@@ -81,8 +252,7 @@ def report_news(req: UserReportRequest):
     Endpoint nhận Feedback với đầy đủ Context
     """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
+        with db_pool.connection() as conn, conn.cursor() as cur:
             # 1. UPSERT USER (Nếu chưa có user_id này thì tạo mới)
             cur.execute("""
                 INSERT INTO users (id, role, reputation_score)
@@ -102,9 +272,9 @@ def report_news(req: UserReportRequest):
                 req.ai_label, req.ai_confidence, req.model_version
             ))
             
-        conn.commit()
-        conn.close()
         return {"status": "success", "message": "Feedback received for analysis."}
+    except PoolTimeout as e:
+        raise HTTPException(503, str(e))
     except Exception as e:
         print(f"Report Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,8 +291,7 @@ def approve_report(req: ApprovalRequest):
     Khi Admin bấm DUYỆT -> Cập nhật Reputation cho User.
     """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
+        with db_pool.connection() as conn, conn.cursor() as cur:
             # 1. Update trạng thái Report
             cur.execute("""
                 UPDATE user_reports 
@@ -156,27 +325,71 @@ def approve_report(req: ApprovalRequest):
                     WHERE id = %s
                 """, (user_id,))
                 
-        conn.commit()
-        conn.close()
         return {"message": f"Report {req.verdict}. User reputation updated."}
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        raise HTTPException(503, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
+
+# --- METRICS NỘI BỘ ---
+@app.get("/metrics")
+def metrics():
+    """Metrics dạng Prometheus text format (latency từng bước, cache, DB pool, batcher)"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/internal/stats")
+def internal_stats():
+    """Số liệu vận hành: DB pool (size, thời gian chờ), micro-batcher, các cache"""
+    stats = {
+        "db_pool": db_pool.stats() if db_pool else None,
+        "admission": admission.stats(),
+        "memory": read_memory(os.getpid()),
+    }
+    if checker_instance:
+        stats["model_version"] = checker_instance.model_version
+        stats["verdict_cache"] = checker_instance.verdict_cache.stats()
+        stats["precomputed_verdicts"] = ENABLE_PRECOMPUTED_VERDICTS
+        if checker_instance.pair_scores:
+            stats["pair_score_cache"] = checker_instance.pair_scores.stats()
+        if checker_instance.ann_index:
+            stats["ann_replica"] = checker_instance.ann_index.stats()
+        if checker_instance.change_feed:
+            stats["change_feed"] = checker_instance.change_feed.stats()
+        for batcher in checker_instance.batchers():
+            stats[f"batcher_{batcher.name}"] = batcher.stats()
+    return stats
     
 # API nội bộ để Airflow gọi khi Retrain xong
 @app.post("/api/internal/reload-model")
-def trigger_reload_model(secret_key: str):
+def trigger_reload_model(secret_key: str, model_path: Optional[str] = None):
     # Bảo mật đơn giản để người ngoài không gọi bừa
     if secret_key != "SUPER_SECRET_AIRFLOW_KEY": 
         raise HTTPException(403, "Forbidden")
     
-    # Giả sử quy trình retrain luôn lưu model vào thư mục 'latest' hoặc theo version
-    # Ở đây ta load model mới nhất vừa train xong
-    NEW_MODEL_PATH = "model/phobert_v8_finetuned" 
-    
-    if checker_instance:
-        success = checker_instance.reload_model(NEW_MODEL_PATH)
+    # Không truyền model_path -> load version mới train nhất trong bảng model_versions
+    # (retrain_pipeline.py ghi version + path sau mỗi lần train).
+    # Load + warm-up chạy trên thread của request này, các request verify khác
+    # vẫn được phục vụ bằng model cũ cho tới khi swap.
+    if checker_instance and prefork_parent_pid:
+        # Pre-fork: ghi version active rồi nhờ process cha load lại + thay lần lượt từng worker
+        model_version = checker_instance.activate_model(model_path)
+        if model_version:
+            os.kill(prefork_parent_pid, signal.SIGHUP)
+            return {
+                "status": "success",
+                "message": "Rolling reload scheduled",
+                "model_version": model_version
+            }
+    elif checker_instance:
+        success = checker_instance.reload_model(model_path)
         if success:
-            return {"status": "success", "message": "Model reloaded successfully"}
+            return {
+                "status": "success",
+                "message": "Model reloaded successfully",
+                "model_version": checker_instance.model_version
+            }
     
     raise HTTPException(500, "Failed to reload model")
 
@@ -0,0 +1,265 @@
+"""
+Metrics dạng Prometheus (text exposition format 0.0.4) cho Backend, không cần thư viện ngoài.
+
+- Counter / Gauge / Histogram có label, an toàn đa luồng, render qua REGISTRY.render()
+  tại endpoint GET /metrics.
+- stage(name): đo thời gian 1 bước xử lý (clean_text, sent_tokenize, encode, db_wait,
+  pgvector_search, cross_encoder, aggregation...) vào histogram STAGE_SECONDS và
+  cộng dồn vào timing của request hiện tại -> header `Server-Timing`.
+
+Metrics là của từng process: chạy nhiều worker thì Prometheus scrape từng worker.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' đã được đăng ký")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {} # tuple giá trị label -> giá trị
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: cần đúng các label {self.labelnames}, nhận {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, key))
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield "", self._labels(key), value
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counter chỉ được tăng")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn):
+        """
+        Lấy giá trị lúc scrape. fn() trả về 1 số (gauge không label)
+        hoặc dict {tuple giá trị label: số}. fn=None -> bỏ đăng ký.
+        """
+        self._function = fn
+
+    def samples(self):
+        if self._function is None:
+            yield from super().samples()
+            return
+        try:
+            values = self._function()
+        except Exception:
+            return # Thành phần chưa sẵn sàng (đang khởi động / đã đóng)
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            yield "", self._labels(key), value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        for key, (counts, total, count) in sorted(items):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                yield "_bucket", labels + [("le", _format_value(float(bound)))], cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+# ================= METRICS CỦA BACKEND =================
+HTTP_REQUESTS = Counter(
+    "factcheck_http_requests_total", "Số request HTTP theo route và status",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "factcheck_http_request_duration_seconds", "Thời gian xử lý request (tới khi gửi header)",
+    ["method", "route"],
+)
+STAGE_SECONDS = Histogram(
+    "factcheck_stage_duration_seconds", "Thời gian từng bước của pipeline verify", ["stage"],
+)
+CLAIMS_PER_ARTICLE = Histogram(
+    "factcheck_claims_per_article", "Số claim được chấm điểm trong 1 bài báo", [],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+VERDICT_CACHE_LOOKUPS = Counter(
+    "factcheck_verdict_cache_lookups_total", "Số lần tra verdict cache", ["result"],
+)
+PRECOMPUTED_VERDICT_LOOKUPS = Counter(
+    "factcheck_precomputed_verdict_lookups_total", "Số lần tra verdict tính sẵn (article_verdicts) theo URL / hash", ["result"],
+)
+PAIR_CACHE_LOOKUPS = Counter(
+    "factcheck_pair_score_cache_lookups_total", "Số cặp (claim, evidence) tra trong pair-score store", ["result"],
+)
+RETRIEVAL_REQUESTS = Counter(
+    "factcheck_retrieval_requests_total", "Số lượt retrieval theo nguồn (ann replica / pgvector)", ["backend"],
+)
+CHANGE_FEED_EVENTS = Counter(
+    "factcheck_change_feed_events_total", "Số thay đổi của bảng claims nhận qua change feed", ["op"],
+)
+CASCADE_EXITS = Counter(
+    "factcheck_cascade_exits_total", "Số claim được quyết định ở từng tầng cascade", ["exit"],
+)
+VERIFY_BUDGET_STOPS = Counter(
+    "factcheck_verify_budget_stops_total", "Số request verify trả kết quả partial do hết ngân sách", ["reason"],
+)
+DB_POOL_TIMEOUTS = Counter(
+    "factcheck_db_pool_timeouts_total", "Số lần không mượn được DB connection (PoolTimeout)",
+)
+DB_POOL_IN_USE = Gauge(
+    "factcheck_db_pool_in_use", "Số DB connection đang được mượn",
+)
+BATCHER_QUEUE_DEPTH = Gauge(
+    "factcheck_batcher_queue_depth", "Số job đang chờ trong micro-batcher", ["batcher"],
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "factcheck_admission_queue_depth", "Số request verify đang chờ trong hàng đợi admission",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "factcheck_admission_in_flight", "Số request verify đang chạy",
+)
+ADMISSION_REJECTIONS = Counter(
+    "factcheck_admission_rejections_total", "Số request verify bị từ chối (503) theo lý do", ["reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "factcheck_admission_wait_seconds", "Thời gian chờ trong hàng đợi admission",
+)
+MODEL_INFO = Gauge(
+    "factcheck_model_info", "Model CrossEncoder đang phục vụ (giá trị luôn = 1)", ["version"],
+)
+
+# ================= TIMING THEO REQUEST =================
+_request_timings = ContextVar("request_timings", default=None)
+
+def start_request_timings():
+    """Bắt đầu ghi timing cho request hiện tại (gọi trong middleware), trả về dict stage -> giây"""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+@contextmanager
+def stage(name):
+    """Đo 1 bước xử lý: ghi histogram + cộng vào timing của request hiện tại (nếu có)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+def server_timing_header(timings):
+    """dict stage -> giây  =>  'encode;dur=12.3, pgvector_search;dur=4.1'"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
@@ -0,0 +1,218 @@
+"""
+Pre-fork serving cho Backend API.
+
+Model (bi-encoder, claim extractor, CrossEncoder) được load 1 lần trong process cha,
+sau đó fork N worker uvicorn dùng chung 1 socket. Trọng số nằm trong trang nhớ của
+process cha nên các worker dùng chung (copy-on-write) thay vì mỗi worker 1 bản như
+`uvicorn --workers N`.
+
+Usage:
+    python -m backend.serve --workers 4 --port 8000
+    python -m backend.serve --workers 4 --memory-report-interval 60
+
+Tín hiệu gửi tới process cha:
+    SIGTERM / SIGINT : dừng toàn bộ worker
+    SIGHUP           : load lại model active trong model_versions rồi thay lần lượt từng worker
+                       (/api/internal/reload-model tự gửi tín hiệu này khi chạy pre-fork)
+    SIGUSR1          : in báo cáo bộ nhớ (RSS / PSS / shared / private) của từng process
+
+Chỉ chạy trên Linux và CPU (CUDA không dùng được trong process con sau fork).
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+
+# ================= BÁO CÁO BỘ NHỚ =================
+def read_memory(pid):
+    """Bộ nhớ (kB) của 1 process đọc từ /proc/<pid>/smaps_rollup, None nếu không đọc được"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    return {
+        "rss_kb": fields.get("Rss", 0),
+        "pss_kb": fields.get("Pss", 0), # Trang dùng chung được chia đều cho các process
+        "shared_kb": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def print_memory_report(parent_pid, worker_pids):
+    mb = lambda kb: kb / 1024
+    print("\n📊 BỘ NHỚ (MB)")
+    print(f"{'process':<10} {'pid':>7} {'RSS':>9} {'PSS':>9} {'shared':>9} {'private':>9}")
+    total_rss = total_pss = 0
+    rows = [("parent", parent_pid)] + [(f"worker-{i}", pid) for i, pid in enumerate(worker_pids)]
+    for name, pid in rows:
+        mem = read_memory(pid)
+        if mem is None:
+            continue
+        total_rss += mem["rss_kb"]
+        total_pss += mem["pss_kb"]
+        print(f"{name:<10} {pid:>7} {mb(mem['rss_kb']):>9.1f} {mb(mem['pss_kb']):>9.1f} "
+              f"{mb(mem['shared_kb']):>9.1f} {mb(mem['private_kb']):>9.1f}")
+    # Tổng RSS đếm trùng trang dùng chung; tổng PSS ~ RAM thực tế đang dùng
+    print(f"{'TOTAL':<10} {'':>7} {mb(total_rss):>9.1f} {mb(total_pss):>9.1f}")
+
+# ================= PRE-FORK SERVER =================
+class PreforkServer:
+    def __init__(self, host, port, workers, memory_report_interval=0):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.memory_report_interval = memory_report_interval
+        self.sock = None
+        self.workers = {} # pid -> slot
+        self.retiring = set()
+        self.stopping = False
+        self.reload_requested = False
+        self.report_requested = False
+
+    def preload(self):
+        from backend import main
+        from backend.verifier import PreloadedModels
+
+        main.preloaded_models = PreloadedModels(device="cpu")
+        main.prefork_parent_pid = os.getpid()
+        # Đưa các object hiện có ra khỏi vòng GC: GC của worker không chạm (ghi)
+        # vào trang nhớ dùng chung -> trang không bị copy
+        gc.collect()
+        gc.freeze()
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                from backend import main
+                config = uvicorn.Config(main.app, host=self.host, port=self.port, lifespan="on")
+                uvicorn.Server(config).run(sockets=[self.sock])
+            except Exception as e:
+                print(f"❌ [Worker {slot}] {e}")
+                code = 1
+            finally:
+                os._exit(code)
+
+        self.workers[pid] = slot
+        print(f"   ├─ Worker {slot}: pid {pid}")
+        return pid
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif slot is not None and not self.stopping:
+                print(f"⚠️ Worker {slot} (pid {pid}) dừng bất thường (status {status}), khởi động lại...")
+                self.spawn(slot)
+
+    def rolling_reload(self):
+        """Load model mới trong process cha rồi thay từng worker (các worker khác vẫn phục vụ)"""
+        from backend import main
+        from backend.verifier import PreloadedModels
+
+        self.reload_requested = False
+        print("🔄 [Prefork] Load lại model...")
+        gc.unfreeze()
+        try:
+            new_models = PreloadedModels(device="cpu")
+        except Exception as e:
+            print(f"❌ [Prefork] Lỗi load model mới, giữ model cũ: {e}")
+            gc.freeze()
+            return
+        main.preloaded_models = new_models
+        gc.collect()
+        gc.freeze()
+
+        for pid, slot in list(self.workers.items()):
+            self.retiring.add(pid)
+            self.spawn(slot)
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0) # uvicorn dừng êm: chờ request đang chạy xong
+            self.workers.pop(pid, None)
+            self.retiring.discard(pid)
+        print(f"✅ [Prefork] Đang phục vụ model {new_models.model_version}")
+
+    def stop(self):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _on_signal(self, signum, frame):
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self.stop()
+        elif signum == signal.SIGHUP:
+            self.reload_requested = True
+        elif signum == signal.SIGUSR1:
+            self.report_requested = True
+
+    def run(self):
+        print(f"🚀 [Prefork] {self.num_workers} worker trên {self.host}:{self.port}")
+        self.preload()
+        self.sock = self.bind()
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, self._on_signal)
+
+        for slot in range(self.num_workers):
+            self.spawn(slot)
+
+        next_report = time.monotonic() + self.memory_report_interval
+        while self.workers:
+            self.reap()
+            if self.reload_requested and not self.stopping:
+                self.rolling_reload()
+            if self.memory_report_interval and time.monotonic() >= next_report:
+                self.report_requested = True
+                next_report = time.monotonic() + self.memory_report_interval
+            if self.report_requested:
+                self.report_requested = False
+                print_memory_report(os.getpid(), list(self.workers))
+            time.sleep(0.2)
+
+        self.sock.close()
+        print("👋 [Prefork] Đã dừng.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork serving: dùng chung trọng số model giữa các worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--memory-report-interval", type=float, default=0,
+                        help="In báo cáo bộ nhớ mỗi N giây (0 = chỉ khi nhận SIGUSR1)")
+    args = parser.parse_args()
+
+    PreforkServer(args.host, args.port, args.workers, args.memory_report_interval).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Verdict tính sẵn cho các bài báo đã được crawler thu thập (bảng article_verdicts).
+
+- processor/precompute_verdicts.py (DAG) và consumer (CONSUMER_PRECOMPUTE_VERDICTS=1) verify
+  từng bài, loại claim của chính bài khỏi evidence, rồi ghi kết quả theo (url, model_version)
+  kèm hash nội dung.
+- Backend tra theo URL tab (hoặc hash văn bản đã clean) trước khi verify từ đầu.
+- Đổi model: processor/precompute_verdicts.py tính lại cho model_version mới
+  (DAG retrain chạy sau khi reload model).
+"""
+
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from psycopg2.extras import Json
+
+from backend.cache import text_hash
+
+ENABLE_PRECOMPUTED_VERDICTS = os.getenv("ENABLE_PRECOMPUTED_VERDICTS", "1") == "1"
+
+# Tham số theo dõi (không đổi nội dung bài) bị bỏ khi so URL
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "zarsrc", "vn_source", "vn_medium", "vn_campaign")
+
+LOOKUP_SQL = """
+    SELECT result, url IS NOT DISTINCT FROM %(url)s AS url_hit
+    FROM article_verdicts
+    WHERE model_version = %(model_version)s
+      AND (url = %(url)s OR content_hash = %(content_hash)s)
+    ORDER BY url_hit DESC, computed_at DESC
+    LIMIT 1
+"""
+
+UPSERT_SQL = """
+    INSERT INTO article_verdicts (article_id, url, content_hash, model_version, result, computed_at)
+    VALUES (%s, %s, %s, %s, %s, NOW())
+    ON CONFLICT (url, model_version) DO UPDATE
+    SET article_id = EXCLUDED.article_id, content_hash = EXCLUDED.content_hash,
+        result = EXCLUDED.result, computed_at = NOW()
+"""
+
+def normalize_url(url):
+    """Bỏ fragment (#box_comment...), tham số theo dõi và '/' cuối để URL tab khớp URL crawler"""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def content_hash(cleaned_text):
+    return text_hash(cleaned_text)
+
+def lookup_verdict(cur, model_version, url=None, cleaned_text=None):
+    """Verdict đã lưu cho model_version, ưu tiên khớp URL. Trả về (result, "url" | "hash") hoặc None"""
+    url = normalize_url(url)
+    digest = content_hash(cleaned_text) if cleaned_text else None
+    if url is None and digest is None:
+        return None
+    cur.execute(LOOKUP_SQL, {"url": url, "model_version": model_version, "content_hash": digest})
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return row[0], "url" if row[1] else "hash"
+
+def save_verdict(cur, article_id, url, cleaned_text, model_version, result):
+    cur.execute(UPSERT_SQL, (
+        article_id, normalize_url(url), content_hash(cleaned_text), model_version,
+        Json(result, dumps=lambda obj: json.dumps(obj, ensure_ascii=False, default=float)),
+    ))
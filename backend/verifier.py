@@ -1,14 +1,36 @@
-import psycopg2
+import gc
+import threading
 import torch
 import numpy as np
 import os
 import re
-from underthesea import sent_tokenize
-from sentence_transformers import SentenceTransformer, CrossEncoder
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from model.onnx_inference import load_sentence_encoder, load_cross_encoder, load_sequence_classifier
+from model.length_batching import predict_in_length_buckets
+from processor.sentence_splitter import get_sentence_splitter
+
+from backend.batching import MicroBatcher
+from backend.db import DatabasePool, execute_prepared
+from backend.cache import VerdictCache, PairScoreStore
+from backend.metrics import (
+    stage, CLAIMS_PER_ARTICLE, CASCADE_EXITS, RETRIEVAL_REQUESTS, PRECOMPUTED_VERDICT_LOOKUPS,
+)
+from backend.ann_index import ClaimANNIndex, ENABLE_ANN_REPLICA
+from backend.change_feed import ClaimsChangeFeed, ENABLE_CHANGE_FEED
+from backend.verdict_store import lookup_verdict, ENABLE_PRECOMPUTED_VERDICTS
+from backend.budget import VerifyBudget
+
 load_dotenv()
 
+# Bộ tách câu: SENTENCE_SPLITTER=underthesea (mặc định) | fast
+sent_tokenize = get_sentence_splitter()
+
 # --- CẤU HÌNH ---
 DB_CONFIG = {
     "dbname": os.getenv("POSTGRES_DB", "vnexpress_scraper"),
@@ -19,19 +41,530 @@ DB_CONFIG = {
 }
 
 # ĐỊNH DANH PHIÊN BẢN MODEL (Cực quan trọng cho Traceability)
+# Chỉ dùng khi bảng model_versions chưa có version nào is_active
 CURRENT_MODEL_VERSION = "v7_hard_negative_2025_01"
 MODEL_PATH = "my_model_v7" 
+EMBED_MODEL_NAME = "bkai-foundation-models/vietnamese-bi-encoder"
+
+# Lọc câu đáng kiểm chứng bằng PhoBERT claim extractor (giống Consumer) trước khi retrieval
+USE_CLAIM_EXTRACTOR = os.getenv("USE_CLAIM_EXTRACTOR", "0") == "1"
+MODEL_EXTRACTOR_PATH = os.getenv("MODEL_EXTRACTOR_PATH", "model/phobert_claim_extractor")
+
+# Ngưỡng khoảng cách cosine để coi là tìm thấy evidence
+DISTANCE_THRESHOLD = 0.5
+# Số ứng viên lấy về cho mỗi claim
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "1"))
+# hnsw.ef_search của pgvector theo loại request: verify tương tác ưu tiên latency,
+# verify hàng loạt (công cụ kiểm duyệt) chấp nhận chậm hơn để recall cao hơn
+RETRIEVAL_EF_SEARCH = {
+    "interactive": int(os.getenv("HNSW_EF_SEARCH_INTERACTIVE", "40")),
+    "batch": int(os.getenv("HNSW_EF_SEARCH_BATCH", "100")),
+}
+# Iterative index scan của pgvector >= 0.8 (off | strict_order | relaxed_order):
+# quét tiếp index khi lọc system_label bỏ bớt kết quả. Không cần khi đã có partial index
+# claims_real_embedding_idx (init_db_full.py)
+PGVECTOR_ITERATIVE_SCAN = os.getenv("PGVECTOR_ITERATIVE_SCAN", "off")
+# Batch size khi chấm điểm bằng CrossEncoder
+VERIFIER_BATCH_SIZE = int(os.getenv("VERIFIER_BATCH_SIZE", "32"))
+VERIFIER_LABELS = ["REFUTED", "SUPPORTED", "NEI"]
+
+# Micro-batching giữa các request đồng thời (encode + rerank)
+ENABLE_MICRO_BATCHING = os.getenv("ENABLE_MICRO_BATCHING", "1") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Stream kết quả: nhóm đầu STREAM_FIRST_CHUNK_SIZE claim để claim đầu tiên hiện ra sớm,
+# sau đó chấm STREAM_CHUNK_SIZE claim / lượt (1 lần gọi CrossEncoder cho cả nhóm)
+STREAM_FIRST_CHUNK_SIZE = int(os.getenv("STREAM_FIRST_CHUNK_SIZE", "1"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "8"))
+
+# Cascade: quyết định sớm, bớt gọi CrossEncoder
+#   - Evidence gần như trùng khớp (distance < NEAR_DUPLICATE_DISTANCE) -> SUPPORTED luôn,
+#     nhưng chỉ khi 2 câu giống hệt sau chuẩn hoá hoặc có cùng các số / ngày tháng:
+#     bi-encoder gần như không phân biệt "500 phi cơ" với "5 phi cơ"
+#   - Khi đã có 1 claim REFUTED > FAKE_CONFIDENCE_THRESHOLD thì kết luận FAKE không thể đổi
+#     -> dừng chấm các claim còn lại (chấm theo từng nhóm CASCADE_CHUNK_SIZE claim)
+ENABLE_CASCADE = os.getenv("ENABLE_CASCADE", "1") == "1"
+NEAR_DUPLICATE_DISTANCE = float(os.getenv("NEAR_DUPLICATE_DISTANCE", "0.02"))
+CASCADE_CHUNK_SIZE = int(os.getenv("CASCADE_CHUNK_SIZE", str(VERIFIER_BATCH_SIZE)))
+FAKE_CONFIDENCE_THRESHOLD = 0.85
+# Các tầng cascade có thể quyết định 1 claim (key trong result["stats"])
+VERIFIER_EXITS = ("no_evidence", "near_duplicate", "pair_cache", "cross_encoder", "early_exit")
+
+# Verify hàng loạt: số bài gộp chung 1 lượt encode / retrieval / rerank
+BULK_GROUP_SIZE = int(os.getenv("BULK_GROUP_SIZE", "16"))
+
+# Cache bền vững điểm NLI theo cặp (claim, evidence id, model version)
+ENABLE_PAIR_SCORE_CACHE = os.getenv("ENABLE_PAIR_SCORE_CACHE", "1") == "1"
+
+# Truy vấn gộp: gửi toàn bộ vector claim của 1 request trong 1 round-trip.
+# Mỗi claim được tìm top-k riêng qua LATERAL join (vẫn dùng được HNSW index).
+# Được PREPARE phía server (tham số: $1 = text[] vector, $2 = top_k,
+# $3 = int[] article_id cần loại trừ theo từng claim, NULL = không loại).
+# Loại trừ để verify 1 bài đã crawl (verdict tính sẵn) không tìm thấy chính claim của bài đó.
+# Kiểm tra NULL trước: `article_id IS DISTINCT FROM NULL` sẽ bỏ mất claim không thuộc bài nào
+# (claim 'user' / 'admin'), khác với ANN replica.
+BATCH_RETRIEVAL_SQL = """
+    SELECT q.idx, c.id, c.content, c.system_label, c.distance
+    FROM unnest($1::text[], $3::int[]) WITH ORDINALITY AS q(vec, exclude_article, idx)
+    CROSS JOIN LATERAL (
+        SELECT id, content, system_label, (embedding <=> q.vec::vector) AS distance
+        FROM claims
+        WHERE system_label = 'REAL'
+          AND (q.exclude_article IS NULL OR article_id IS DISTINCT FROM q.exclude_article)
+        ORDER BY embedding <=> q.vec::vector
+        LIMIT $2
+    ) c
+    ORDER BY q.idx, c.distance;
+"""
+
+# Retrieval trên index lượng tử hoá (tạo bằng scripts/migrate_quantized_embeddings.py):
+#   off     : HNSW float32 (claims_real_embedding_idx)
+#   halfvec : HNSW float16 -> index nhỏ 1/2
+#   binary  : HNSW trên binary_quantize (1 bit / chiều, khoảng cách Hamming) -> index nhỏ ~1/32
+# Index lượng tử chỉ dùng để lấy top_k * PGVECTOR_RERANK_FACTOR ứng viên, thứ tự cuối cùng
+# được tính lại chính xác bằng vector float32 trong bảng
+PGVECTOR_QUANTIZATION = os.getenv("PGVECTOR_QUANTIZATION", "off")
+PGVECTOR_RERANK_FACTOR = int(os.getenv("PGVECTOR_RERANK_FACTOR", "10"))
+EMBEDDING_DIM = 768 # claims.embedding vector(768)
+
+# Biểu thức phải khớp đúng biểu thức của expression index thì planner mới dùng index
+QUANTIZED_DISTANCE = {
+    "halfvec": "embedding::halfvec({dim}) <=> {query}::halfvec({dim})",
+    "binary": "binary_quantize(embedding)::bit({dim}) <~> binary_quantize({query}::vector)",
+}
+
+def quantized_retrieval_sql(mode, dim=EMBEDDING_DIM):
+    """
+    Như BATCH_RETRIEVAL_SQL nhưng tìm ứng viên trên index lượng tử hoá rồi re-score bằng
+    vector đầy đủ ($1 = text[] vector, $2 = top_k, $3 = số ứng viên, $4 = int[] article_id loại trừ).
+    """
+    candidate_order = QUANTIZED_DISTANCE[mode].format(dim=dim, query="q.vec")
+    return f"""
+    SELECT q.idx, c.id, c.content, c.system_label, c.distance
+    FROM unnest($1::text[], $4::int[]) WITH ORDINALITY AS q(vec, exclude_article, idx)
+    CROSS JOIN LATERAL (
+        SELECT id, content, system_label, (embedding <=> q.vec::vector) AS distance
+        FROM (
+            SELECT id, content, system_label, embedding
+            FROM claims
+            WHERE system_label = 'REAL'
+              AND (q.exclude_article IS NULL OR article_id IS DISTINCT FROM q.exclude_article)
+            ORDER BY {candidate_order}
+            LIMIT $3
+        ) candidates
+        ORDER BY distance
+        LIMIT $2
+    ) c
+    ORDER BY q.idx, c.distance;
+"""
+
+# Cặp mẫu để warm-up model mới trước khi đưa vào phục vụ (nhiều độ dài khác nhau)
+WARMUP_PAIRS = [
+    ("Giá xăng giảm 320 đồng mỗi lít từ chiều nay.", "Giá xăng RON 95 giảm 320 đồng mỗi lít từ 15h chiều nay."),
+    ("Thổ Nhĩ Kỳ điều 500 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan trong ngày 27/4.",
+     "Thổ Nhĩ Kỳ ngày 27/4 điều 5 phi cơ vận tải quân sự để sơ tán công dân."),
+    ("Theo Tổng cục Thống kê, GDP quý III tăng 7,4% so với cùng kỳ năm trước, cao nhất trong 5 năm trở lại đây "
+     "nhờ xuất khẩu và đầu tư công phục hồi mạnh.",
+     "GDP quý III tăng 7,4% so với cùng kỳ, theo số liệu Tổng cục Thống kê công bố sáng nay."),
+]
+WARMUP_ROUNDS = 3
+
+def softmax(logits):
+    """Softmax theo từng hàng (ổn định số học)"""
+    logits = np.atleast_2d(np.asarray(logits, dtype=np.float64))
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+# Số, ngày, giờ, phần trăm: 500 | 1.000 | 3,5 | 15/3/2024 | 15h30 | 20%
+NUMBER_TOKEN_RE = re.compile(r"\d+(?:[.,:/h]\d+)*%?")
+
+def normalize_for_match(text):
+    """Chữ thường, NFC, bỏ dấu câu và khoảng trắng thừa"""
+    text = unicodedata.normalize("NFC", text).lower()
+    return " ".join(re.sub(r"[^\w%]+", " ", text).split())
+
+def is_near_duplicate(claim, evidence, distance):
+    """
+    Evidence đủ giống claim để kết luận SUPPORTED mà không cần CrossEncoder:
+    distance nhỏ VÀ (trùng nội dung sau chuẩn hoá hoặc cùng tập số / ngày tháng).
+    """
+    if distance >= NEAR_DUPLICATE_DISTANCE:
+        return False
+    if normalize_for_match(claim) == normalize_for_match(evidence):
+        return True
+    return Counter(NUMBER_TOKEN_RE.findall(claim.lower())) == Counter(NUMBER_TOKEN_RE.findall(evidence.lower()))
+
+def chunk_bounds(total, step, first=None):
+    """(start, end) của từng nhóm claim: nhóm đầu `first` claim (None = `step`), các nhóm sau `step` claim"""
+    start, size = 0, first or step
+    while start < total:
+        yield start, min(total, start + size)
+        start, size = start + size, step
+
+def set_search_params(cur, ef_search, iterative_scan=PGVECTOR_ITERATIVE_SCAN):
+    """Tham số HNSW chỉ cho transaction hiện tại (như SET LOCAL): connection trả về pool không bị ảnh hưởng"""
+    cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+    if iterative_scan != "off":
+        cur.execute("SELECT set_config('hnsw.iterative_scan', %s, true)", (iterative_scan,))
+
+def to_pgvector(vector):
+    """Chuyển numpy vector sang literal text của pgvector: '[0.1,0.2,...]'"""
+    return "[" + ",".join(map(str, np.asarray(vector, dtype=float).tolist())) + "]"
+
+class VerifierBundle:
+    """
+    CrossEncoder + version + micro-batcher riêng, được swap nguyên khối khi reload.
+    Request đang chạy giữ tham chiếu tới bundle cũ nên vẫn hoàn tất trên model cũ;
+    bundle cũ chỉ được giải phóng khi request cuối cùng dùng nó kết thúc.
+    """
+
+    def __init__(self, model, version, path, micro_batching=ENABLE_MICRO_BATCHING):
+        self.model = model
+        self.version = version
+        self.path = path
+        self.in_flight = 0
+        self.retired = False
+        self.batcher = None
+        if micro_batching:
+            self.batcher = MicroBatcher(
+                self._predict_batch, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, name="rerank"
+            )
+
+    def _predict_batch(self, pairs):
+        # Cặp cùng độ dài được pad chung -> giảm token PAD
+        return predict_in_length_buckets(
+            lambda batch: self.model.predict([list(p) for p in batch], batch_size=len(batch), show_progress_bar=False),
+            pairs, VERIFIER_BATCH_SIZE
+        )
+
+    def predict_logits(self, pairs):
+        """Logits của CrossEncoder cho list cặp (claim, evidence) (qua micro-batcher nếu bật)"""
+        if self.batcher:
+            return self.batcher.run(pairs)
+        return self._predict_batch(pairs)
+
+    def warm_up(self, rounds=WARMUP_ROUNDS):
+        for _ in range(rounds):
+            self._predict_batch(WARMUP_PAIRS)
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+            self.batcher = None
+        self.model = None
+
+def resolve_active_model(db_pool):
+    """
+    Lấy model đang active từ bảng model_versions.
+    Chưa có version nào active (hoặc DB lỗi) -> dùng MODEL_PATH / CURRENT_MODEL_VERSION.
+    """
+    try:
+        with db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT model_path, version FROM model_versions
+                WHERE is_active AND model_path IS NOT NULL
+                ORDER BY deployed_at DESC NULLS LAST
+                LIMIT 1
+            """)
+            row = cur.fetchone()
+        if row:
+            return row[0], row[1]
+    except Exception as e:
+        print(f"⚠️ Không đọc được model_versions: {e}")
+    return MODEL_PATH, CURRENT_MODEL_VERSION
+
+def build_ann_index(db_pool):
+    """Bản sao ANN của claim REAL (ENABLE_ANN_REPLICA=1); lỗi -> None (dùng Postgres)"""
+    if not ENABLE_ANN_REPLICA:
+        return None
+    try:
+        ann_index = ClaimANNIndex.from_database(db_pool)
+    except Exception as e:
+        print(f"⚠️ [ANN] Không build được replica, dùng pgvector: {e}")
+        return None
+    stats = ann_index.stats()
+    print(f"   ├─ ANN replica: {stats['size']} claim REAL, "
+          f"{stats['memory_bytes']['total'] / 2**20:.1f} MB, build {stats['build_seconds']:.1f}s")
+    return ann_index
+
+class PreloadedModels:
+    """
+    Model load sẵn trong process cha trước khi fork worker (backend/serve.py).
+    Chỉ giữ trọng số: không DB pool, không thread -> worker dùng chung trang nhớ
+    (copy-on-write). Warm-up chạy trong từng worker, không chạy trước fork.
+    """
+
+    def __init__(self, device="cpu"):
+        self.device = device
+        print(f"🚀 [Preload] Loading models trên {device.upper()}...")
+        self.retriever = load_sentence_encoder(EMBED_MODEL_NAME, device=device)
+        self.claim_classifier = None
+        if USE_CLAIM_EXTRACTOR:
+            self.claim_classifier = load_sequence_classifier(MODEL_EXTRACTOR_PATH, device=device)
+
+        db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=1)
+        try:
+            self.model_path, self.model_version = resolve_active_model(db_pool)
+            self.ann_index = build_ann_index(db_pool)
+        finally:
+            db_pool.close() # Không mang connection qua fork
+        print(f"   ├─ Verifier {self.model_version} ({self.model_path})")
+        self.verifier = load_cross_encoder(self.model_path, device=device)
 
 class AdvancedFactChecker:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"🚀 [Verifier {CURRENT_MODEL_VERSION}] KHỞI ĐỘNG...")
+    def __init__(self, db_pool=None, preloaded=None, serving=True):
+        """
+        preloaded: PreloadedModels do process cha load trước khi fork -> không load lại model.
+        serving=False: bản gọn cho tác vụ offline 1 luồng (consumer, precompute_verdicts.py):
+            không ANN replica / change feed / micro-batcher / pair-score store,
+            retrieval luôn đọc thẳng pgvector (thấy ngay claim vừa ghi).
+        """
+        self.serving = serving
+        # Pool dùng chung do Backend truyền vào; chạy độc lập thì tự tạo pool nhỏ
+        self.db_pool = db_pool or DatabasePool(DB_CONFIG, minconn=0, maxconn=2)
+        self.device = preloaded.device if preloaded else ("cuda" if torch.cuda.is_available() else "cpu")
+        print(f"🚀 [Verifier] KHỞI ĐỘNG...")
+
+        # Cache kết quả cả bài (key gồm cả model_version)
+        self.verdict_cache = VerdictCache()
+        self.pair_scores = PairScoreStore() if ENABLE_PAIR_SCORE_CACHE and serving else None
+
+        if preloaded:
+            print("   ├─ Dùng model đã load sẵn trong process cha (pre-fork)")
+            self.retriever = preloaded.retriever
+            self.claim_classifier = preloaded.claim_classifier
+            self.ann_index = preloaded.ann_index
+        else:
+            print("   ├─ Loading Retriever...")
+            self.retriever = load_sentence_encoder(EMBED_MODEL_NAME, device=self.device)
+
+            self.claim_classifier = None
+            if USE_CLAIM_EXTRACTOR:
+                print("   ├─ Loading Claim Extractor...")
+                self.claim_classifier = load_sequence_classifier(MODEL_EXTRACTOR_PATH, device=self.device)
+
+            # Bản sao in-process của claim REAL (None -> retrieval bằng pgvector)
+            self.ann_index = build_ann_index(self.db_pool) if serving else None
+
+        # Thay đổi của bảng claims -> cập nhật replica tăng dần, bỏ verdict cũ
+        self.change_feed = None
+        if ENABLE_CHANGE_FEED and serving:
+            self.change_feed = self.start_change_feed()
+
+        # Gom encode của các request đồng thời thành batch chung
+        # (micro-batcher của CrossEncoder nằm trong VerifierBundle)
+        self.embed_batcher = None
+        if ENABLE_MICRO_BATCHING and serving:
+            print(f"   ├─ Micro-batching: max {MICRO_BATCH_MAX_SIZE} items / {MICRO_BATCH_MAX_WAIT_MS}ms")
+            self.embed_batcher = MicroBatcher(
+                self._encode_batch, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, name="embed"
+            )
+
+        self._bundle_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        if preloaded:
+            self._bundle = self._load_bundle(preloaded.model_path, preloaded.model_version, preloaded.verifier)
+        else:
+            model_path, model_version = self.resolve_active_model()
+            print(f"   ├─ Loading Verifier {model_version} ({model_path})...")
+            self._bundle = self._load_bundle(model_path, model_version)
+        self.prune_pair_scores()
+
+    # ================= MODEL LIFECYCLE =================
+    @property
+    def model_version(self):
+        return self._bundle.version
+
+    def resolve_active_model(self):
+        return resolve_active_model(self.db_pool)
+
+    def _load_bundle(self, model_path, model_version, model=None):
+        if model is None:
+            model = load_cross_encoder(model_path, device=self.device)
+        bundle = VerifierBundle(model, model_version, model_path, micro_batching=ENABLE_MICRO_BATCHING and self.serving)
+        bundle.warm_up()
+        return bundle
+
+    @contextmanager
+    def use_verifier(self):
+        """Mượn bundle hiện tại trong suốt 1 request (không bị đổi giữa chừng khi reload)"""
+        with self._bundle_lock:
+            bundle = self._bundle
+            bundle.in_flight += 1
+        try:
+            yield bundle
+        finally:
+            with self._bundle_lock:
+                bundle.in_flight -= 1
+                release = bundle.retired and bundle.in_flight == 0
+            if release:
+                self._release_bundle(bundle)
+
+    def _release_bundle(self, bundle):
+        bundle.close()
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print(f"   🧹 Đã giải phóng model cũ {bundle.version}")
+
+    def reload_model(self, model_path=None, model_version=None):
+        """
+        Hot reload CrossEncoder không downtime:
+            1. Load model mới + warm-up (request vẫn chạy trên model cũ)
+            2. Swap nguyên tử
+            3. Giải phóng model cũ khi request cuối dùng nó kết thúc
+            4. Ghi nhận version active vào model_versions
+        model_path None -> lấy version mới train nhất trong model_versions.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            print("⚠️ Đang có 1 lượt reload khác chạy.")
+            return False
+        try:
+            if model_path is None or model_version is None:
+                model_path, model_version = self._lookup_model(model_path)
+            if model_path is None:
+                print("❌ Không tìm thấy model để reload.")
+                return False
+
+            print(f"🔄 [Reload] Loading {model_version} ({model_path})...")
+            try:
+                new_bundle = self._load_bundle(model_path, model_version)
+            except Exception as e:
+                print(f"❌ [Reload] Lỗi load model mới, giữ model cũ: {e}")
+                return False
+
+            with self._bundle_lock:
+                old_bundle = self._bundle
+                self._bundle = new_bundle
+                old_bundle.retired = True
+                release = old_bundle.in_flight == 0
+            self.verdict_cache.clear()
+            if release:
+                self._release_bundle(old_bundle)
+            self.prune_pair_scores()
+
+            self._mark_active(model_version, model_path)
+            print(f"✅ [Reload] Đang phục vụ model {model_version}")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def activate_model(self, model_path=None):
+        """
+        Chỉ ghi version active vào model_versions, không load model
+        (pre-fork: process cha load lại rồi thay worker). Trả về version hoặc None.
+        """
+        model_path, model_version = self._lookup_model(model_path)
+        if model_path is None:
+            return None
+        self._mark_active(model_version, model_path)
+        return model_version
 
-        print("   ├─ Loading Retriever...")
-        self.retriever = SentenceTransformer('bkai-foundation-models/vietnamese-bi-encoder', device=self.device)
+    def prune_pair_scores(self):
+        """Dọn pair-score store: chỉ giữ điểm của model đang phục vụ (+ dọn theo tuổi / kích thước)"""
+        if not self.pair_scores:
+            return
+        try:
+            deleted = self.pair_scores.prune(keep_versions=[self.model_version])
+            if deleted:
+                print(f"🧹 [PairScore] Đã xoá {deleted} điểm cũ / của model khác")
+        except sqlite3.Error as e:
+            print(f"⚠️ [PairScore] Lỗi dọn store: {e}")
 
-        print(f"   ├─ Loading Verifier...")
-        self.verifier_model = CrossEncoder(MODEL_PATH, device=self.device)
+    def _lookup_model(self, model_path=None):
+        """Tìm (model_path, version) trong model_versions: theo path, hoặc bản train mới nhất"""
+        with self.db_pool.connection() as conn, conn.cursor() as cur:
+            if model_path:
+                cur.execute("""
+                    SELECT model_path, version FROM model_versions
+                    WHERE model_path = %s ORDER BY trained_at DESC LIMIT 1
+                """, (model_path,))
+            else:
+                cur.execute("""
+                    SELECT model_path, version FROM model_versions
+                    WHERE model_path IS NOT NULL ORDER BY trained_at DESC LIMIT 1
+                """)
+            row = cur.fetchone()
+        if row:
+            return row[0], row[1]
+        if model_path:
+            # Model chưa đăng ký: dùng tên thư mục làm version
+            return model_path, os.path.basename(os.path.normpath(model_path))
+        return None, None
+
+    def _mark_active(self, model_version, model_path):
+        try:
+            with self.db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO model_versions (version, model_path, is_active, deployed_at)
+                    VALUES (%s, %s, TRUE, NOW())
+                    ON CONFLICT (version) DO UPDATE
+                    SET is_active = TRUE, deployed_at = NOW(), model_path = EXCLUDED.model_path
+                """, (model_version, model_path))
+                cur.execute("UPDATE model_versions SET is_active = FALSE WHERE version <> %s", (model_version,))
+        except Exception as e:
+            print(f"⚠️ Không cập nhật được model_versions: {e}")
+
+    # ================= INFERENCE =================
+    def _encode_batch(self, texts):
+        return self.retriever.encode(texts, batch_size=VERIFIER_BATCH_SIZE, show_progress_bar=False)
+
+    def encode(self, texts):
+        """Encode câu bằng bi-encoder (qua micro-batcher nếu bật)"""
+        if self.embed_batcher:
+            return self.embed_batcher.run(texts)
+        return self._encode_batch(texts)
+
+    def start_change_feed(self):
+        """
+        Feed chạy trong từng process (worker pre-fork dùng replica của process cha,
+        đọc tiếp từ change_horizon của replica nên không mất thay đổi xảy ra sau lúc build).
+        """
+        since = None
+        if self.ann_index is not None:
+            self.ann_index.db_pool = self.db_pool # Pool của process cha đã đóng trước khi fork
+            since = self.ann_index.change_horizon
+        feed = ClaimsChangeFeed(DB_CONFIG, since=since)
+        if self.ann_index is not None:
+            feed.subscribe(self.ann_index.apply_changes, on_gap=self.ann_index.reload)
+        feed.subscribe(self._on_claims_changed, on_gap=self._on_claims_gap)
+        print("   ├─ Change feed: LISTEN claims_changes")
+        return feed.start()
+
+    def _on_claims_changed(self, changes):
+        """
+        Evidence bị xoá / đổi nhãn / sửa nội dung -> verdict đã cache có thể sai, xoá cache
+        và điểm NLI của các evidence đó trong pair-score store.
+        Claim mới chỉ thêm evidence: verdict cũ hết hạn theo TTL như bình thường.
+        """
+        if not any(op != "INSERT" for _, op, _ in changes):
+            return
+        self.verdict_cache.clear()
+        if self.pair_scores:
+            if any(op == "TRUNCATE" for _, op, _ in changes):
+                self.pair_scores.clear()
+            else:
+                self.pair_scores.invalidate_evidence(c for _, op, c in changes if op != "INSERT")
+
+    def _on_claims_gap(self):
+        """Có thể đã lỡ thay đổi: bỏ mọi kết quả có thể dựa trên evidence cũ"""
+        self.verdict_cache.clear()
+        if self.pair_scores:
+            self.pair_scores.clear()
+
+    def batchers(self):
+        return [b for b in (self.embed_batcher, self._bundle.batcher) if b]
+
+    def close(self):
+        """Dừng change feed, các worker micro-batching, đóng pair-score store"""
+        if self.change_feed:
+            self.change_feed.stop()
+        if self.embed_batcher:
+            self.embed_batcher.close()
+        self._bundle.close()
+        if self.pair_scores:
+            self.pair_scores.close()
     
     def clean_text(self, text):
         if not text: return ""
@@ -40,67 +573,416 @@ class AdvancedFactChecker:
         return re.sub(r'\s+', ' ', text).strip()
 
     def extract_claims(self, text):
-        cleaned_text = self.clean_text(text)
-        sentences = sent_tokenize(cleaned_text)
+        candidates = self.split_claims(self.clean_text(text))
+        keep = self.checkworthy(candidates)
+        return [c for c in candidates if c in keep]
+
+    def split_claims(self, cleaned_text):
+        with stage("sent_tokenize"):
+            sentences = sent_tokenize(cleaned_text)
         return [s.strip() for s in sentences if len(s.split()) > 5]
 
-    def verify(self, article_text):
-        claims = self.extract_claims(article_text)
+    def checkworthy(self, sentences):
+        """
+        Chạy claim extractor theo batch, trả về dict {câu có nhãn 1 (CLAIM): xác suất CLAIM}
+        (xác suất dùng để xếp hạng salience khi có ngân sách).
+        Không bật extractor -> giữ tất cả, xác suất 1.0.
+        """
+        unique = list(dict.fromkeys(sentences))
+        if not self.claim_classifier:
+            return dict.fromkeys(unique, 1.0)
+        if not unique:
+            return {}
+        with stage("claim_extractor"):
+            logits = predict_in_length_buckets(
+                lambda batch: self.claim_classifier.predict_logits(batch, max_length=128),
+                unique, VERIFIER_BATCH_SIZE
+            )
+        probs = softmax(logits)
+        return {s: float(p[1]) for s, p in zip(unique, probs) if np.argmax(p) == 1}
+
+    @staticmethod
+    def pruning_stats(candidates, claims):
+        pruned = len(candidates) - len(claims)
+        return {
+            "candidates": len(candidates),
+            "pruned": pruned,
+            "pruning_rate": pruned / len(candidates) if candidates else 0.0,
+        }
+
+    def verify(self, article_text, tier="interactive", url=None, time_budget_ms=None, max_claims=None):
+        result = None
+        for event, payload in self.iter_verify(
+            article_text, chunk_size=None, tier=tier, url=url,
+            time_budget_ms=time_budget_ms, max_claims=max_claims,
+        ):
+            if event == "result":
+                result = payload
+        return result
+
+    def iter_verify(self, article_text, chunk_size=STREAM_CHUNK_SIZE, tier="interactive", url=None,
+                    time_budget_ms=None, max_claims=None, first_chunk_size=STREAM_FIRST_CHUNK_SIZE):
+        """
+        Verify dạng generator, phục vụ streaming:
+            ("start", {"model_version", "total_claims"})
+            ("claim", detail)   -> ngay khi claim được chấm điểm xong: theo thứ tự trong bài,
+                                   hoặc theo salience giảm dần khi có ngân sách (result["details"] cũng vậy)
+            ("result", result)  -> kết luận cuối cùng
+        chunk_size=None: chấm tất cả claim trong 1 batch (verify thường).
+        first_chunk_size: số claim của nhóm đầu (bỏ qua khi chunk_size=None).
+        tier: loại request, chọn hnsw.ef_search (RETRIEVAL_EF_SEARCH).
+        url: URL bài (nếu có) -> tra verdict tính sẵn trong article_verdicts trước khi verify.
+        time_budget_ms / max_claims: ngân sách của request (None -> VERIFY_TIME_BUDGET_MS /
+            VERIFY_MAX_CLAIMS). Claim được chấm theo thứ tự salience và dừng khi hết ngân sách,
+            result["partial"] = True nếu còn claim chưa chấm (kết quả partial không được cache).
+        """
+        budget = VerifyBudget.create(time_budget_ms, max_claims)
+        with stage("clean_text"):
+            cleaned_text = self.clean_text(article_text)
+        with self.use_verifier() as bundle:
+            cache_key = VerdictCache.make_key(cleaned_text, bundle.version)
+            cached = self.verdict_cache.get(cache_key)
+            if cached is None:
+                found = self.lookup_precomputed(cleaned_text, bundle.version, url)
+                if found is not None:
+                    cached, matched_by = found
+                    # Khớp URL: verdict là của bài tại URL đó, không phải của văn bản này
+                    # (extension cắt bài, trang có thể đã sửa) -> không cache theo key văn bản
+                    if matched_by == "hash":
+                        self.verdict_cache.put(cache_key, cached)
+            if cached is not None:
+                yield from self._replay(cached, bundle.version)
+                return
+
+            result = None
+            first = first_chunk_size if chunk_size else None
+            for event, payload in self._iter_verify_cleaned(cleaned_text, bundle, chunk_size, tier, budget, first):
+                if event == "result":
+                    result = payload
+                yield event, payload
+            if not result["partial"]:
+                self.verdict_cache.put(cache_key, result)
+
+    @staticmethod
+    def _replay(result, model_version):
+        """Phát lại kết quả đã có (cache / verdict tính sẵn) theo đúng chuỗi event của iter_verify"""
+        yield "start", {"model_version": model_version, "total_claims": len(result["details"])}
+        for detail in result["details"]:
+            yield "claim", detail
+        yield "result", result
+
+    def lookup_precomputed(self, cleaned_text, model_version, url=None):
+        """
+        Verdict consumer đã tính sẵn cho bài đã crawl (khớp URL hoặc hash nội dung),
+        chỉ dùng khi cùng model_version. Trả về (result, "url" | "hash"),
+        None nếu không có / DB lỗi (verify như bình thường).
+        """
+        if not ENABLE_PRECOMPUTED_VERDICTS:
+            return None
+        try:
+            with stage("verdict_store"), self.db_pool.connection() as conn:
+                with conn.cursor() as cur:
+                    found = lookup_verdict(cur, model_version, url=url, cleaned_text=cleaned_text)
+        except Exception as e:
+            print(f"⚠️ [Verdict Store] Không tra được verdict tính sẵn: {e}")
+            return None
+        if found is None:
+            PRECOMPUTED_VERDICT_LOOKUPS.inc(result="miss")
+            return None
+        result, matched_by = found
+        PRECOMPUTED_VERDICT_LOOKUPS.inc(result=matched_by)
+        result["stats"] = {**result.get("stats", {}), "precomputed": True}
+        return result, matched_by
+
+    def _iter_verify_cleaned(self, cleaned_text, bundle, chunk_size, tier="interactive", budget=None,
+                             first_chunk_size=None):
+        candidates_text = self.split_claims(cleaned_text)
+        keep = self.checkworthy(candidates_text)
+        claims = [c for c in candidates_text if c in keep]
+        prune_stats = self.pruning_stats(candidates_text, claims)
+        if budget is not None:
+            # Claim nổi bật nhất chấm trước (thứ tự stream / details theo salience, không theo bài)
+            claims = budget.select(claims, keep)
+        yield "start", {"model_version": bundle.version, "total_claims": len(claims)}
         if not claims: 
-            return {
+            yield "result", self.empty_result(bundle.version, prune_stats)
+            return
+
+        # Có deadline: retrieval theo từng nhóm để dừng được giữa chừng
+        deadline = budget is not None and budget.deadline is not None
+        candidates = None if deadline else self.retrieve_candidates(claims, tier)
+
+        results_list = []
+        exits = [] # Claim được quyết định ở tầng nào của cascade
+        step = chunk_size or (CASCADE_CHUNK_SIZE if ENABLE_CASCADE else len(claims))
+        if budget is not None:
+            step = budget.chunk_size(step)
+            first_chunk_size = first_chunk_size and budget.chunk_size(first_chunk_size)
+        seconds_per_claim = 0.0
+        for start, end in chunk_bounds(len(claims), step, first_chunk_size):
+            if ENABLE_CASCADE and self.is_decided(results_list):
+                # Kết luận FAKE đã chắc chắn: các claim còn lại không cần chấm
+                chunk = [self.skipped_detail(c) for c in claims[start:end]]
+                exits.extend(["early_exit"] * len(chunk))
+            else:
+                # Luôn chấm ít nhất 1 nhóm để có kết luận
+                next_chunk_seconds = seconds_per_claim * (end - start)
+                if deadline and results_list and budget.should_stop(next_chunk_seconds, len(claims) - start):
+                    break
+                chunk_start = time.perf_counter()
+                chunk_claims = claims[start:end]
+                chunk_candidates = (
+                    candidates[start:end] if candidates is not None
+                    else self.retrieve_candidates(chunk_claims, tier)
+                )
+                chunk = self.check_claims(chunk_claims, chunk_candidates, bundle, exits)
+                seconds_per_claim = (time.perf_counter() - chunk_start) / len(chunk_claims)
+            for detail in chunk:
+                yield "claim", detail
+            results_list.extend(chunk)
+
+        stats = {**prune_stats, **Counter(exits)}
+        if budget is not None:
+            stats.update(budget.stats())
+        yield "result", self.make_final_decision(
+            results_list, bundle.version, stats, partial=budget is not None and budget.partial
+        )
+
+    def iter_verify_many(self, texts, group_size=BULK_GROUP_SIZE, tier="batch", article_ids=None):
+        """
+        Verify nhiều bài 1 lúc. Claim của cả nhóm `group_size` bài được gộp chung
+        1 lượt encode, 1 query retrieval và 1 lượt rerank.
+        Yield (index trong texts, result) theo thứ tự hoàn thành:
+        bài trúng cache trả về ngay, các bài còn lại trả về theo từng nhóm.
+        article_ids: id trong bảng articles của từng bài (verdict tính sẵn) -> claim của chính
+            bài đó bị loại khỏi evidence; kết quả phụ thuộc article_id nên không dùng verdict cache.
+        """
+        with self.use_verifier() as bundle:
+            pending = [] # (index, cleaned_text, cache_key)
+            for i, text in enumerate(texts):
+                with stage("clean_text"):
+                    cleaned_text = self.clean_text(text)
+                cache_key = VerdictCache.make_key(cleaned_text, bundle.version)
+                cached = self.verdict_cache.get(cache_key) if article_ids is None else None
+                if cached is not None:
+                    yield i, cached
+                else:
+                    pending.append((i, cleaned_text, cache_key))
+
+            for start in range(0, len(pending), group_size):
+                group = pending[start:start + group_size]
+                group_articles = [article_ids[i] for i, _, _ in group] if article_ids is not None else None
+                results = self._verify_group([cleaned for _, cleaned, _ in group], bundle, tier, group_articles)
+                for (i, _, cache_key), result in zip(group, results):
+                    if article_ids is None:
+                        self.verdict_cache.put(cache_key, result)
+                    yield i, result
+
+    def _verify_group(self, cleaned_texts, bundle, tier="batch", article_ids=None):
+        candidates_per_article = [self.split_claims(t) for t in cleaned_texts]
+        # Claim extractor chạy 1 batch cho cả nhóm bài
+        keep = self.checkworthy([c for cands in candidates_per_article for c in cands])
+        claims_per_article = [[c for c in cands if c in keep] for cands in candidates_per_article]
+        all_claims = [c for claims in claims_per_article for c in claims]
+        exclude_articles = None
+        if article_ids is not None:
+            exclude_articles = [a for a, claims in zip(article_ids, claims_per_article) for _ in claims]
+        exits = []
+        details = self.check_claims(
+            all_claims, self.retrieve_candidates(all_claims, tier, exclude_articles), bundle, exits
+        )
+
+        results = []
+        offset = 0
+        for cands, claims in zip(candidates_per_article, claims_per_article):
+            prune_stats = self.pruning_stats(cands, claims)
+            if not claims:
+                results.append(self.empty_result(bundle.version, prune_stats))
+                continue
+            end = offset + len(claims)
+            results.append(self.make_final_decision(
+                details[offset:end], bundle.version, {**prune_stats, **Counter(exits[offset:end])}
+            ))
+            offset = end
+        return results
+
+    def empty_result(self, model_version, stats=None):
+        CLAIMS_PER_ARTICLE.observe(0)
+        return {
+            "status": "NEUTRAL", 
+            "confidence": 0.0, 
+            "explanation": "Không đủ thông tin.", 
+            "model_version": model_version,
+            "details": [],
+            "partial": False,
+            "stats": {"claims": 0, **(stats or {})}
+        }
+
+    def is_decided(self, details):
+        """Đã có claim REFUTED đủ chắc -> make_final_decision chắc chắn trả về FAKE"""
+        return any(d["status"] == "REFUTED" and d["score"] > FAKE_CONFIDENCE_THRESHOLD for d in details)
+
+    def skipped_detail(self, claim):
+        return {
+            "claim_id": None,
+            "claim": claim,
+            "status": "SKIPPED",
+            "evidence": "Bỏ qua: kết luận đã được xác định từ các câu trước.",
+            "score": 0.0
+        }
+
+    def retrieve_candidates(self, claims, tier="interactive", exclude_articles=None):
+        """
+        Encode + tìm evidence cho list claim; câu lặp lại chỉ encode + tìm kiếm 1 lần.
+        exclude_articles: article_id (cùng thứ tự với claims) mà evidence không được thuộc về.
+        """
+        keys = list(zip(claims, exclude_articles or [None] * len(claims)))
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return []
+        with stage("encode"):
+            claim_vectors = self.encode([claim for claim, _ in unique_keys])
+        excludes = [article_id for _, article_id in unique_keys] if exclude_articles else None
+
+        unique_candidates = None
+        if self.ann_index is not None:
+            try:
+                with stage("ann_search"):
+                    unique_candidates = self.ann_index.search(claim_vectors, RETRIEVAL_TOP_K, excludes)
+                RETRIEVAL_REQUESTS.inc(backend="ann")
+            except Exception as e:
+                print(f"⚠️ [ANN] Lỗi tìm kiếm, dùng pgvector: {e}")
+        if unique_candidates is None:
+            with self.db_pool.connection() as conn:
+                with stage("pgvector_search"), conn.cursor() as cur:
+                    unique_candidates = self.search_evidence(cur, claim_vectors, tier=tier, exclude_articles=excludes)
+            RETRIEVAL_REQUESTS.inc(backend="pgvector")
+        by_key = dict(zip(unique_keys, unique_candidates))
+        return [by_key[k] for k in keys]
+
+    def check_claims(self, claims, candidates, bundle, exits=None):
+        """
+        Gắn evidence + chấm điểm NLI cho 1 nhóm claim (đã có ứng viên retrieval).
+        `exits` (nếu truyền) được nối thêm tầng cascade đã quyết định từng claim:
+        no_evidence / near_duplicate / pair_cache / cross_encoder.
+        """
+        results_list = []
+        claim_exits = []
+        pairs = [] # (vị trí trong results_list, claim, evidence_id, evidence) cần chấm điểm
+        for claim, claim_candidates in zip(claims, candidates):
+            row = claim_candidates[0] if claim_candidates else None
+            detail = {
+                "claim_id": None, # ID trong DB (nếu tìm thấy) để Extension biết report vào đâu
+                "claim": claim, 
                 "status": "NEUTRAL", 
-                "confidence": 0.0, 
-                "explanation": "Không đủ thông tin.", 
-                "model_version": CURRENT_MODEL_VERSION,
-                "details": []
+                "evidence": "Không tìm thấy dữ liệu đối chiếu.", 
+                "score": 0.5
             }
+            claim_exit = "no_evidence"
+            if row and row[3] < DISTANCE_THRESHOLD:
+                detail["claim_id"] = row[0]
+                detail["evidence"] = row[1]
+                if ENABLE_CASCADE and is_near_duplicate(claim, row[1], row[3]):
+                    # Gần như trùng khớp với claim REAL (kể cả số liệu) -> không cần CrossEncoder
+                    detail["status"] = "SUPPORTED"
+                    detail["score"] = float(1.0 - row[3])
+                    claim_exit = "near_duplicate"
+                else:
+                    pairs.append((len(results_list), claim, row[0], row[1]))
+            results_list.append(detail)
+            claim_exits.append(claim_exit)
 
-        claim_vectors = self.retriever.encode(claims)
-        conn = psycopg2.connect(**DB_CONFIG)
-        results_list = []
-        
-        with conn.cursor() as cur:
-            for i, claim in enumerate(claims):
-                # Lấy thêm ID để phục vụ Feedback Loop
-                cur.execute("""
-                    SELECT id, content, system_label, (embedding <=> %s::vector) as distance
-                    FROM claims
-                    WHERE system_label = 'REAL' 
-                    ORDER BY distance ASC
-                    LIMIT 1; 
-                """, (claim_vectors[i].tolist(),))
-                
-                row = cur.fetchone()
-                
-                status = "NEUTRAL"
-                evidence_text = "Không tìm thấy dữ liệu đối chiếu."
-                confidence = 0.5
-                claim_id_db = None # ID trong DB (nếu tìm thấy)
-
-                if row and row[3] < 0.5:
-                    claim_id_db = row[0]
-                    evidence_text = row[1]
-                    
-                    scores = self.verifier_model.predict([claim, evidence_text])
-                    scores_softmax = np.exp(scores) / np.sum(np.exp(scores))
-                    pred_label = np.argmax(scores_softmax)
-                    confidence = float(scores_softmax[pred_label])
-
-                    status = ["REFUTED", "SUPPORTED", "NEI"][pred_label]
-
-                results_list.append({
-                    "claim_id": claim_id_db, # Trả về ID để Extension biết report vào đâu
-                    "claim": claim, 
-                    "status": status, 
-                    "evidence": evidence_text, 
-                    "score": confidence
-                })
-        
-        conn.close()
-        return self.make_final_decision(results_list)
+        # Chấm điểm tất cả cặp (claim, evidence) trong 1 lần predict
+        probs, from_cache = self.score_pairs([pair[1:] for pair in pairs], bundle)
+        for (pos, *_), prob, cached in zip(pairs, probs, from_cache):
+            pred_label = int(np.argmax(prob))
+            results_list[pos]["status"] = VERIFIER_LABELS[pred_label]
+            results_list[pos]["score"] = float(prob[pred_label])
+            claim_exits[pos] = "pair_cache" if cached else "cross_encoder"
+
+        if exits is not None:
+            exits.extend(claim_exits)
+        return results_list
+
+    def score_pairs(self, pairs, bundle):
+        """
+        Chấm điểm NLI cho danh sách (claim, evidence_id, evidence_text) bằng 1 lần predict
+        (có thể được gộp chung batch với request khác qua micro-batcher).
+        Các cặp trùng nhau (câu lặp lại trong bài) chỉ được chấm 1 lần, cặp đã có
+        trong pair-score store thì không cần chạy CrossEncoder.
+        Trả về (mảng xác suất shape (len(pairs), 3), list bool: cặp lấy từ pair-score store).
+        """
+        if not pairs:
+            return np.zeros((0, len(VERIFIER_LABELS))), []
+
+        unique_pairs = list(dict.fromkeys((claim, ev_id) for claim, ev_id, _ in pairs))
+        evidence_by_id = {ev_id: text for _, ev_id, text in pairs}
+        probs_by_pair = {}
+
+        keys = {}
+        if self.pair_scores:
+            keys = {p: PairScoreStore.make_key(p[0], p[1], evidence_by_id[p[1]], bundle.version) for p in unique_pairs}
+            cached = self.pair_scores.get_many(list(keys.values()))
+            for pair, key in keys.items():
+                if key in cached:
+                    probs_by_pair[pair] = np.asarray(cached[key])
+        cached_pairs = set(probs_by_pair)
 
-    def make_final_decision(self, details):
+        missing = [p for p in unique_pairs if p not in probs_by_pair]
+        if missing:
+            with stage("cross_encoder"):
+                logits = bundle.predict_logits([(claim, evidence_by_id[ev_id]) for claim, ev_id in missing])
+                missing_probs = softmax(logits)
+            probs_by_pair.update(zip(missing, missing_probs))
+            if self.pair_scores:
+                self.pair_scores.put_many([(keys[p], prob) for p, prob in zip(missing, missing_probs)])
+
+        probs = np.stack([probs_by_pair[(claim, ev_id)] for claim, ev_id, _ in pairs])
+        return probs, [(claim, ev_id) in cached_pairs for claim, ev_id, _ in pairs]
+
+    def search_evidence(self, cur, claim_vectors, top_k=RETRIEVAL_TOP_K, tier="interactive", exclude_articles=None):
+        """
+        Tìm evidence cho tất cả claim trong 1 query duy nhất (ef_search theo tier).
+        exclude_articles: list article_id cùng thứ tự với claim_vectors (None = không loại trừ).
+        Trả về list (cùng thứ tự với claim_vectors), mỗi phần tử là list ứng viên
+        (id, content, system_label, distance) sắp xếp theo distance tăng dần.
+        """
+        candidates = [[] for _ in range(len(claim_vectors))]
+        if not candidates:
+            return candidates
+
+        ef_search = RETRIEVAL_EF_SEARCH.get(tier, RETRIEVAL_EF_SEARCH["interactive"])
+        vectors = [to_pgvector(v) for v in claim_vectors]
+        if PGVECTOR_QUANTIZATION in QUANTIZED_DISTANCE:
+            num_candidates = top_k * PGVECTOR_RERANK_FACTOR
+            # HNSW trả về tối đa ef_search kết quả
+            set_search_params(cur, max(ef_search, num_candidates))
+            execute_prepared(
+                cur, f"retrieve_evidence_{PGVECTOR_QUANTIZATION}", ["text[]", "int", "int", "int[]"],
+                quantized_retrieval_sql(PGVECTOR_QUANTIZATION), (vectors, top_k, num_candidates, exclude_articles)
+            )
+        else:
+            set_search_params(cur, ef_search)
+            execute_prepared(
+                cur, "retrieve_evidence", ["text[]", "int", "int[]"], BATCH_RETRIEVAL_SQL,
+                (vectors, top_k, exclude_articles)
+            )
+        for idx, claim_id, content, label, distance in cur.fetchall():
+            # WITH ORDINALITY đánh số từ 1
+            candidates[idx - 1].append((claim_id, content, label, distance))
+        return candidates
+
+    def make_final_decision(self, details, model_version=None, stats=None, partial=False):
+        with stage("aggregation"):
+            return self._aggregate(details, model_version, stats, partial)
+
+    def _aggregate(self, details, model_version=None, stats=None, partial=False):
         # Logic aggregation (giữ nguyên hoặc nâng cấp)
+        CLAIMS_PER_ARTICLE.observe(len(details))
+        for exit_name in VERIFIER_EXITS:
+            if stats and stats.get(exit_name):
+                CASCADE_EXITS.inc(stats[exit_name], exit=exit_name)
+
         refuted = [d for d in details if d['status'] == 'REFUTED']
         supported = [d for d in details if d['status'] == 'SUPPORTED']
         
@@ -110,7 +992,7 @@ class AdvancedFactChecker:
 
         if refuted:
             top = max(refuted, key=lambda x: x['score'])
-            if top['score'] > 0.85:
+            if top['score'] > FAKE_CONFIDENCE_THRESHOLD:
                 final_status = "FAKE"
                 explanation = f"Mâu thuẫn: '{top['claim']}'"
                 confidence = top['score']
@@ -123,6 +1005,10 @@ class AdvancedFactChecker:
             "status": final_status,
             "confidence": confidence,
             "explanation": explanation,
-            "model_version": CURRENT_MODEL_VERSION, # Đóng dấu phiên bản
-            "details": details
+            "model_version": model_version or self.model_version, # Đóng dấu phiên bản
+            "details": details,
+            # True: hết ngân sách, kết luận chỉ dựa trên các claim đã chấm
+            "partial": partial,
+            # Tỉ lệ lọc câu + số claim được quyết định ở từng tầng cascade
+            "stats": {"claims": len(details), **(stats or {})}
         }
\ No newline at end of file
@@ -32,4 +32,10 @@ with DAG(
         bash_command='cd /opt/project && python processor/rebuild_knowledge_base.py',
     )
 
-    crawl_task >> rebuild_kb_task
\ No newline at end of file
+    # Task 3: Tính lại verdict cho các bài (rebuild xoá article_verdicts vì claim_id đã đổi)
+    precompute_task = BashOperator(
+        task_id='precompute_verdicts',
+        bash_command='cd /opt/project && python processor/precompute_verdicts.py',
+    )
+
+    crawl_task >> rebuild_kb_task >> precompute_task
\ No newline at end of file
@@ -45,6 +45,16 @@ with DAG(
         headers={"Content-Type": "application/json"},
     )
 
-    train_task >> reload_api_task
+    # Task 3: Tính lại verdict tính sẵn cho model vừa active, xoá verdict của model cũ
+    precompute_task = BashOperator(
+        task_id='precompute_verdicts',
+        bash_command='cd /opt/project && python processor/precompute_verdicts.py --prune',
+        env={
+            'POSTGRES_HOST': 'db',
+            'POSTGRES_USER': '{{ var.value.POSTGRES_USER }}',
+            'POSTGRES_PASSWORD': '{{ var.value.POSTGRES_PASSWORD }}',
+            'POSTGRES_DB': '{{ var.value.POSTGRES_DB }}',
+        }
+    )
 
-    train_task >> reload_api_task
\ No newline at end of file
+    train_task >> reload_api_task >> precompute_task
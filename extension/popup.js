@@ -47,63 +47,47 @@ document.getElementById('check-btn').addEventListener('click', async () => {
         const pageText = results[0].result;
 
         try {
-            // GỌI API VERIFY
-            const response = await fetch(`${API_URL}/verify`, {
+            // GỌI API VERIFY (STREAM): hiển thị từng câu ngay khi AI chấm xong
+            const response = await fetch(`${API_URL}/verify/stream`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ text: pageText })
+                body: JSON.stringify({ text: pageText, url: tab.url })
             });
 
-            if (!response.ok) throw new Error('API Error');
-            const data = await response.json();
-
-            // HIỂN THỊ KẾT QUẢ TỔNG QUAN
-            statusDiv.style.display = 'none';
-            resultBox.style.display = 'block';
-            resultBox.className = 'status-box ' + data.status.toLowerCase();
-            
-            document.getElementById('verdict').textContent = data.status === 'FAKE' ? "CẢNH BÁO: TIN GIẢ" : (data.status === 'REAL' ? "TIN CHÍNH XÁC" : "CHƯA XÁC THỰC");
-            document.getElementById('confidence').textContent = `Độ tin cậy: ${(data.confidence * 100).toFixed(1)}% | Model: ${data.model_version}`;
-            document.getElementById('explanation').textContent = data.explanation;
-
-            // HIỂN THỊ CHI TIẾT TỪNG CÂU + NÚT REPORT
-            if (data.details && data.details.length > 0) {
-                claimsDiv.innerHTML = "<div style='font-size:11px; margin:5px 0; font-weight:bold;'>Chi tiết kiểm chứng:</div><ul>";
-                
-                data.details.forEach(item => {
-                    const icon = item.status === 'REFUTED' ? '❌' : (item.status === 'SUPPORTED' ? '✅' : '⚪');
-                    const claimId = item.claim_id || "null"; 
-                    
-                    // --- SỬA CHỖ NÀY: Dùng data-attribute thay vì onclick ---
-                    const li = document.createElement('li');
-                    li.innerHTML = `
-                        <span class="claim-text">${icon} ${item.claim}</span>
-                        <div class="actions">
-                            <button class="btn-report rep-fake" 
-                                data-id="${claimId}" 
-                                data-feedback="FAKE"
-                                data-ailabel="${item.status}"
-                                data-aiconf="${item.score}"
-                                data-modelver="${data.model_version}">
-                                🚨 Báo sai
-                            </button>
-                            <button class="btn-report rep-real"
-                                data-id="${claimId}" 
-                                data-feedback="REAL"
-                                data-ailabel="${item.status}"
-                                data-aiconf="${item.score}"
-                                data-modelver="${data.model_version}">
-                                👍 Xác nhận đúng
-                            </button>
-                        </div>
-                    `;
-                    claimsDiv.appendChild(li);
-                });
-                claimsDiv.innerHTML += "</ul>";
-
-                // --- GẮN SỰ KIỆN CLICK SAU KHI TẠO HTML ---
-                addReportListeners();
+            if (response.status === 503) {
+                // Server quá tải (admission control): báo người dùng thử lại sau Retry-After giây
+                const retryAfter = response.headers.get('Retry-After') || '1';
+                throw new Error(`Hệ thống đang quá tải, vui lòng thử lại sau ${retryAfter} giây.`);
             }
+            if (!response.ok || !response.body) throw new Error('API Error');
+
+            let modelVersion = "";
+            let claimList = null;
+            let checked = 0;
+            let total = 0;
+
+            await readNdjson(response, (event) => {
+                if (event.type === 'start') {
+                    modelVersion = event.data.model_version;
+                    total = event.data.total_claims;
+                    statusDiv.textContent = total > 0 ? `⏳ Đang kiểm chứng 0/${total} câu...` : "⏳ Đang tổng hợp...";
+                    if (total > 0) {
+                        claimsDiv.innerHTML = "<div style='font-size:11px; margin:5px 0; font-weight:bold;'>Chi tiết kiểm chứng:</div>";
+                        claimList = document.createElement('ul');
+                        claimsDiv.appendChild(claimList);
+                    }
+                } else if (event.type === 'claim') {
+                    // HIỂN THỊ CHI TIẾT TỪNG CÂU + NÚT REPORT
+                    checked += 1;
+                    statusDiv.textContent = `⏳ Đang kiểm chứng ${checked}/${total} câu...`;
+                    if (claimList) claimList.appendChild(renderClaim(event.data, modelVersion));
+                } else if (event.type === 'result') {
+                    renderVerdict(event.data);
+                    statusDiv.style.display = 'none';
+                } else if (event.type === 'error') {
+                    throw new Error(event.data.detail);
+                }
+            });
 
         } catch (err) {
             statusDiv.textContent = "❌ Lỗi: " + err.message;
@@ -114,9 +98,73 @@ document.getElementById('check-btn').addEventListener('click', async () => {
     });
 });
 
+// Đọc response NDJSON (mỗi dòng 1 JSON) và gọi onEvent cho từng dòng
+async function readNdjson(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) onEvent(JSON.parse(line));
+        }
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
+// HIỂN THỊ KẾT QUẢ TỔNG QUAN
+function renderVerdict(data) {
+    const resultBox = document.getElementById('main-result');
+    resultBox.style.display = 'block';
+    resultBox.className = 'status-box ' + data.status.toLowerCase();
+
+    document.getElementById('verdict').textContent = data.status === 'FAKE' ? "CẢNH BÁO: TIN GIẢ" : (data.status === 'REAL' ? "TIN CHÍNH XÁC" : "CHƯA XÁC THỰC");
+    document.getElementById('confidence').textContent = `Độ tin cậy: ${(data.confidence * 100).toFixed(1)}% | Model: ${data.model_version}`;
+    document.getElementById('explanation').textContent = data.explanation;
+}
+
+// Tạo 1 dòng claim kèm nút report (dùng data-attribute thay vì onclick)
+function renderClaim(item, modelVersion) {
+    const icon = item.status === 'REFUTED' ? '❌' : (item.status === 'SUPPORTED' ? '✅' : '⚪');
+    const claimId = item.claim_id || "null";
+
+    const li = document.createElement('li');
+    li.innerHTML = `
+        <span class="claim-text">${icon} ${item.claim}</span>
+        <div class="actions">
+            <button class="btn-report rep-fake" 
+                data-id="${claimId}" 
+                data-feedback="FAKE"
+                data-ailabel="${item.status}"
+                data-aiconf="${item.score}"
+                data-modelver="${modelVersion}">
+                🚨 Báo sai
+            </button>
+            <button class="btn-report rep-real"
+                data-id="${claimId}" 
+                data-feedback="REAL"
+                data-ailabel="${item.status}"
+                data-aiconf="${item.score}"
+                data-modelver="${modelVersion}">
+                👍 Xác nhận đúng
+            </button>
+        </div>
+    `;
+    // --- GẮN SỰ KIỆN CLICK NGAY KHI TẠO ---
+    addReportListeners(li);
+    return li;
+}
+
 // 3. HÀM GẮN SỰ KIỆN CLICK (Thay thế cho onclick)
-function addReportListeners() {
-    const buttons = document.querySelectorAll('.btn-report');
+function addReportListeners(root = document) {
+    const buttons = root.querySelectorAll('.btn-report');
     buttons.forEach(btn => {
         btn.addEventListener('click', async (e) => {
             // Lấy dữ liệu từ data-attribute
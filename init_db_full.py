@@ -67,6 +67,12 @@ CREATE INDEX IF NOT EXISTS claims_article_idx ON claims(article_id);
 CREATE INDEX IF NOT EXISTS claims_label_idx ON claims(system_label);
 CREATE INDEX IF NOT EXISTS claims_embedding_idx 
     ON claims USING hnsw (embedding vector_cosine_ops);
+-- Partial index chỉ gồm claim REAL: retrieval của Verifier (WHERE system_label = 'REAL')
+-- không phải lọc sau trên index toàn bảng -> recall không giảm khi FAKE/UNDEFINED tăng.
+-- (pgvector >= 0.8 có thể dùng thêm hnsw.iterative_scan, xem PGVECTOR_ITERATIVE_SCAN)
+CREATE INDEX IF NOT EXISTS claims_real_embedding_idx
+    ON claims USING hnsw (embedding vector_cosine_ops)
+    WHERE system_label = 'REAL';
 
 -- =============================================
 -- 4. USERS TABLE (Người dùng Extension)
@@ -142,6 +148,78 @@ CREATE TABLE IF NOT EXISTS training_data (
 );
 
 CREATE INDEX IF NOT EXISTS training_label_idx ON training_data(label);
+
+-- =============================================
+-- 8. CLAIMS_CHANGES (Change feed của bảng claims)
+-- =============================================
+-- Backend (backend/change_feed.py) đọc các thay đổi của transaction đã kết thúc để cập nhật
+-- ANN replica tăng dần; NOTIFY chỉ để đánh thức, dữ liệu nằm trong bảng này.
+-- seq cấp lúc INSERT chứ không phải lúc COMMIT -> không dùng làm watermark; feed dùng
+-- xid (transaction ghi thay đổi) so với pg_snapshot_xmin: mọi transaction có xid nhỏ hơn
+-- đã commit / rollback xong nên không còn thay đổi nào của chúng xuất hiện muộn
+CREATE TABLE IF NOT EXISTS claims_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    op TEXT NOT NULL CHECK (op IN ('INSERT', 'UPDATE', 'DELETE', 'TRUNCATE')),
+    claim_id INTEGER,  -- NULL với TRUNCATE
+    changed_at TIMESTAMP DEFAULT NOW(),
+    xid XID8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+-- Bảng tạo từ phiên bản trước chưa có cột xid
+ALTER TABLE claims_changes ADD COLUMN IF NOT EXISTS xid XID8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS claims_changes_time_idx ON claims_changes(changed_at);
+CREATE INDEX IF NOT EXISTS claims_changes_xid_idx ON claims_changes(xid, seq);
+
+CREATE OR REPLACE FUNCTION log_claims_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO claims_changes (op) VALUES ('TRUNCATE');
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO claims_changes (op, claim_id) VALUES ('DELETE', OLD.id);
+    ELSIF TG_OP = 'INSERT'
+          OR NEW.system_label IS DISTINCT FROM OLD.system_label
+          OR NEW.content IS DISTINCT FROM OLD.content
+          OR NEW.embedding IS DISTINCT FROM OLD.embedding THEN
+        INSERT INTO claims_changes (op, claim_id) VALUES (TG_OP, NEW.id);
+    ELSE
+        RETURN NULL;  -- UPDATE không ảnh hưởng retrieval (verified, updated_at...)
+    END IF;
+    -- Payload rỗng: các NOTIFY giống nhau trong 1 transaction được gộp thành 1
+    PERFORM pg_notify('claims_changes', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS claims_change_feed ON claims;
+CREATE TRIGGER claims_change_feed
+    AFTER INSERT OR UPDATE OR DELETE ON claims
+    FOR EACH ROW EXECUTE FUNCTION log_claims_change();
+
+-- TRUNCATE (rebuild_knowledge_base.py, hoặc TRUNCATE articles CASCADE) không kích hoạt trigger DELETE
+DROP TRIGGER IF EXISTS claims_change_feed_truncate ON claims;
+CREATE TRIGGER claims_change_feed_truncate
+    AFTER TRUNCATE ON claims
+    FOR EACH STATEMENT EXECUTE FUNCTION log_claims_change();
+
+-- =============================================
+-- 9. ARTICLE_VERDICTS (Verdict tính sẵn cho bài đã crawl)
+-- =============================================
+-- Consumer ghi sau khi lưu claims; Backend tra theo URL (đã chuẩn hoá) hoặc hash nội dung.
+-- Đổi model -> processor/precompute_verdicts.py tính lại cho model_version mới
+CREATE TABLE IF NOT EXISTS article_verdicts (
+    id SERIAL PRIMARY KEY,
+    article_id INTEGER REFERENCES articles(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,  -- backend.cache.text_hash(clean_text(content))
+    model_version TEXT NOT NULL,
+    result JSONB NOT NULL,       -- VerificationResult đầy đủ (details + stats)
+    computed_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (url, model_version)
+);
+
+CREATE INDEX IF NOT EXISTS article_verdicts_hash_idx ON article_verdicts(content_hash, model_version);
+CREATE INDEX IF NOT EXISTS article_verdicts_article_idx ON article_verdicts(article_id);
 """
 
 def init_database():
@@ -164,7 +242,9 @@ def init_database():
         print("   ├─ users (Người dùng Extension)")
         print("   ├─ user_reports (Feedback từ user)")
         print("   ├─ model_versions (Lịch sử model)")
-        print("   └─ training_data (Dữ liệu retrain)")
+        print("   ├─ training_data (Dữ liệu retrain)")
+        print("   ├─ claims_changes (Change feed của claims)")
+        print("   └─ article_verdicts (Verdict tính sẵn theo URL / model)")
         
         cur.close()
         conn.close()
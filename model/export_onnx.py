@@ -0,0 +1,238 @@
+"""
+Export 3 model chính sang ONNX (+ dynamic INT8), kiểm tra độ khớp với PyTorch
+và so sánh latency.
+
+Model:
+    - bi_encoder      : bkai-foundation-models/vietnamese-bi-encoder (SentenceTransformer)
+    - cross_encoder   : my_model_v7 (CrossEncoder NLI 3 nhãn)
+    - claim_extractor : model/phobert_claim_extractor (PhoBERT phân loại claim)
+
+Usage:
+    python model/export_onnx.py                      # Export cả 3 model
+    python model/export_onnx.py --quantize           # Export + bản INT8
+    python model/export_onnx.py --check              # Chỉ chạy kiểm tra parity + latency
+    python model/export_onnx.py --models cross_encoder --quantize --check
+
+Sau khi export, bật ONNX cho Backend / Consumer / Rebuilder:
+    INFERENCE_BACKEND=onnx ONNX_QUANTIZED=1 uvicorn backend.main:app
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from model.onnx_inference import (
+    ONNX_CONFIG_FILE, ONNX_FILE, ONNX_INT8_FILE, onnx_dir_for,
+    OnnxSentenceEncoder, OnnxCrossEncoder, OnnxSequenceClassifier, TorchSequenceClassifier,
+)
+
+MODELS = {
+    "bi_encoder": "bkai-foundation-models/vietnamese-bi-encoder",
+    "cross_encoder": "my_model_v7",
+    "claim_extractor": "model/phobert_claim_extractor",
+}
+OPSET = 17
+REPORT_PATH = Path("model/onnx/parity_report.json")
+
+# Câu mẫu mặc định khi không truyền --samples
+DEFAULT_SAMPLES = [
+    "Bộ Y tế yêu cầu các địa phương đẩy mạnh tiêm chủng vắc xin COVID-19 mũi nhắc lại.",
+    "Thổ Nhĩ Kỳ ngày 27/4 điều 5 phi cơ vận tải quân sự để sơ tán công dân.",
+    "Ngày 10/12/2025, Chính phủ công bố kế hoạch phát triển kinh tế số giai đoạn 2025-2030.",
+    "Giá xăng RON 95 giảm 320 đồng mỗi lít từ 15h chiều nay theo quyết định của liên Bộ.",
+    "V-League 2024-2025 dự kiến khai mạc vào tháng 9 với 14 câu lạc bộ tham dự.",
+    "Người dân Hà Nội có thể tra cứu phạt nguội trên cổng thông tin của Cục Cảnh sát giao thông.",
+    "Theo Tổng cục Thống kê, GDP quý III tăng 7,4% so với cùng kỳ năm trước.",
+    "Trận mưa lớn kéo dài khiến nhiều tuyến phố ở TP HCM ngập sâu nửa mét.",
+]
+
+class _HiddenStateWrapper(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+class _LogitsWrapper(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def _export(module, tokenizer, sample_inputs, onnx_dir, config, output_name, quantize):
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    encoded = tokenizer(*sample_inputs, padding=True, truncation=True, return_tensors="pt")
+    module.eval()
+    torch.onnx.export(
+        module,
+        (encoded["input_ids"], encoded["attention_mask"]),
+        str(onnx_dir / ONNX_FILE),
+        input_names=["input_ids", "attention_mask"],
+        output_names=[output_name],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            output_name: {0: "batch"},
+        },
+        opset_version=OPSET,
+    )
+    tokenizer.save_pretrained(str(onnx_dir))
+    with open(onnx_dir / ONNX_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"   ├─ Đã export: {onnx_dir / ONNX_FILE}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(onnx_dir / ONNX_FILE), str(onnx_dir / ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+        print(f"   ├─ Đã lượng tử hoá INT8: {onnx_dir / ONNX_INT8_FILE}")
+
+def export_bi_encoder(name, quantize):
+    from sentence_transformers import SentenceTransformer
+    st = SentenceTransformer(name, device="cpu")
+    transformer, pooling = st[0], st[1]
+    config = {
+        "pooling": "cls" if pooling.get_pooling_mode_str() == "cls" else "mean",
+        "normalize": any(type(m).__name__ == "Normalize" for m in st),
+        "max_length": st.max_seq_length,
+        "dimension": st.get_sentence_embedding_dimension(),
+    }
+    _export(_HiddenStateWrapper(transformer.auto_model), st.tokenizer, (DEFAULT_SAMPLES[:2],),
+            onnx_dir_for(name), config, "last_hidden_state", quantize)
+
+def export_cross_encoder(name, quantize):
+    from sentence_transformers import CrossEncoder
+    ce = CrossEncoder(name, device="cpu")
+    config = {"max_length": ce.max_length, "num_labels": ce.config.num_labels}
+    _export(_LogitsWrapper(ce.model), ce.tokenizer, (DEFAULT_SAMPLES[:2], DEFAULT_SAMPLES[2:4]),
+            onnx_dir_for(name), config, "logits", quantize)
+
+def export_claim_extractor(name, quantize):
+    clf = TorchSequenceClassifier(name, device="cpu")
+    config = {"max_length": 128, "num_labels": clf.model.config.num_labels}
+    _export(_LogitsWrapper(clf.model), clf.tokenizer, (DEFAULT_SAMPLES[:2],),
+            onnx_dir_for(name), config, "logits", quantize)
+
+EXPORTERS = {
+    "bi_encoder": export_bi_encoder,
+    "cross_encoder": export_cross_encoder,
+    "claim_extractor": export_claim_extractor,
+}
+
+# ================= PARITY + LATENCY =================
+def _timeit(fn, repeat):
+    fn() # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def _compare(reference, candidate, kind):
+    reference, candidate = np.asarray(reference), np.asarray(candidate)
+    result = {"max_abs_diff": float(np.max(np.abs(reference - candidate)))}
+    if kind == "embedding":
+        cos = np.sum(reference * candidate, axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+        )
+        result["min_cosine"] = float(cos.min())
+    else:
+        result["label_agreement"] = float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1)))
+    return result
+
+def check_model(key, name, samples, repeat):
+    onnx_dir = onnx_dir_for(name)
+    if not (onnx_dir / ONNX_FILE).exists():
+        print(f"⚠️ Bỏ qua {key}: chưa export ({onnx_dir})")
+        return None
+
+    if key == "bi_encoder":
+        from sentence_transformers import SentenceTransformer
+        torch_model = SentenceTransformer(name, device="cpu")
+        kind = "embedding"
+        run_torch = lambda: torch_model.encode(samples, batch_size=32, show_progress_bar=False)
+        make_onnx = lambda q: OnnxSentenceEncoder(onnx_dir, quantized=q)
+        run_onnx = lambda m: m.encode(samples, batch_size=32)
+    elif key == "cross_encoder":
+        from sentence_transformers import CrossEncoder
+        torch_model = CrossEncoder(name, device="cpu")
+        pairs = [[a, b] for a, b in zip(samples, samples[1:] + samples[:1])]
+        kind = "logits"
+        run_torch = lambda: torch_model.predict(pairs, batch_size=32, show_progress_bar=False)
+        make_onnx = lambda q: OnnxCrossEncoder(onnx_dir, quantized=q)
+        run_onnx = lambda m: m.predict(pairs, batch_size=32)
+    else:
+        torch_model = TorchSequenceClassifier(name, device="cpu")
+        kind = "logits"
+        run_torch = lambda: torch_model.predict_logits(samples)
+        make_onnx = lambda q: OnnxSequenceClassifier(onnx_dir, quantized=q)
+        run_onnx = lambda m: m.predict_logits(samples)
+
+    reference = run_torch()
+    report = {"model": name, "samples": len(samples), "torch_ms": _timeit(run_torch, repeat)}
+    variants = [("onnx", False)]
+    if (onnx_dir / ONNX_INT8_FILE).exists():
+        variants.append(("onnx_int8", True))
+
+    for label, quantized in variants:
+        model = make_onnx(quantized)
+        report[label] = _compare(reference, run_onnx(model), kind)
+        report[label]["ms"] = _timeit(lambda: run_onnx(model), repeat)
+        report[label]["speedup"] = report["torch_ms"] / report[label]["ms"]
+    return report
+
+def print_report(reports):
+    print("\n📊 ONNX PARITY & LATENCY")
+    print(f"{'model':<16} {'variant':<10} {'ms/batch':>9} {'speedup':>8} {'max|diff|':>10} {'agree/cos':>10}")
+    for key, rep in reports.items():
+        print(f"{key:<16} {'torch':<10} {rep['torch_ms']:>9.1f} {'1.00x':>8}")
+        for variant in ("onnx", "onnx_int8"):
+            if variant not in rep:
+                continue
+            r = rep[variant]
+            quality = r.get("min_cosine", r.get("label_agreement"))
+            print(f"{'':<16} {variant:<10} {r['ms']:>9.1f} {r['speedup']:>7.2f}x "
+                  f"{r['max_abs_diff']:>10.2e} {quality:>10.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model sang ONNX + kiểm tra parity")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--quantize", action="store_true", help="Tạo thêm bản dynamic INT8")
+    parser.add_argument("--check", action="store_true", help="Chỉ kiểm tra parity + latency (không export)")
+    parser.add_argument("--samples", help="File câu mẫu (mỗi dòng 1 câu) dùng để kiểm tra")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần lặp khi đo latency")
+    args = parser.parse_args()
+
+    if not args.check:
+        for key in args.models:
+            print(f"🚀 Export {key}: {MODELS[key]}")
+            EXPORTERS[key](MODELS[key], args.quantize)
+
+    samples = DEFAULT_SAMPLES
+    if args.samples:
+        with open(args.samples, encoding="utf-8") as f:
+            samples = [line.strip() for line in f if line.strip()]
+
+    reports = {}
+    for key in args.models:
+        rep = check_model(key, MODELS[key], samples, args.repeat)
+        if rep:
+            reports[key] = rep
+    print_report(reports)
+
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(reports, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Đã lưu báo cáo: {REPORT_PATH}")
+
+if __name__ == "__main__":
+    main()
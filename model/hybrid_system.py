@@ -91,7 +91,8 @@ class FakeNewsDetector:
         print(f"   [Debug] Distance: {distance:.2f}") 
         
         # === BƯỚC 2: PHÂN TÍCH VĂN PHONG (CLASSIFIER) ===
-        inputs = self.tokenizer(clean_text, return_tensors="pt", truncation=True, max_length=128, padding='max_length')
+        # Padding động: không pad 1 câu ngắn lên đủ 128 token
+        inputs = self.tokenizer(clean_text, return_tensors="pt", truncation=True, max_length=128, padding=True)
         inputs = {k: v.to(device) for k, v in inputs.items()}
         
         with torch.no_grad():
@@ -0,0 +1,188 @@
+"""
+Inference backend dùng chung cho Backend (AdvancedFactChecker), Consumer (AIProcessor)
+và KnowledgeBaseRebuilder.
+
+Chọn backend bằng biến môi trường:
+    INFERENCE_BACKEND=torch   # Mặc định: PyTorch eager (SentenceTransformer / CrossEncoder / HF)
+    INFERENCE_BACKEND=onnx    # ONNX Runtime (model đã export bằng model/export_onnx.py)
+    ONNX_QUANTIZED=1          # Dùng bản dynamic INT8 (model.int8.onnx) nếu có
+    ONNX_MODEL_DIR=model/onnx # Thư mục chứa bản ONNX của các model tải từ HuggingFace Hub
+
+Các wrapper ONNX giữ nguyên API mà code hiện tại đang dùng:
+    - encoder.encode(texts, batch_size=..., show_progress_bar=..., convert_to_numpy=...)
+    - cross_encoder.predict(pairs, batch_size=..., show_progress_bar=...)  -> logits
+    - classifier.predict_logits(texts, max_length=...)                     -> logits
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from model.length_batching import predict_in_length_buckets
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "model/onnx"))
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "0") == "1"
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0")) # 0 = để ONNX Runtime tự chọn
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+
+def onnx_dir_for(model_name_or_path):
+    """
+    Thư mục chứa bản ONNX của 1 model:
+        - Model local (thư mục tồn tại): <model_path>/onnx
+        - Model trên HF Hub: ONNX_MODEL_DIR/<tên model>
+    """
+    path = Path(model_name_or_path)
+    if path.is_dir():
+        return path / "onnx"
+    return ONNX_MODEL_DIR / str(model_name_or_path).rstrip("/").split("/")[-1]
+
+def _onnx_file(onnx_dir, quantized):
+    onnx_dir = Path(onnx_dir)
+    if quantized and (onnx_dir / ONNX_INT8_FILE).exists():
+        return onnx_dir / ONNX_INT8_FILE
+    return onnx_dir / ONNX_FILE
+
+def _use_onnx(model_name_or_path):
+    if INFERENCE_BACKEND != "onnx":
+        return False
+    onnx_dir = onnx_dir_for(model_name_or_path)
+    if not (onnx_dir / ONNX_FILE).exists():
+        print(f"⚠️ [ONNX] Chưa export '{model_name_or_path}' ({onnx_dir}), dùng PyTorch.")
+        return False
+    return True
+
+# ================= ONNX WRAPPERS =================
+class _OnnxModel:
+    def __init__(self, onnx_dir, quantized=ONNX_QUANTIZED):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.onnx_dir = Path(onnx_dir)
+        self.model_file = _onnx_file(self.onnx_dir, quantized)
+        with open(self.onnx_dir / ONNX_CONFIG_FILE, encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_NUM_THREADS > 0:
+            options.intra_op_num_threads = ONNX_NUM_THREADS
+        self.session = ort.InferenceSession(
+            str(self.model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.onnx_dir))
+        self.max_length = self.config.get("max_length")
+
+    def _run(self, encoded):
+        feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+        return self.session.run(None, feed)[0], encoded["attention_mask"]
+
+class OnnxSentenceEncoder(_OnnxModel):
+    """Thay thế SentenceTransformer.encode (pooling + normalize theo config lúc export)"""
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        if not len(sentences):
+            return np.zeros((0, self.config.get("dimension", 768)), dtype=np.float32)
+        # Giống SentenceTransformer.encode: sắp theo độ dài để pad động theo từng bucket
+        embeddings = predict_in_length_buckets(self._encode_batch, sentences, batch_size)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, batch):
+        encoded = self.tokenizer(
+            list(batch), padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        hidden, mask = self._run(encoded)
+        return self._pool(hidden, mask)
+
+    def _pool(self, hidden, mask):
+        if self.config.get("pooling", "mean") == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config.get("normalize", False):
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+class OnnxCrossEncoder(_OnnxModel):
+    """Thay thế CrossEncoder.predict (trả về logits như CrossEncoder num_labels > 1)"""
+
+    def predict(self, sentences, batch_size=32, show_progress_bar=False, **kwargs):
+        single = len(sentences) > 0 and isinstance(sentences[0], str)
+        if single:
+            sentences = [sentences]
+
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encoded = self.tokenizer(
+                [p[0] for p in batch], [p[1] for p in batch], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np"
+            )
+            logits, _ = self._run(encoded)
+            outputs.append(logits)
+
+        logits = np.concatenate(outputs) if outputs else np.zeros((0, self.config.get("num_labels", 3)))
+        return logits[0] if single else logits
+
+class OnnxSequenceClassifier(_OnnxModel):
+    """Claim extractor (PhoBERT) chạy bằng ONNX Runtime"""
+
+    def predict_logits(self, texts, max_length=128):
+        encoded = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=max_length, return_tensors="np"
+        )
+        logits, _ = self._run(encoded)
+        return logits
+
+# ================= TORCH WRAPPER =================
+class TorchSequenceClassifier:
+    """Claim extractor (PhoBERT) chạy bằng PyTorch, cùng API với OnnxSequenceClassifier"""
+
+    def __init__(self, model_path, device="cpu"):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path).to(device)
+        self.model.eval()
+
+    def predict_logits(self, texts, max_length=128):
+        inputs = self.tokenizer(
+            list(texts), return_tensors="pt", padding=True, truncation=True, max_length=max_length
+        ).to(self.device)
+        with self._torch.no_grad():
+            return self.model(**inputs).logits.cpu().numpy()
+
+# ================= FACTORY =================
+def load_sentence_encoder(model_name_or_path, device="cpu"):
+    if _use_onnx(model_name_or_path):
+        print(f"   ⚡ [ONNX] Bi-Encoder: {onnx_dir_for(model_name_or_path)}")
+        return OnnxSentenceEncoder(onnx_dir_for(model_name_or_path))
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name_or_path, device=device)
+
+def load_cross_encoder(model_name_or_path, device="cpu"):
+    if _use_onnx(model_name_or_path):
+        print(f"   ⚡ [ONNX] Cross-Encoder: {onnx_dir_for(model_name_or_path)}")
+        return OnnxCrossEncoder(onnx_dir_for(model_name_or_path))
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name_or_path, device=device)
+
+def load_sequence_classifier(model_name_or_path, device="cpu"):
+    if _use_onnx(model_name_or_path):
+        print(f"   ⚡ [ONNX] Claim Extractor: {onnx_dir_for(model_name_or_path)}")
+        return OnnxSequenceClassifier(onnx_dir_for(model_name_or_path))
+    return TorchSequenceClassifier(model_name_or_path, device=device)
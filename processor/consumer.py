@@ -5,14 +5,22 @@ import time
 import torch
 import psycopg2
 import numpy as np
+from pathlib import Path
 from kafka import KafkaConsumer
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from underthesea import sent_tokenize
 from dotenv import load_dotenv
 
+# Add project root to path (chạy bằng: python processor/consumer.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from model.onnx_inference import load_sentence_encoder, load_sequence_classifier
+from model.length_batching import predict_in_length_buckets
+from processor.sentence_splitter import get_sentence_splitter
+from backend.verdict_store import save_verdict
+
 load_dotenv()
 
+# Bộ tách câu: SENTENCE_SPLITTER=underthesea (mặc định) | fast
+sent_tokenize = get_sentence_splitter()
+
 # --- CẤU HÌNH ---
 KAFKA_TOPIC = "raw_articles"
 KAFKA_SERVER = os.getenv("KAFKA_SERVER", "localhost:9092")
@@ -30,6 +38,10 @@ DB_CONFIG = {
 
 MODEL_EXTRACTOR_PATH = "model/phobert_claim_extractor"
 
+# Verify sẵn từng bài ngay sau khi lưu claims (article_verdicts). Tắt mặc định: cần thêm
+# CrossEncoder trong process consumer; DAG vẫn tính bù bằng processor/precompute_verdicts.py
+CONSUMER_PRECOMPUTE_VERDICTS = os.getenv("CONSUMER_PRECOMPUTE_VERDICTS", "0") == "1"
+
 class AIProcessor:
     def __init__(self):
         print(f"🚀 [Consumer] KHỞI ĐỘNG AI PROCESSOR TRÊN {DEVICE.upper()}...")
@@ -37,17 +49,24 @@ class AIProcessor:
         # 1. Load Model Lọc Câu (Claim Extractor)
         print("   ├─ [1/3] Loading Claim Extractor (PhoBERT)...")
         try:
-            self.ext_tokenizer = AutoTokenizer.from_pretrained(MODEL_EXTRACTOR_PATH)
-            self.ext_model = AutoModelForSequenceClassification.from_pretrained(MODEL_EXTRACTOR_PATH).to(DEVICE)
-            self.ext_model.eval()
+            # PyTorch hoặc ONNX Runtime tuỳ INFERENCE_BACKEND
+            self.ext_classifier = load_sequence_classifier(MODEL_EXTRACTOR_PATH, device=DEVICE)
         except Exception as e:
             # RAISE ERROR để Docker biết mà restart, không exit() âm thầm
             raise RuntimeError(f"❌ Lỗi load model extractor: {e}. Hãy kiểm tra path '{MODEL_EXTRACTOR_PATH}'")
 
         # 2. Load Model Embedding (Bi-Encoder)
         print("   ├─ [2/3] Loading Embedding Model (Bi-Encoder)...")
+        self.checker = None
         try:
-            self.embedder = SentenceTransformer('bkai-foundation-models/vietnamese-bi-encoder', device=DEVICE)
+            if CONSUMER_PRECOMPUTE_VERDICTS:
+                # Verify sẵn từng bài sau khi lưu claims -> Backend trả verdict ngay cho URL đã crawl.
+                # Verifier bản gọn (không thread nền), dùng chung Bi-Encoder (cùng model embedding)
+                from backend.verifier import AdvancedFactChecker
+                self.checker = AdvancedFactChecker(serving=False)
+                self.embedder = self.checker.retriever
+            else:
+                self.embedder = load_sentence_encoder('bkai-foundation-models/vietnamese-bi-encoder', device=DEVICE)
         except Exception as e:
             raise RuntimeError(f"❌ Lỗi load model embedding: {e}")
 
@@ -75,16 +94,12 @@ class AIProcessor:
         
         if not candidates: return []
 
-        # Bước 2: Chạy qua Model Extractor (AI Classifier)
-        # Tokenize batch
-        inputs = self.ext_tokenizer(
-            candidates, return_tensors="pt", padding=True, truncation=True, max_length=128
-        ).to(DEVICE)
-        
-        with torch.no_grad():
-            outputs = self.ext_model(**inputs)
-            probs = torch.nn.functional.softmax(outputs.logits, dim=1)
-            preds = torch.argmax(probs, dim=1).cpu().numpy()
+        # Bước 2: Chạy qua Model Extractor (AI Classifier) theo batch (câu cùng độ dài pad chung)
+        logits = predict_in_length_buckets(
+            lambda batch: self.ext_classifier.predict_logits(batch, max_length=128),
+            candidates, BATCH_SIZE
+        )
+        preds = np.argmax(logits, axis=1)
         
         # Chỉ lấy câu có nhãn 1 (CLAIM)
         return [candidates[i] for i, pred in enumerate(preds) if pred == 1]
@@ -157,6 +172,20 @@ class AIProcessor:
             if count > 0:
                 print(f"   ✅ [Processed] {title[:40]}... -> {count} Claims lưu DB.")
 
+            # 5. Verdict tính sẵn cho bài (claims vừa lưu đã thấy được do autocommit)
+            if self.checker is not None:
+                self.store_verdict(cur, article_id, url, content)
+
+    def store_verdict(self, cur, article_id, url, content):
+        try:
+            # Không đi qua lookup article_verdicts: URL crawl lại có thể đã đổi nội dung.
+            # Loại claim của chính bài này (vừa lưu với nhãn REAL) khỏi evidence
+            result = dict(self.checker.iter_verify_many([content], tier="batch", article_ids=[article_id]))[0]
+            save_verdict(cur, article_id, url, self.checker.clean_text(content),
+                         self.checker.model_version, result)
+        except Exception as e:
+            print(f"      ⚠️ Không lưu được verdict tính sẵn: {e}")
+
     def start_consuming(self):
         print(f"\n📡 [Consumer] ĐANG LẮNG NGHE TOPIC '{KAFKA_TOPIC}'...")
         
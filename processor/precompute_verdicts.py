@@ -0,0 +1,96 @@
+"""
+Tính (lại) verdict cho các bài đã crawl và lưu vào article_verdicts.
+
+Consumer tự ghi verdict cho bài mới; script này bù cho:
+    - model mới được active (DAG retrain chạy sau khi reload model): verdict cũ mang
+      model_version cũ nên Backend không dùng nữa -> tính lại cho model hiện tại
+    - sau rebuild_knowledge_base.py (bảng article_verdicts bị xoá cùng claims)
+
+Usage:
+    python processor/precompute_verdicts.py                 # bài chưa có verdict cho model active
+    python processor/precompute_verdicts.py --prune         # + xoá verdict của các model khác
+    python processor/precompute_verdicts.py --all --limit 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+from tqdm import tqdm
+
+# Add project root to path (chạy bằng: python processor/precompute_verdicts.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.verifier import AdvancedFactChecker, BULK_GROUP_SIZE, DB_CONFIG
+from backend.verdict_store import save_verdict
+
+# Số bài đọc từ DB mỗi lượt (mỗi lượt chia tiếp thành nhóm group_size cho iter_verify_many)
+FETCH_SIZE = 256
+
+def select_articles(cur, model_version, recompute_all=False, limit=None):
+    sql = "SELECT a.id, a.url, a.content FROM articles a WHERE a.content IS NOT NULL"
+    params = []
+    if not recompute_all:
+        sql += """
+            AND NOT EXISTS (
+                SELECT 1 FROM article_verdicts v
+                WHERE v.article_id = a.id AND v.model_version = %s
+            )
+        """
+        params.append(model_version)
+    sql += " ORDER BY a.scraped_at DESC NULLS LAST"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    cur.execute(sql, params)
+    return cur.fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description="Tính verdict tính sẵn cho các bài đã crawl")
+    parser.add_argument("--all", action="store_true", help="Tính lại cả bài đã có verdict cho model hiện tại")
+    parser.add_argument("--prune", action="store_true", help="Xoá verdict của các model_version khác")
+    parser.add_argument("--limit", type=int, default=None, help="Chỉ xử lý N bài mới nhất")
+    parser.add_argument("--group-size", type=int, default=BULK_GROUP_SIZE)
+    args = parser.parse_args()
+
+    checker = AdvancedFactChecker(serving=False)
+    model_version = checker.model_version
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    if args.prune:
+        cur.execute("DELETE FROM article_verdicts WHERE model_version <> %s", (model_version,))
+        print(f"🗑️ Đã xoá {cur.rowcount} verdict của model cũ")
+
+    articles = select_articles(cur, model_version, args.all, args.limit)
+    print(f"📦 {len(articles)} bài cần tính verdict (model {model_version})")
+
+    start = time.perf_counter()
+    saved = 0
+    with tqdm(total=len(articles), desc="Verifying") as progress:
+        for offset in range(0, len(articles), FETCH_SIZE):
+            chunk = articles[offset:offset + FETCH_SIZE]
+            texts = [content for _, _, content in chunk]
+            # Claim của chính bài nằm trong knowledge base với nhãn REAL -> phải loại khỏi evidence
+            article_ids = [article_id for article_id, _, _ in chunk]
+            for i, result in checker.iter_verify_many(
+                texts, group_size=args.group_size, tier="batch", article_ids=article_ids
+            ):
+                article_id, url, content = chunk[i]
+                try:
+                    save_verdict(cur, article_id, url, checker.clean_text(content), model_version, result)
+                    saved += 1
+                except psycopg2.Error as e:
+                    print(f"   ❌ Lỗi lưu verdict bài {article_id}: {e}")
+                progress.update(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Đã lưu {saved} verdict trong {elapsed:.1f}s")
+    cur.close()
+    conn.close()
+    checker.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,22 @@ import psycopg2
 import torch
 import os
 import sys
+import numpy as np
+from pathlib import Path
 from tqdm import tqdm
-from underthesea import sent_tokenize
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+# Add project root to path (chạy bằng: python processor/rebuild_knowledge_base.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from model.onnx_inference import load_sentence_encoder, load_sequence_classifier
+from model.length_batching import predict_in_length_buckets
+from processor.sentence_splitter import get_sentence_splitter
+
 load_dotenv()
 
+# Bộ tách câu: SENTENCE_SPLITTER=underthesea (mặc định) | fast
+sent_tokenize = get_sentence_splitter()
+
 # --- CẤU HÌNH ---
 DB_CONFIG = {
     "dbname": os.getenv("POSTGRES_DB", "vnexpress_scraper"),
@@ -33,10 +41,8 @@ class KnowledgeBaseRebuilder:
         # 1. Load Model Lọc Claim (Người gác cổng)
         print("   ├─ [1/2] Loading Claim Detector...")
         try:
-            self.claim_tokenizer = AutoTokenizer.from_pretrained(MODEL_CLAIM_PATH)
-            self.claim_model = AutoModelForSequenceClassification.from_pretrained(MODEL_CLAIM_PATH)
-            self.claim_model.to(DEVICE)
-            self.claim_model.eval()
+            # PyTorch hoặc ONNX Runtime tuỳ INFERENCE_BACKEND
+            self.claim_classifier = load_sequence_classifier(MODEL_CLAIM_PATH, device=DEVICE)
         except Exception as e:
             print(f"❌ Lỗi load model Claim: {e}")
             print(f"👉 Hãy chắc chắn bạn đã để model tại: {MODEL_CLAIM_PATH}")
@@ -44,7 +50,7 @@ class KnowledgeBaseRebuilder:
 
         # 2. Load Model Vector (Người mã hóa)
         print("   ├─ [2/2] Loading Embedding Model...")
-        self.embed_model = SentenceTransformer(MODEL_EMBED_PATH, device=DEVICE)
+        self.embed_model = load_sentence_encoder(MODEL_EMBED_PATH, device=DEVICE)
         
         # 3. Kết nối DB
         self.conn = psycopg2.connect(**DB_CONFIG)
@@ -59,16 +65,13 @@ class KnowledgeBaseRebuilder:
             return cur.fetchall()
 
     def predict_batch(self, texts):
-        """Dự đoán nhanh một lô câu hỏi (Batch Inference)"""
-        inputs = self.claim_tokenizer(
-            texts, padding=True, truncation=True, max_length=128, return_tensors="pt"
-        ).to(DEVICE)
-        
-        with torch.no_grad():
-            outputs = self.claim_model(**inputs)
-            # Lấy nhãn có xác suất cao nhất (0 hoặc 1)
-            preds = torch.argmax(outputs.logits, dim=1)
-        return preds.cpu().numpy()
+        """Dự đoán nhanh một lô câu (Batch Inference, chia bucket theo độ dài câu)"""
+        logits = predict_in_length_buckets(
+            lambda batch: self.claim_classifier.predict_logits(batch, max_length=128),
+            texts, BATCH_SIZE
+        )
+        # Lấy nhãn có xác suất cao nhất (0 hoặc 1)
+        return np.argmax(logits, axis=1)
 
     def run(self):
         # 1. DỌN DẸP DỮ LIỆU CŨ
@@ -76,7 +79,13 @@ class KnowledgeBaseRebuilder:
         with self.conn.cursor() as cur:
             # Xóa user_reports trước vì nó tham chiếu đến claims
             cur.execute("TRUNCATE TABLE user_reports CASCADE;")
+            # Trigger change feed ghi sự kiện TRUNCATE -> backend đang chạy tự xoá ANN replica
+            # rồi nạp lại dần các claim mới chèn bên dưới, không cần restart
             cur.execute("TRUNCATE TABLE claims CASCADE;")
+            # Verdict tính sẵn trỏ tới claim_id / evidence cũ -> bỏ, precompute_verdicts.py tính lại
+            cur.execute("SELECT to_regclass('article_verdicts') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("TRUNCATE TABLE article_verdicts;")
         print("✅ Database đã sạch.")
 
         # 2. LẤY DỮ LIỆU NGUỒN
@@ -98,17 +107,14 @@ class KnowledgeBaseRebuilder:
             if not candidates: continue
 
             # B. AI Lọc (Batch Processing)
-            # Chia nhỏ candidates thành các batch nhỏ hơn nếu quá nhiều câu
-            for i in range(0, len(candidates), BATCH_SIZE):
-                batch_text = candidates[i : i + BATCH_SIZE]
-                
-                # Model phán xét: 1=Claim, 0=Non-Claim
-                labels = self.predict_batch(batch_text)
-                
-                # Chỉ lấy câu Label 1
-                for text, label in zip(batch_text, labels):
-                    if label == 1:
-                        pending_insert.append((art_id, text))
+            # predict_batch tự chia candidates thành các batch gồm câu cùng độ dài
+            # Model phán xét: 1=Claim, 0=Non-Claim
+            labels = self.predict_batch(candidates)
+
+            # Chỉ lấy câu Label 1
+            for text, label in zip(candidates, labels):
+                if label == 1:
+                    pending_insert.append((art_id, text))
 
             # C. Vector hóa & Lưu (Khi gom đủ lượng lớn hoặc hết bài)
             # Gom khoảng 64 câu rồi xử lý 1 lần cho tối ưu GPU
@@ -0,0 +1,95 @@
+"""
+Tách câu tiếng Việt tốc độ cao (rule-based) thay cho underthesea.sent_tokenize
+trên các đường xử lý nóng: Backend verify, Kafka Consumer, rebuild_knowledge_base.
+
+Quy tắc:
+    - Ranh giới câu = cụm dấu kết câu (. ! ? …) (+ dấu đóng ngoặc / nháy),
+      theo sau là khoảng trắng và 1 ký tự mở đầu câu (chữ hoa, chữ số, mở ngoặc / nháy).
+    - Không tách sau từ viết tắt trong ABBREVIATIONS (TP., PGS., TS., ThS., Q., v.v.),
+      từ viết tắt gồm các chữ cái đơn có dấu chấm (T.Ư., U.S.) và chữ cái viết tắt
+      tên riêng (Nguyễn V. An: chữ hoa đơn đứng sau 1 từ viết hoa).
+    - Từ có dấu chấm bên trong nhưng không phải chữ cái đơn (TP.HCM.) và chữ hoa đơn
+      sau từ thường (bảng B.) vẫn là cuối câu.
+    - Số / ngày tháng (1.000.000, 15.12.2025, 7.4%) không có khoảng trắng sau dấu chấm
+      nên không bao giờ bị tách.
+
+Chọn bộ tách câu bằng biến môi trường:
+    SENTENCE_SPLITTER=underthesea   # Mặc định (giữ hành vi cũ)
+    SENTENCE_SPLITTER=fast          # Bộ tách rule-based trong file này
+"""
+
+import os
+import re
+
+_UPPER = "A-ZÀÁẢÃẠĂẰẮẲẴẶÂẦẤẨẪẬĐÈÉẺẼẸÊỀẾỂỄỆÌÍỈĨỊÒÓỎÕỌÔỒỐỔỖỘƠỜỚỞỠỢÙÚỦŨỤƯỪỨỬỮỰỲÝỶỸỴ"
+_OPENERS = "\"“‘'«(\\["
+_CLOSERS = "\"”’'»)\\]"
+
+# Dấu kết câu (+ dấu đóng) -> khoảng trắng -> ký tự mở đầu câu mới
+_BOUNDARY_RE = re.compile(
+    rf"([.!?…]+[{_CLOSERS}]*)(\s+)(?=[{_OPENERS}]*[{_UPPER}0-9])"
+)
+# Từ viết tắt gồm các chữ cái đơn có dấu chấm: T.Ư, U.S, v.v (không khớp TP.HCM)
+_DOTTED_ABBR_RE = re.compile(r"^(?:[^\W\d_]\.)+[^\W\d_]$")
+_NEWLINES_RE = re.compile(r"\s*\n+\s*")
+
+ABBREVIATIONS = frozenset({
+    # Địa danh / hành chính
+    "TP", "Tp", "tp", "TX", "Tx", "TT", "Q", "P", "H", "X", "F", "Ph", "Th",
+    "UBND", "HĐND", "BCH", "QL", "ĐT",
+    # Học hàm, học vị, chức danh
+    "GS", "PGS", "TS", "ThS", "Ths", "TSKH", "BS", "BSCKI", "BSCKII", "CN", "KS", "LS", "NSƯT", "NSND",
+    "Mr", "Mrs", "Ms", "Dr", "Prof", "Jr", "Sr", "St",
+    # Doanh nghiệp / tài liệu
+    "Co", "Ltd", "Inc", "Corp", "NXB", "Nxb", "No", "Vol", "Fig", "Tr", "tr", "tel", "Tel", "Fax",
+    # Khác
+    "vs", "etc", "vv", "Ng",
+})
+
+def _is_abbreviation(token, previous=""):
+    """token: từ ngay trước dấu chấm, previous: từ đứng trước token (để nhận chữ cái viết tắt tên riêng)"""
+    if not token:
+        return False
+    token = token.lstrip(_OPENERS.replace("\\", ""))
+    if token in ABBREVIATIONS:
+        return True
+    # Chữ cái viết tắt tên riêng: "Nguyễn V. Anh" (không phải "bảng B. Trận đầu...")
+    if len(token) == 1 and token.isalpha() and token.isupper():
+        previous = previous.lstrip(_OPENERS.replace("\\", ""))
+        return previous[:1].isupper()
+    return bool(_DOTTED_ABBR_RE.match(token))
+
+def fast_sent_tokenize(text):
+    """Tách câu rule-based, trả về list câu (đã strip, bỏ câu rỗng)"""
+    if not text:
+        return []
+
+    sentences = []
+    for block in _NEWLINES_RE.split(text):
+        start = 0
+        for m in _BOUNDARY_RE.finditer(block):
+            punct = m.group(1)
+            if punct[0] == "." and len(punct.rstrip(_CLOSERS.replace("\\", ""))) == 1:
+                # Dấu chấm đơn: kiểm tra từ đứng trước có phải viết tắt không
+                words = block[start:m.start()].rsplit(None, 2)[-2:]
+                if words and _is_abbreviation(words[-1], words[0] if len(words) > 1 else ""):
+                    continue
+            sentence = block[start:m.end(1)].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = m.end()
+        tail = block[start:].strip()
+        if tail:
+            sentences.append(tail)
+    return sentences
+
+def get_sentence_splitter(name=None):
+    """Trả về hàm tách câu theo tên hoặc biến môi trường SENTENCE_SPLITTER (đọc lúc gọi, sau load_dotenv)"""
+    name = (name or os.getenv("SENTENCE_SPLITTER", "underthesea")).lower()
+    if name == "fast":
+        return fast_sent_tokenize
+    if name == "underthesea":
+        # Import chậm -> chỉ import khi thực sự dùng
+        from underthesea import sent_tokenize
+        return sent_tokenize
+    raise ValueError(f"SENTENCE_SPLITTER không hợp lệ: '{name}' (underthesea | fast)")
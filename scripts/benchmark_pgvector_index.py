@@ -0,0 +1,145 @@
+"""
+Đo recall / latency của retrieval pgvector (claim REAL) theo từng cấu hình index:
+    - global          : HNSW toàn bảng claims_embedding_idx + lọc system_label sau khi quét
+    - global+iterative: như trên, bật hnsw.iterative_scan (pgvector >= 0.8)
+    - partial         : HNSW chỉ gồm claim REAL (claims_real_embedding_idx)
+với mỗi giá trị hnsw.ef_search. Recall@k so với tìm kiếm chính xác (tắt index scan).
+
+Query = vector của claim ngẫu nhiên cộng nhiễu Gauss (--noise). Cột "index" cho biết
+index planner thực sự dùng (EXPLAIN), để chắc cấu hình đang đo đúng là cấu hình mong muốn.
+
+Usage:
+    python scripts/benchmark_pgvector_index.py
+    python scripts/benchmark_pgvector_index.py --queries 300 --top-k 5 --ef-search 20 40 100 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.db import DatabasePool
+from backend.verifier import DB_CONFIG, to_pgvector
+
+# `system_label || '' = 'REAL'` không khớp điều kiện của partial index -> planner buộc dùng index toàn bảng
+PREDICATES = {
+    "global": "system_label || '' = 'REAL'",
+    "partial": "system_label = 'REAL'",
+}
+
+QUERY_SQL = """
+    SELECT id FROM claims
+    WHERE {predicate}
+    ORDER BY embedding <=> %(vec)s::vector
+    LIMIT %(k)s
+"""
+
+def sample_queries(conn, n, noise, seed=42):
+    with conn.cursor() as cur:
+        cur.execute("SELECT embedding::real[] FROM claims WHERE embedding IS NOT NULL ORDER BY random() LIMIT %s", (n,))
+        vectors = np.asarray([r[0] for r in cur.fetchall()], dtype=np.float32)
+    conn.rollback()
+    rng = np.random.default_rng(seed)
+    return vectors + rng.normal(0, noise, vectors.shape).astype(np.float32)
+
+def pgvector_version(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+    conn.rollback()
+    return tuple(int(p) for p in row[0].split(".")[:2]) if row else (0, 0)
+
+def label_counts(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT system_label, COUNT(*) FROM claims GROUP BY system_label ORDER BY 1")
+        rows = cur.fetchall()
+    conn.rollback()
+    return rows
+
+def used_index(plan):
+    """Tên index đầu tiên trong plan JSON của EXPLAIN, None = seq scan"""
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            return plan["Index Name"]
+        plan = list(plan.values())
+    if isinstance(plan, list):
+        for item in plan:
+            name = used_index(item)
+            if name:
+                return name
+    return None
+
+def run_config(conn, queries, top_k, sql, settings):
+    """
+    Chạy từng query (sql có tham số %(vec)s, %(k)s) trong 1 transaction riêng với settings
+    (set_config local). Trả về (kết quả, latency, index)
+    """
+    results, latencies, index_name = [], [], None
+    with conn.cursor() as cur:
+        for i, q in enumerate(queries):
+            vec = to_pgvector(q)
+            for name, value in settings.items():
+                cur.execute("SELECT set_config(%s, %s, true)", (name, str(value)))
+            if i == 0:
+                cur.execute("EXPLAIN (FORMAT JSON) " + sql, {"vec": vec, "k": top_k})
+                index_name = used_index(cur.fetchone()[0])
+            t0 = time.perf_counter()
+            cur.execute(sql, {"vec": vec, "k": top_k})
+            rows = cur.fetchall()
+            latencies.append(time.perf_counter() - t0)
+            results.append([r[0] for r in rows])
+            conn.rollback()
+    return results, np.asarray(latencies), index_name
+
+def recall(results, truth, top_k):
+    hits = sum(len(set(r[:top_k]) & set(t[:top_k])) for r, t in zip(results, truth))
+    total = sum(min(top_k, len(t)) for t in truth)
+    return hits / total if total else 1.0
+
+def ms(latencies, p):
+    return float(np.percentile(latencies, p) * 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / latency của các cấu hình index pgvector cho claim REAL")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.02, help="Độ lệch chuẩn nhiễu cộng vào query")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 100, 200])
+    parser.add_argument("--iterative-scan", default="relaxed_order", choices=["strict_order", "relaxed_order"])
+    args = parser.parse_args()
+
+    db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=1)
+    with db_pool.connection() as conn:
+        print("📦 Claims theo nhãn: " + ", ".join(f"{label}={n}" for label, n in label_counts(conn)))
+        version = pgvector_version(conn)
+        queries = sample_queries(conn, args.queries, args.noise)
+        print(f"🔎 {len(queries)} query, top-{args.top_k}, pgvector {'.'.join(map(str, version))}")
+
+        truth, exact_lat, _ = run_config(
+            conn, queries, args.top_k, QUERY_SQL.format(predicate=PREDICATES["partial"]), {"enable_indexscan": "off"}
+        )
+        print(f"\n{'config':<28} {'index':<28} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'exact (seq scan)':<28} {'-':<28} {1.0:>9.4f} {ms(exact_lat, 50):>8.2f} {ms(exact_lat, 95):>8.2f}")
+
+        configs = [("global", PREDICATES["global"], {}), ("partial", PREDICATES["partial"], {})]
+        if version >= (0, 8):
+            configs.insert(1, ("global+iterative", PREDICATES["global"], {"hnsw.iterative_scan": args.iterative_scan}))
+        else:
+            print("⚠️ pgvector < 0.8: bỏ qua cấu hình iterative scan")
+
+        for ef in args.ef_search:
+            for name, predicate, settings in configs:
+                results, latencies, index_name = run_config(
+                    conn, queries, args.top_k, QUERY_SQL.format(predicate=predicate), {**settings, "hnsw.ef_search": ef}
+                )
+                print(f"{f'{name} ef={ef}':<28} {index_name or 'seq scan':<28} "
+                      f"{recall(results, truth, args.top_k):>9.4f} {ms(latencies, 50):>8.2f} {ms(latencies, 95):>8.2f}")
+
+    db_pool.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+So sánh retrieval claim REAL trên index float32 / halfvec / binary (+ re-score chính xác):
+kích thước index, recall@k so với tìm kiếm chính xác và latency p50 / p95.
+
+Cần chạy scripts/migrate_quantized_embeddings.py trước. Mỗi cấu hình lượng tử hoá được
+đo với nhiều hệ số rerank (số ứng viên = top_k * rerank), giống PGVECTOR_RERANK_FACTOR
+của Verifier.
+
+Usage:
+    python scripts/benchmark_quantized_embeddings.py
+    python scripts/benchmark_quantized_embeddings.py --queries 300 --top-k 5 --rerank 1 4 10 20
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.db import DatabasePool
+from backend.verifier import DB_CONFIG, EMBEDDING_DIM, QUANTIZED_DISTANCE
+from scripts.benchmark_pgvector_index import (
+    PREDICATES, QUERY_SQL, sample_queries, run_config, recall, ms,
+)
+
+def quantized_query_sql(mode, num_candidates):
+    candidate_order = QUANTIZED_DISTANCE[mode].format(dim=EMBEDDING_DIM, query="%(vec)s")
+    return f"""
+        SELECT id FROM (
+            SELECT id, embedding FROM claims
+            WHERE system_label = 'REAL'
+            ORDER BY {candidate_order}
+            LIMIT {int(num_candidates)}
+        ) candidates
+        ORDER BY embedding <=> %(vec)s::vector
+        LIMIT %(k)s
+    """
+
+def index_sizes(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, pg_relation_size(c.oid)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = 'claims'::regclass
+        """)
+        sizes = dict(cur.fetchall())
+    conn.rollback()
+    return sizes
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / kích thước / latency: index float32 vs halfvec vs binary")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.02, help="Độ lệch chuẩn nhiễu cộng vào query")
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 4, 10, 20])
+    args = parser.parse_args()
+
+    db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=1)
+    with db_pool.connection() as conn:
+        sizes = index_sizes(conn)
+        queries = sample_queries(conn, args.queries, args.noise)
+        print(f"🔎 {len(queries)} query, top-{args.top_k}, ef_search {args.ef_search}")
+
+        exact_sql = QUERY_SQL.format(predicate=PREDICATES["partial"])
+        truth, _, _ = run_config(conn, queries, args.top_k, exact_sql, {"enable_indexscan": "off"})
+
+        print(f"\n{'config':<22} {'index':<32} {'index MB':>9} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+        def report(name, sql, ef_search):
+            results, latencies, index_name = run_config(
+                conn, queries, args.top_k, sql, {"hnsw.ef_search": ef_search}
+            )
+            size = sizes.get(index_name)
+            size_mb = f"{size / 2**20:.1f}" if size is not None else "-"
+            print(f"{name:<22} {index_name or 'seq scan':<32} {size_mb:>9} "
+                  f"{recall(results, truth, args.top_k):>9.4f} {ms(latencies, 50):>8.2f} {ms(latencies, 95):>8.2f}")
+
+        report("float32", exact_sql, args.ef_search)
+        for mode in QUANTIZED_DISTANCE:
+            for factor in args.rerank:
+                num_candidates = args.top_k * factor
+                # HNSW trả về tối đa ef_search kết quả
+                report(f"{mode} rerank x{factor}", quantized_query_sql(mode, num_candidates),
+                       max(args.ef_search, num_candidates))
+
+    db_pool.close()
+
+if __name__ == "__main__":
+    main()
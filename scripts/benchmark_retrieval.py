@@ -0,0 +1,293 @@
+"""
+Benchmark offline cho retrieval: pgvector HNSW vs các họ index FAISS
+(Flat, IVF, IVF-PQ, HNSW) trên cùng 1 bộ embedding.
+
+Đo cho mỗi cấu hình:
+    - build (s)  : thời gian build index (pgvector: CREATE INDEX, không tính lúc nạp dữ liệu)
+    - memory (MB): kích thước index (FAISS: serialize_index, pgvector: pg_relation_size)
+    - QPS        : truy vấn / giây (FAISS: 1 batch tất cả query; pgvector: tuần tự 1 connection)
+    - p50 ms     : latency từng query đơn lẻ
+    - recall@k   : so với tìm kiếm chính xác (cosine)
+
+Dữ liệu (chọn 1):
+    --dump claims.npy         : ma trận float32 (N, dim) đã export
+    --export-dump claims.npy  : export claims.embedding từ Postgres ra file rồi chạy luôn
+    --synthetic 100000        : dữ liệu giả lập (cụm Gauss, --dim chiều)
+Query = các vector ngẫu nhiên của bộ dữ liệu cộng nhiễu (--noise).
+
+Kết quả in dạng bảng; --csv thêm các dòng vào file (kèm --tag, mặc định git describe)
+để theo dõi qua các bản phát hành.
+
+Usage:
+    python scripts/benchmark_retrieval.py --synthetic 100000
+    python scripts/benchmark_retrieval.py --export-dump data/claims_embeddings.npy --pgvector
+    python scripts/benchmark_retrieval.py --dump data/claims_embeddings.npy --pgvector --csv benchmarks/retrieval.csv
+"""
+
+import argparse
+import csv
+import math
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BENCH_TABLE = "retrieval_benchmark_vectors"
+
+# ================= DỮ LIỆU =================
+def export_dump(path):
+    from backend.db import DatabasePool
+    from backend.verifier import DB_CONFIG
+
+    db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=1)
+    chunks = []
+    with db_pool.connection() as conn:
+        with conn.cursor(name="retrieval_benchmark_export") as cur:
+            cur.itersize = 10000
+            cur.execute("SELECT embedding::real[] FROM claims WHERE embedding IS NOT NULL ORDER BY id")
+            while True:
+                rows = cur.fetchmany(10000)
+                if not rows:
+                    break
+                chunks.append(np.asarray([r[0] for r in rows], dtype=np.float32))
+    db_pool.close()
+    vectors = np.concatenate(chunks)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, vectors)
+    print(f"💾 Đã export {len(vectors)} vector -> {path}")
+    return vectors
+
+def synthetic_vectors(n, dim, clusters=256, seed=42):
+    """Cụm Gauss quanh các tâm ngẫu nhiên: gần với phân bố embedding thật hơn nhiễu đều"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, n)
+    return centers[assignment] + rng.normal(0, 0.6, (n, dim)).astype(np.float32)
+
+def make_queries(vectors, n, noise, seed=7):
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)].copy()
+    queries += rng.normal(0, noise, queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+# ================= ĐO =================
+def recall_at_k(found, truth, k):
+    hits = sum(len(set(f[:k]) & set(t[:k])) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+def time_queries(search_one, queries):
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        search_one(q)
+        latencies.append(time.perf_counter() - t0)
+    return float(np.percentile(latencies, 50) * 1000)
+
+def faiss_configs(n, dim, args):
+    """(tên, factory tạo index chưa train, hàm đặt tham số search)"""
+    nlist = args.nlist or max(1, int(4 * math.sqrt(n)))
+    pq_m = args.pq_m if dim % args.pq_m == 0 else 8
+    configs = [("faiss Flat", lambda: faiss.IndexFlatIP(dim), None)]
+    for nprobe in args.nprobe:
+        configs.append((
+            f"faiss IVF{nlist} nprobe={nprobe}",
+            lambda: faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT),
+            lambda index, p=nprobe: setattr(index, "nprobe", p),
+        ))
+    for nprobe in args.nprobe:
+        configs.append((
+            f"faiss IVF{nlist},PQ{pq_m} nprobe={nprobe}",
+            lambda: faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT),
+            lambda index, p=nprobe: setattr(index, "nprobe", p),
+        ))
+    for ef in args.ef_search:
+        configs.append((
+            f"faiss HNSW{args.hnsw_m} ef={ef}",
+            lambda: faiss.IndexHNSWFlat(dim, args.hnsw_m, faiss.METRIC_INNER_PRODUCT),
+            lambda index, e=ef: setattr(index.hnsw, "efSearch", e),
+        ))
+    return configs
+
+def bench_faiss(vectors, queries, truth, k, args):
+    rows = []
+    built = {} # Cùng 1 index, chỉ khác tham số search -> build 1 lần
+    for name, factory, configure in faiss_configs(len(vectors), vectors.shape[1], args):
+        family = name.split(" nprobe=")[0].split(" ef=")[0]
+        if family not in built:
+            index = factory()
+            t0 = time.perf_counter()
+            if not index.is_trained:
+                train = vectors[np.random.default_rng(0).choice(len(vectors), min(len(vectors), 100000), replace=False)]
+                index.train(train)
+            index.add(vectors)
+            built[family] = (index, time.perf_counter() - t0, len(faiss.serialize_index(index)))
+        index, build_seconds, size = built[family]
+        if configure:
+            configure(index)
+
+        t0 = time.perf_counter()
+        _, found = index.search(queries, k)
+        qps = len(queries) / (time.perf_counter() - t0)
+        p50 = time_queries(lambda q: index.search(q[None, :], k), queries[:args.latency_queries])
+        rows.append({
+            "engine": name, "build_s": build_seconds, "memory_mb": size / 2**20,
+            "qps": qps, "p50_ms": p50, "recall": recall_at_k(found.tolist(), truth, k),
+        })
+    return rows
+
+def bench_pgvector(vectors, queries, truth, k, args):
+    """Nạp vector vào bảng tạm (UNLOGGED), build HNSW giống claims_embedding_idx rồi đo"""
+    from psycopg2.extras import execute_values
+    from backend.db import DatabasePool
+    from backend.verifier import DB_CONFIG, to_pgvector
+
+    dim = vectors.shape[1]
+    db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=1)
+    rows = []
+    try:
+        with db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            cur.execute(f"CREATE UNLOGGED TABLE {BENCH_TABLE} (id INTEGER PRIMARY KEY, embedding vector({dim}))")
+            for start in range(0, len(vectors), 10000):
+                batch = vectors[start:start + 10000]
+                execute_values(
+                    cur, f"INSERT INTO {BENCH_TABLE} (id, embedding) VALUES %s",
+                    [(start + i, to_pgvector(v)) for i, v in enumerate(batch)],
+                    template="(%s, %s::vector)", page_size=1000,
+                )
+        with db_pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT set_config('maintenance_work_mem', %s, true)", (args.maintenance_work_mem,))
+            t0 = time.perf_counter()
+            cur.execute(
+                f"CREATE INDEX {BENCH_TABLE}_idx ON {BENCH_TABLE} USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = %s, ef_construction = %s)", (args.pg_m, args.pg_ef_construction),
+            )
+            build_seconds = time.perf_counter() - t0
+            cur.execute(f"SELECT pg_relation_size('{BENCH_TABLE}_idx')")
+            size = cur.fetchone()[0]
+
+        sql = f"SELECT id FROM {BENCH_TABLE} ORDER BY embedding <=> %s::vector LIMIT %s"
+        for ef in args.ef_search:
+            with db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT set_config('hnsw.ef_search', %s, false)", (str(ef),))
+                found, latencies = [], []
+                t_all = time.perf_counter()
+                for q in queries:
+                    t0 = time.perf_counter()
+                    cur.execute(sql, (to_pgvector(q), k))
+                    found.append([r[0] for r in cur.fetchall()])
+                    latencies.append(time.perf_counter() - t0)
+                qps = len(queries) / (time.perf_counter() - t_all)
+                cur.execute("RESET hnsw.ef_search")
+            rows.append({
+                "engine": f"pgvector HNSW{args.pg_m} ef={ef}", "build_s": build_seconds, "memory_mb": size / 2**20,
+                "qps": qps, "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "recall": recall_at_k(found, truth, k),
+            })
+    finally:
+        if not args.keep_table:
+            with db_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        db_pool.close()
+    return rows
+
+# ================= BÁO CÁO =================
+def git_tag():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"], text=True,
+            cwd=Path(__file__).resolve().parent.parent, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_table(rows, k):
+    print(f"\n{'engine':<34} {'build s':>8} {'memory MB':>10} {'QPS':>10} {'p50 ms':>8} {f'recall@{k}':>10}")
+    for r in rows:
+        print(f"{r['engine']:<34} {r['build_s']:>8.2f} {r['memory_mb']:>10.1f} {r['qps']:>10.0f} "
+              f"{r['p50_ms']:>8.3f} {r['recall']:>10.4f}")
+
+def append_csv(path, rows, meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fields = list(meta) + ["engine", "build_s", "memory_mb", "qps", "p50_ms", "recall"]
+    new_file = not path.exists()
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        if new_file:
+            writer.writeheader()
+        for r in rows:
+            writer.writerow({**meta, **{key: (round(v, 6) if isinstance(v, float) else v) for key, v in r.items()}})
+    print(f"📝 Đã ghi {len(rows)} dòng vào {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval: pgvector HNSW vs FAISS Flat / IVF / IVF-PQ / HNSW")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dump", help="File .npy (N, dim) float32")
+    source.add_argument("--export-dump", help="Export claims.embedding ra file .npy này rồi benchmark")
+    source.add_argument("--synthetic", type=int, help="Số vector giả lập")
+    parser.add_argument("--dim", type=int, default=768, help="Số chiều của dữ liệu giả lập")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--latency-queries", type=int, default=200, help="Số query đo latency đơn lẻ")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--threads", type=int, default=1, help="Số thread OpenMP của FAISS (1 = so sánh công bằng với pgvector)")
+    parser.add_argument("--nlist", type=int, default=0, help="Số cụm IVF (0 = 4*sqrt(N))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--pq-m", type=int, default=64, help="Số sub-quantizer của IVF-PQ")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100])
+    parser.add_argument("--pgvector", action="store_true", help="Đo cả pgvector (cần Postgres)")
+    parser.add_argument("--pg-m", type=int, default=16, help="m của HNSW pgvector (mặc định của pgvector)")
+    parser.add_argument("--pg-ef-construction", type=int, default=64)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--keep-table", action="store_true", help=f"Giữ bảng {BENCH_TABLE} sau khi đo")
+    parser.add_argument("--csv", help="Thêm kết quả vào file CSV này")
+    parser.add_argument("--tag", default=None, help="Nhãn phiên bản ghi vào CSV (mặc định git describe)")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    if args.dump:
+        vectors, dataset = np.load(args.dump).astype(np.float32), Path(args.dump).name
+    elif args.export_dump:
+        vectors, dataset = export_dump(args.export_dump), Path(args.export_dump).name
+    else:
+        vectors, dataset = synthetic_vectors(args.synthetic, args.dim), f"synthetic-{args.synthetic}x{args.dim}"
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors) # Cosine = inner product trên vector đã chuẩn hoá
+    queries = make_queries(vectors, args.queries, args.noise)
+    k = args.top_k
+    print(f"📦 {dataset}: {len(vectors)} vector, dim {vectors.shape[1]}, {len(queries)} query, top-{k}")
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    truth = truth.tolist()
+
+    rows = bench_faiss(vectors, queries, truth, k, args)
+    if args.pgvector:
+        rows += bench_pgvector(vectors, queries, truth, k, args)
+    print_table(rows, k)
+
+    if args.csv:
+        meta = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "tag": args.tag or git_tag(),
+            "dataset": dataset,
+            "n": len(vectors),
+            "dim": vectors.shape[1],
+            "top_k": k,
+            "threads": args.threads,
+        }
+        append_csv(args.csv, rows, meta)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+So sánh bộ tách câu rule-based (processor/sentence_splitter.py) với underthesea:
+    - Parity: tỉ lệ bài tách giống hệt, precision / recall / F1 trên vị trí ranh giới câu
+    - Throughput: số bài / giây, MB / giây, tốc độ tăng
+
+Corpus:
+    python scripts/benchmark_sentence_splitter.py                       # Lấy bài báo từ bảng articles
+    python scripts/benchmark_sentence_splitter.py --corpus articles.txt # Mỗi dòng 1 bài
+    python scripts/benchmark_sentence_splitter.py --limit 2000 --repeat 3 --show-diff 5
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processor.sentence_splitter import get_sentence_splitter
+
+load_dotenv()
+
+DB_CONFIG = {
+    "dbname": os.getenv("POSTGRES_DB", "vnexpress_scraper"),
+    "user": os.getenv("POSTGRES_USER", "admin"),
+    "password": os.getenv("POSTGRES_PASSWORD", "admin"),
+    "host": os.getenv("POSTGRES_HOST", "localhost"),
+    "port": os.getenv("POSTGRES_PORT", "5432")
+}
+
+def load_corpus(path=None, limit=1000):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+
+    import psycopg2
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT content FROM articles WHERE content IS NOT NULL ORDER BY id DESC LIMIT %s", (limit,))
+            return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+def boundaries(text, sentences):
+    """Vị trí (offset ký tự) kết thúc từng câu trong văn bản gốc, bỏ câu cuối"""
+    offsets, pos = [], 0
+    for sent in sentences[:-1]:
+        idx = text.find(sent, pos)
+        if idx < 0:
+            continue
+        pos = idx + len(sent)
+        offsets.append(pos)
+    return set(offsets)
+
+def parity(corpus, reference, candidate):
+    exact = tp = fp = fn = 0
+    diffs = []
+    for text in corpus:
+        ref, cand = reference(text), candidate(text)
+        if [s.strip() for s in ref] == cand:
+            exact += 1
+        else:
+            diffs.append((ref, cand))
+        ref_b, cand_b = boundaries(text, ref), boundaries(text, cand)
+        tp += len(ref_b & cand_b)
+        fp += len(cand_b - ref_b)
+        fn += len(ref_b - cand_b)
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "articles": len(corpus),
+        "exact_match": exact / len(corpus) if corpus else 1.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }, diffs
+
+def throughput(corpus, splitter, repeat):
+    splitter(corpus[0]) # warm-up
+    total_bytes = sum(len(t.encode("utf-8")) for t in corpus)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            splitter(text)
+    elapsed = (time.perf_counter() - t0) / repeat
+    return {
+        "seconds": elapsed,
+        "articles_per_sec": len(corpus) / elapsed,
+        "mb_per_sec": total_bytes / elapsed / 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity + throughput: fast splitter vs underthesea")
+    parser.add_argument("--corpus", help="File văn bản (mỗi dòng 1 bài). Mặc định: bảng articles")
+    parser.add_argument("--limit", type=int, default=1000, help="Số bài tối đa")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần lặp khi đo throughput")
+    parser.add_argument("--show-diff", type=int, default=0, help="In N bài tách khác nhau")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.limit)
+    if not corpus:
+        print("⚠️ Corpus rỗng")
+        return
+    print(f"📚 Corpus: {len(corpus)} bài")
+
+    reference = get_sentence_splitter("underthesea")
+    candidate = get_sentence_splitter("fast")
+
+    report, diffs = parity(corpus, reference, candidate)
+    print("\n📊 PARITY (fast vs underthesea)")
+    print(f"   ├─ Bài tách giống hệt : {report['exact_match']:.2%}")
+    print(f"   ├─ Precision ranh giới: {report['precision']:.4f}")
+    print(f"   ├─ Recall ranh giới   : {report['recall']:.4f}")
+    print(f"   └─ F1 ranh giới       : {report['f1']:.4f}")
+
+    for ref, cand in diffs[:args.show_diff]:
+        print("\n--- underthesea:")
+        for s in ref:
+            print(f"   | {s}")
+        print("+++ fast:")
+        for s in cand:
+            print(f"   | {s}")
+
+    print("\n⚡ THROUGHPUT")
+    slow = throughput(corpus, reference, args.repeat)
+    fast = throughput(corpus, candidate, args.repeat)
+    for name, r in (("underthesea", slow), ("fast", fast)):
+        print(f"   {name:<12} {r['articles_per_sec']:>10.1f} bài/s {r['mb_per_sec']:>8.2f} MB/s")
+    print(f"   Tăng tốc: {slow['seconds'] / fast['seconds']:.1f}x")
+
+if __name__ == "__main__":
+    main()
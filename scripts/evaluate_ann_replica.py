@@ -0,0 +1,117 @@
+"""
+Đánh giá bản sao ANN in-process (backend/ann_index.py) so với pgvector:
+    - Bộ nhớ: kích thước index / ids / nội dung + RSS tăng thêm của process khi build
+    - Recall@k so với kết quả pgvector (HNSW trong Postgres) và so với tìm kiếm chính xác
+    - Latency mỗi truy vấn: FAISS in-process vs 1 round-trip pgvector
+
+Query = vector của các claim ngẫu nhiên trong bảng claims, cộng nhiễu Gauss (--noise)
+để không trùng khớp tuyệt đối với chính nó.
+
+Usage:
+    python scripts/evaluate_ann_replica.py
+    python scripts/evaluate_ann_replica.py --queries 500 --top-k 10 --ef-search 16 32 64 128
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.ann_index import ClaimANNIndex
+from backend.db import DatabasePool
+from backend.serve import read_memory
+from backend.verifier import DB_CONFIG, BATCH_RETRIEVAL_SQL, to_pgvector
+
+def sample_queries(db_pool, n, noise, seed=42):
+    with db_pool.connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT embedding::real[] FROM claims WHERE embedding IS NOT NULL ORDER BY random() LIMIT %s", (n,))
+        vectors = np.asarray([r[0] for r in cur.fetchall()], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    vectors += rng.normal(0, noise, vectors.shape).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def pgvector_search(db_pool, queries, top_k):
+    """Top-k id từ pgvector (1 round-trip / query như luồng cũ) + latency từng query"""
+    sql = BATCH_RETRIEVAL_SQL.replace("$1", "%(vecs)s").replace("$2", "%(k)s").replace("$3", "%(exclude)s")
+    results, latencies = [], []
+    with db_pool.connection() as conn, conn.cursor() as cur:
+        for q in queries:
+            t0 = time.perf_counter()
+            cur.execute(sql, {"vecs": [to_pgvector(q)], "k": top_k, "exclude": None})
+            rows = cur.fetchall()
+            latencies.append(time.perf_counter() - t0)
+            results.append([r[1] for r in rows])
+    return results, np.asarray(latencies)
+
+def ann_search(replica, queries, top_k):
+    results, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        candidates = replica.search(q[None, :], top_k)[0]
+        latencies.append(time.perf_counter() - t0)
+        results.append([c[0] for c in candidates])
+    return results, np.asarray(latencies)
+
+def exact_search(replica, queries, top_k):
+    ids, vectors = replica.vectors()
+    flat = faiss.IndexFlatIP(replica.dimension)
+    flat.add(vectors)
+    _, rows = flat.search(queries, top_k)
+    return [[int(ids[r]) for r in row if r >= 0] for row in rows]
+
+def recall(results, truth, top_k):
+    hits = sum(len(set(r[:top_k]) & set(t[:top_k])) for r, t in zip(results, truth))
+    total = sum(min(top_k, len(t)) for t in truth)
+    return hits / total if total else 1.0
+
+def ms(latencies, p):
+    return float(np.percentile(latencies, p) * 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / bộ nhớ / latency của ANN replica so với pgvector")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.02, help="Độ lệch chuẩn nhiễu cộng vào query")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    db_pool = DatabasePool(DB_CONFIG, minconn=0, maxconn=2)
+
+    rss_before = read_memory("self")
+    replica = ClaimANNIndex.from_database(db_pool)
+    rss_after = read_memory("self")
+    stats = replica.stats()
+    mem = stats["memory_bytes"]
+
+    print(f"📦 Replica: {stats['size']} claim REAL, dim {stats['dimension']}, "
+          f"export {stats['export_seconds']:.1f}s, build {stats['build_seconds']:.1f}s")
+    print(f"   ├─ Index (vector + HNSW): {mem['index'] / 2**20:.1f} MB")
+    print(f"   ├─ ids + nội dung       : {(mem['ids'] + mem['content']) / 2**20:.1f} MB")
+    if rss_before and rss_after:
+        print(f"   └─ RSS tăng thêm        : {(rss_after['rss_kb'] - rss_before['rss_kb']) / 1024:.1f} MB")
+
+    queries = sample_queries(db_pool, args.queries, args.noise)
+    print(f"\n🔎 {len(queries)} query, top-{args.top_k}")
+
+    pg_results, pg_lat = pgvector_search(db_pool, queries, args.top_k)
+    exact = exact_search(replica, queries, args.top_k)
+    print(f"\n{'engine':<18} {'recall@k vs pg':>15} {'recall@k exact':>15} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'pgvector':<18} {1.0:>15.4f} {recall(pg_results, exact, args.top_k):>15.4f} "
+          f"{ms(pg_lat, 50):>8.2f} {ms(pg_lat, 95):>8.2f}")
+
+    for ef in args.ef_search:
+        replica.set_ef_search(ef)
+        ann_results, ann_lat = ann_search(replica, queries, args.top_k)
+        print(f"{f'faiss ef={ef}':<18} {recall(ann_results, pg_results, args.top_k):>15.4f} "
+              f"{recall(ann_results, exact, args.top_k):>15.4f} {ms(ann_lat, 50):>8.2f} {ms(ann_lat, 95):>8.2f}")
+
+    db_pool.close()
+
+if __name__ == "__main__":
+    main()
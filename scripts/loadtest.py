@@ -0,0 +1,452 @@
+"""
+Load test end-to-end cho Backend API (/api/v1/verify + /api/v1/report).
+
+1. Fixture Postgres + pgvector riêng (không đụng DB thật):
+    docker compose --profile loadtest up -d loadtest-db        # cổng 5433, DB factcheck_loadtest
+    python scripts/loadtest.py seed --claims 50000             # schema + bài báo + claim giả lập
+    Claim lấy từ câu của chính các bài đã seed (gắn article_id, lệch số liệu) và embed bằng
+    bi-encoder thật -> verify bài seed tìm được evidence và phải qua CrossEncoder.
+    --random-vectors: bỏ bước embed (nhanh) nhưng retrieval hầu như không khớp -> chỉ đo nhánh no_evidence.
+
+2. Chạy Backend trỏ vào fixture, tắt các cache (không thì đo cache chứ không đo verify):
+    POSTGRES_PORT=5433 POSTGRES_DB=factcheck_loadtest VERDICT_CACHE_SIZE=0 ENABLE_PAIR_SCORE_CACHE=0 \
+        ENABLE_PRECOMPUTED_VERDICTS=0 uvicorn backend.main:app --port 8000
+    (hoặc python -m backend.serve --workers 4 với cùng biến môi trường)
+    Lúc bắt đầu, `run` đọc /api/internal/stats và dừng nếu cache còn bật (--allow-caches để bỏ qua).
+
+3. Bắn tải (closed-loop: mỗi luồng gửi request kế tiếp ngay khi nhận response):
+    python scripts/loadtest.py run --concurrency 1 4 8 16 32 --duration 60
+    python scripts/loadtest.py run --corpus articles.txt --report-ratio 0.2 --json result.json
+
+Mỗi mức concurrency in p50 / p95 / p99 latency, throughput và tỉ lệ lỗi theo endpoint,
+kèm tỉ lệ hit của verdict cache / pair-score cache / verdict tính sẵn, số lần gọi CrossEncoder
+và số claim kết thúc ở từng tầng cascade (đọc từ /metrics, chạy nhiều worker thì chỉ là số
+của worker trả lời /metrics); "ceiling" = mức có throughput verify cao nhất mà tỉ lệ lỗi < --max-error-rate.
+
+Corpus: mặc định --corpus db (bài trong bảng articles, tức các bài đã seed), --corpus file.txt
+(mỗi dòng 1 bài), --corpus synthetic (bài giả lập mới, độ dài log-normal giống bài VnExpress
+~15-40 câu, không có claim khớp trong DB).
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+import requests
+from psycopg2.extras import execute_values
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from init_db_full import DB_CONFIG, SCHEMA_SQL
+
+LOADTEST_DB = "factcheck_loadtest"
+LOADTEST_PORT = "5433"
+
+# Counter trên /metrics dùng để tính tỉ lệ hit cache của từng mức concurrency
+CACHE_METRICS = {
+    "verdict_cache": "factcheck_verdict_cache_lookups_total",
+    "pair_cache": "factcheck_pair_score_cache_lookups_total",
+    "precomputed": "factcheck_precomputed_verdict_lookups_total",
+}
+# Chứng minh request thật sự đi qua CrossEncoder (không chỉ nhánh no_evidence / near_duplicate)
+STAGE_COUNT_METRIC = "factcheck_stage_duration_seconds_count"
+CASCADE_EXITS_METRIC = "factcheck_cascade_exits_total"
+
+# ================= VĂN BẢN GIẢ LẬP =================
+SUBJECTS = [
+    "Bộ Y tế", "UBND TP.HCM", "Ngân hàng Nhà nước", "Tổng cục Thống kê", "Bộ Giáo dục và Đào tạo",
+    "Công an Hà Nội", "Sở Giao thông vận tải", "Tập đoàn Điện lực Việt Nam", "Bộ Tài chính",
+    "Thủ tướng Chính phủ", "Quốc hội", "Cục Hàng không", "Sở Y tế Đà Nẵng", "Bộ Công Thương",
+]
+VERBS = [
+    "công bố", "cho biết", "quyết định", "đề xuất", "yêu cầu", "thông báo", "ghi nhận", "phê duyệt",
+]
+OBJECTS = [
+    "giá xăng RON 95 giảm {n} đồng mỗi lít", "GDP quý {q} tăng {p}% so với cùng kỳ",
+    "{n} ca mắc mới trong ngày", "lãi suất huy động giảm {p} điểm phần trăm",
+    "xây dựng {n} km đường cao tốc", "hỗ trợ {n} tỷ đồng cho người dân vùng lũ",
+    "điểm chuẩn đại học tăng {p} điểm", "xử phạt {n} trường hợp vi phạm nồng độ cồn",
+    "mở thêm {n} đường bay quốc tế", "tiền điện tăng {p}% từ tháng {m}",
+]
+TIMES = ["sáng nay", "chiều {d}/{m}", "trong tháng {m}", "từ ngày {d}/{m}", "năm {y}", "tuần trước"]
+
+def fake_sentence(rng):
+    fill = {
+        "n": rng.randint(2, 5000), "p": round(rng.uniform(0.1, 12), 1), "q": rng.choice(["I", "II", "III", "IV"]),
+        "d": rng.randint(1, 28), "m": rng.randint(1, 12), "y": rng.randint(2015, 2025),
+    }
+    sentence = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(TIMES)}."
+    return sentence.format(**fill)
+
+def fake_article_sentences(rng):
+    # Số câu log-normal: trung vị ~22 câu, đuôi dài tới ~100 câu
+    n_sentences = max(3, min(120, int(rng.lognormvariate(3.1, 0.5))))
+    return [fake_sentence(rng) for _ in range(n_sentences)]
+
+def fake_article(rng):
+    return " ".join(fake_article_sentences(rng))
+
+def perturb_numbers(sentence, rng):
+    """
+    Claim lưu trong DB = câu của bài nhưng lệch số liệu: retrieval vẫn khớp (distance nhỏ) còn
+    shortcut near-duplicate (cần trùng văn bản hoặc trùng số) không áp dụng -> phải gọi CrossEncoder.
+    """
+    return re.sub(r"\d+", lambda m: str(int(m.group()) + rng.randint(1, 9)), sentence)
+
+# ================= SEED FIXTURE =================
+def seed(args):
+    db_config = {**DB_CONFIG, "dbname": args.db_name, "port": args.db_port}
+
+    # Tạo database fixture nếu chưa có
+    admin = psycopg2.connect(**{**db_config, "dbname": "postgres"})
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (args.db_name,))
+        if not cur.fetchone():
+            cur.execute(f'CREATE DATABASE "{args.db_name}"')
+            print(f"📦 Đã tạo database {args.db_name}")
+    admin.close()
+
+    conn = psycopg2.connect(**db_config)
+    conn.autocommit = True
+    rng = random.Random(args.seed)
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+        if args.reset:
+            cur.execute("TRUNCATE articles, claims, user_reports, users RESTART IDENTITY CASCADE")
+
+        sentences = [fake_article_sentences(rng) for _ in range(args.articles)]
+        articles = [(f"https://loadtest.local/{uuid.uuid4()}", f"Bài giả lập {i}", " ".join(s))
+                    for i, s in enumerate(sentences)]
+        article_ids = [r[0] for r in execute_values(
+            cur, "INSERT INTO articles (url, title, content) VALUES %s RETURNING id", articles,
+            page_size=1000, fetch=True,
+        )]
+        print(f"📰 {len(articles)} bài báo")
+
+        # Claim = câu của các bài vừa seed (rải đều trên các bài nếu nhiều câu hơn --claims),
+        # phần còn thiếu là claim nhiễu không thuộc bài nào (article_id NULL)
+        sources = [(a, s) for a, article in zip(article_ids, sentences) for s in article]
+        if len(sources) > args.claims:
+            sources = rng.sample(sources, args.claims)
+        claims = [(a, perturb_numbers(s, rng)) for a, s in sources]
+        claims += [(None, fake_sentence(rng)) for _ in range(args.claims - len(claims))]
+        print(f"   ├─ {len(sources)} claim từ câu của bài, {args.claims - len(sources)} claim nhiễu")
+
+        encoder = None
+        if not args.random_vectors:
+            from backend.verifier import EMBED_MODEL_NAME
+            from model.onnx_inference import load_sentence_encoder
+            encoder = load_sentence_encoder(EMBED_MODEL_NAME, device="cpu")
+
+        np_rng = np.random.default_rng(args.seed)
+        labels = ["REAL"] * 7 + ["FAKE"] + ["UNDEFINED"] * 2 # Có cả nhãn khác REAL như DB thật
+        for start in range(0, args.claims, args.batch_size):
+            batch = claims[start:start + args.batch_size]
+            texts = [text for _, text in batch]
+            if encoder is not None:
+                vectors = encoder.encode(texts, batch_size=64, convert_to_numpy=True)
+            else:
+                # Vector ngẫu nhiên: chi phí HNSW như thật nhưng hầu như không khớp evidence
+                vectors = np_rng.normal(size=(len(texts), args.dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            rows = [(t, v.tolist(), rng.choice(labels), a) for (a, t), v in zip(batch, vectors)]
+            execute_values(
+                cur, "INSERT INTO claims (content, embedding, system_label, article_id, verified, source_type) VALUES %s",
+                rows, template="(%s, %s::vector, %s, %s, TRUE, 'article')", page_size=1000,
+            )
+            print(f"   ├─ {start + len(texts)}/{args.claims} claim", end="\r")
+        cur.execute("ANALYZE claims")
+        cur.execute("SELECT system_label, COUNT(*) FROM claims GROUP BY 1 ORDER BY 1")
+        print("\n✅ Claims: " + ", ".join(f"{label}={n}" for label, n in cur.fetchall()))
+    conn.close()
+
+# ================= CORPUS =================
+def load_corpus(source, limit, seed_value, db_config):
+    if source not in ("db", "synthetic"):
+        with open(source, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+    if source == "db":
+        conn = psycopg2.connect(**db_config)
+        with conn.cursor() as cur:
+            cur.execute("SELECT content FROM articles WHERE content IS NOT NULL ORDER BY random() LIMIT %s", (limit,))
+            texts = [r[0] for r in cur.fetchall()]
+        conn.close()
+        return texts
+    rng = random.Random(seed_value)
+    return [fake_article(rng) for _ in range(limit)]
+
+def load_claim_ids(db_config, limit=1000):
+    """claim_id có thật cho /report (corpus không phải bài đã seed thì verify hiếm khi trả claim_id)"""
+    try:
+        conn = psycopg2.connect(**db_config)
+    except psycopg2.Error as e:
+        print(f"⚠️ Không đọc được claim id từ DB ({e}), /report chỉ dùng claim_id trả về từ verify")
+        return []
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM claims ORDER BY random() LIMIT %s", (limit,))
+        ids = [r[0] for r in cur.fetchall()]
+    conn.close()
+    return ids
+
+# ================= CACHE CỦA BACKEND =================
+def enabled_caches(base_url, timeout):
+    """Tên biến môi trường của các cache đang bật trên Backend (theo /api/internal/stats)"""
+    stats = requests.get(f"{base_url.rstrip('/')}/api/internal/stats", timeout=timeout).json()
+    enabled = []
+    if (stats.get("verdict_cache") or {}).get("max_size", 0) > 0:
+        enabled.append("VERDICT_CACHE_SIZE")
+    if stats.get("pair_score_cache") is not None:
+        enabled.append("ENABLE_PAIR_SCORE_CACHE")
+    if stats.get("precomputed_verdicts"):
+        enabled.append("ENABLE_PRECOMPUTED_VERDICTS")
+    return enabled
+
+def read_metrics(base_url, timeout):
+    """{metric: {labels: giá trị}} của các sample có label trên /metrics (None nếu không đọc được)"""
+    try:
+        text = requests.get(f"{base_url.rstrip('/')}/metrics", timeout=timeout).text
+    except requests.RequestException:
+        return None
+    samples = defaultdict(dict)
+    for line in text.splitlines():
+        if line.startswith("#") or "{" not in line:
+            continue
+        name, rest = line.split("{", 1)
+        labels, value = rest.rsplit("}", 1)
+        labels = frozenset((k, v.strip('"')) for k, v in (part.split("=", 1) for part in labels.split(",")))
+        samples[name][labels] = float(value)
+    return samples
+
+def metric_deltas(before, after, name, label):
+    """{giá trị của label: mức tăng} của 1 metric giữa 2 lần đọc /metrics"""
+    deltas = defaultdict(float)
+    for labels, value in after.get(name, {}).items():
+        deltas[dict(labels)[label]] += value - before.get(name, {}).get(labels, 0)
+    return deltas
+
+def cache_hit_rates(before, after):
+    """Tỉ lệ hit của từng cache giữa 2 lần đọc /metrics (bỏ cache không có lượt tra nào)"""
+    if before is None or after is None:
+        return {}
+    rates = {}
+    for cache, metric in CACHE_METRICS.items():
+        delta = metric_deltas(before, after, metric, "result")
+        lookups = sum(delta.values())
+        if lookups > 0:
+            rates[cache] = (lookups - delta.get("miss", 0)) / lookups
+    return rates
+
+def scoring_counts(before, after):
+    """Số lần gọi CrossEncoder và số claim kết thúc ở từng tầng cascade giữa 2 lần đọc /metrics"""
+    if before is None or after is None:
+        return None
+    exits = metric_deltas(before, after, CASCADE_EXITS_METRIC, "exit")
+    return {
+        "cross_encoder_calls": int(metric_deltas(before, after, STAGE_COUNT_METRIC, "stage").get("cross_encoder", 0)),
+        "claim_exits": {name: int(n) for name, n in sorted(exits.items()) if n > 0},
+    }
+
+# ================= CHẠY TẢI =================
+class LoadRunner:
+    def __init__(self, base_url, corpus, report_ratio, timeout, seed_value, claim_ids=()):
+        self.base_url = base_url.rstrip("/")
+        self.corpus = corpus
+        self.report_ratio = report_ratio
+        self.timeout = timeout
+        self.seed = seed_value
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.claim_ids = list(claim_ids) # + claim_id thấy trong response verify -> dùng cho report
+
+    def session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def verify(self, rng):
+        text = rng.choice(self.corpus)
+        response = self.session().post(f"{self.base_url}/api/v1/verify", json={"text": text}, timeout=self.timeout)
+        if response.ok:
+            ids = [d["claim_id"] for d in response.json().get("details", []) if d.get("claim_id")]
+            if ids:
+                with self._lock:
+                    self.claim_ids.extend(ids[:5])
+                    del self.claim_ids[:-1000]
+        return response
+
+    def report(self, rng):
+        with self._lock:
+            claim_id = rng.choice(self.claim_ids) if self.claim_ids else None
+        if claim_id is None:
+            return None # Chưa có claim nào từ verify
+        payload = {
+            "user_id": f"loadtest-{rng.randint(1, 500)}",
+            "claim_id": claim_id,
+            "feedback": rng.choice(["REAL", "FAKE", "UNSURE"]),
+            "comment": "load test",
+            "ai_label": rng.choice(["REAL", "FAKE", "NEUTRAL"]),
+            "ai_confidence": round(rng.random(), 3),
+            "model_version": "loadtest",
+        }
+        return self.session().post(f"{self.base_url}/api/v1/report", json=payload, timeout=self.timeout)
+
+    def worker(self, worker_id, deadline, samples):
+        rng = random.Random(self.seed * 1000 + worker_id)
+        while time.monotonic() < deadline:
+            endpoint = "report" if rng.random() < self.report_ratio else "verify"
+            t0 = time.perf_counter()
+            try:
+                response = self.report(rng) if endpoint == "report" else self.verify(rng)
+                if response is None:
+                    endpoint = "verify"
+                    response = self.verify(rng)
+                status = response.status_code
+            except (requests.RequestException, ValueError) as e:
+                status = type(e).__name__
+            samples.append((endpoint, status, time.perf_counter() - t0))
+
+    def run_stage(self, concurrency, duration):
+        samples = [] # list.append an toàn giữa các thread
+        t0 = time.monotonic()
+        deadline = t0 + duration
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for worker_id in range(concurrency):
+                pool.submit(self.worker, worker_id, deadline, samples)
+        return samples, time.monotonic() - t0
+
+def summarize(samples, elapsed):
+    by_endpoint = defaultdict(list)
+    for endpoint, status, latency in samples:
+        by_endpoint[endpoint].append((status, latency))
+    summary = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = np.asarray([latency for _, latency in rows]) * 1000
+        errors = defaultdict(int)
+        for status, _ in rows:
+            if status != 200:
+                errors[str(status)] += 1
+        summary[endpoint] = {
+            "requests": len(rows),
+            "throughput_rps": len(rows) / elapsed,
+            "error_rate": sum(errors.values()) / len(rows),
+            "errors": dict(errors),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+    return summary
+
+def run(args):
+    db_config = {**DB_CONFIG, "dbname": args.db_name, "port": args.db_port}
+    corpus = load_corpus(args.corpus, args.corpus_size, args.seed, db_config)
+    lengths = [len(t.split()) for t in corpus]
+    print(f"📚 Corpus: {len(corpus)} bài, số từ p50={int(np.percentile(lengths, 50))} "
+          f"p95={int(np.percentile(lengths, 95))}")
+    try:
+        caches = enabled_caches(args.url, args.timeout)
+    except (requests.RequestException, ValueError) as e:
+        caches = []
+        print(f"⚠️ Không đọc được /api/internal/stats ({e}), không kiểm tra được cấu hình cache")
+    if caches and not args.allow_caches:
+        sys.exit(f"❌ Backend đang bật cache ({', '.join(caches)}): kết quả sẽ đo cache chứ không đo verify. "
+                 f"Khởi động lại với VERDICT_CACHE_SIZE=0 ENABLE_PAIR_SCORE_CACHE=0 ENABLE_PRECOMPUTED_VERDICTS=0 "
+                 f"hoặc chạy với --allow-caches")
+    claim_ids = load_claim_ids(db_config) if args.report_ratio > 0 else []
+    runner = LoadRunner(args.url, corpus, args.report_ratio, args.timeout, args.seed, claim_ids)
+
+    if args.warmup:
+        print(f"🔥 Warm-up {args.warmup}s...")
+        runner.run_stage(max(args.concurrency), args.warmup)
+
+    print(f"\n{'conc':>5} {'endpoint':<8} {'req':>7} {'rps':>8} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  errors")
+    stages = []
+    for concurrency in args.concurrency:
+        before = read_metrics(args.url, args.timeout)
+        samples, elapsed = runner.run_stage(concurrency, args.duration)
+        after = read_metrics(args.url, args.timeout)
+        hit_rates = cache_hit_rates(before, after)
+        scoring = scoring_counts(before, after)
+        summary = summarize(samples, elapsed)
+        stages.append({"concurrency": concurrency, "duration_s": elapsed, "endpoints": summary,
+                       "cache_hit_rates": hit_rates, "scoring": scoring})
+        for endpoint, s in summary.items():
+            print(f"{concurrency:>5} {endpoint:<8} {s['requests']:>7} {s['throughput_rps']:>8.1f} "
+                  f"{s['error_rate'] * 100:>7.2f} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}  "
+                  f"{s['errors'] or ''}")
+        if hit_rates:
+            print(f"{'':>5} cache hit: " + ", ".join(f"{cache}={rate:.1%}" for cache, rate in hit_rates.items()))
+        if scoring is not None:
+            print(f"{'':>5} cross_encoder: {scoring['cross_encoder_calls']} lần gọi, claim theo tầng: "
+                  + (", ".join(f"{name}={n}" for name, n in scoring["claim_exits"].items()) or "-"))
+
+    scored = [s["scoring"] for s in stages if s["scoring"] is not None]
+    if not scored:
+        print("\n⚠️ Không đọc được /metrics: không xác nhận được request có đi qua CrossEncoder")
+    elif not any(s["cross_encoder_calls"] for s in scored):
+        print("\n⚠️ CrossEncoder không được gọi lần nào: kết quả chỉ đo nhánh không có evidence / near-duplicate "
+              "(seed không dùng --random-vectors và chạy với --corpus db)")
+
+    healthy = [s for s in stages if s["endpoints"].get("verify", {}).get("error_rate", 1) < args.max_error_rate]
+    if healthy:
+        best = max(healthy, key=lambda s: s["endpoints"]["verify"]["throughput_rps"])
+        print(f"\n🏁 Ceiling: {best['endpoints']['verify']['throughput_rps']:.1f} verify/s "
+              f"tại concurrency {best['concurrency']} (lỗi < {args.max_error_rate:.0%})")
+    else:
+        print(f"\n⚠️ Không mức concurrency nào có tỉ lệ lỗi verify < {args.max_error_rate:.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "corpus_size": len(corpus), "stages": stages}, f, indent=2)
+        print(f"📝 Đã ghi {args.json}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test Backend API: verify + report")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", help="Tạo schema + dữ liệu giả lập trong DB fixture")
+    p_seed.add_argument("--db-name", default=LOADTEST_DB)
+    p_seed.add_argument("--db-port", default=LOADTEST_PORT)
+    p_seed.add_argument("--claims", type=int, default=50000)
+    p_seed.add_argument("--articles", type=int, default=2000)
+    p_seed.add_argument("--dim", type=int, default=768, help="Số chiều vector khi dùng --random-vectors")
+    p_seed.add_argument("--batch-size", type=int, default=5000)
+    p_seed.add_argument("--random-vectors", action="store_true",
+                        help="Vector ngẫu nhiên thay vì bi-encoder (nhanh, nhưng verify không tìm được evidence)")
+    p_seed.add_argument("--reset", action="store_true", help="Xoá dữ liệu cũ trong fixture trước khi seed")
+    p_seed.add_argument("--seed", type=int, default=42)
+
+    p_run = sub.add_parser("run", help="Bắn tải vào Backend đang chạy")
+    p_run.add_argument("--url", default="http://localhost:8000")
+    p_run.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    p_run.add_argument("--duration", type=float, default=30, help="Số giây cho mỗi mức concurrency")
+    p_run.add_argument("--warmup", type=float, default=5)
+    p_run.add_argument("--report-ratio", type=float, default=0.1, help="Tỉ lệ request /report")
+    p_run.add_argument("--corpus", default="db", help="db (bài đã seed) | synthetic | file (mỗi dòng 1 bài)")
+    p_run.add_argument("--corpus-size", type=int, default=500)
+    p_run.add_argument("--timeout", type=float, default=30)
+    p_run.add_argument("--max-error-rate", type=float, default=0.01)
+    p_run.add_argument("--json", help="Ghi kết quả chi tiết ra file JSON")
+    p_run.add_argument("--allow-caches", action="store_true", help="Vẫn chạy khi Backend còn bật cache")
+    p_run.add_argument("--db-name", default=LOADTEST_DB, help="DB mà Backend đang dùng (lấy claim_id cho /report)")
+    p_run.add_argument("--db-port", default=LOADTEST_PORT)
+    p_run.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Tạo index HNSW lượng tử hoá cho claims.embedding / articles.embedding (pgvector >= 0.7).
+
+Index là expression index trên cột vector(768) có sẵn -> không thêm cột, dữ liệu gốc
+float32 vẫn nằm trong bảng để re-score chính xác (xem PGVECTOR_QUANTIZATION trong
+backend/verifier.py):
+    halfvec : (embedding::halfvec(768))              halfvec_cosine_ops  ~1/2 kích thước
+    binary  : (binary_quantize(embedding)::bit(768)) bit_hamming_ops     ~1/32 phần vector
+
+Index tạo bằng CREATE INDEX CONCURRENTLY: không khoá ghi, chạy được khi hệ thống đang chạy.
+
+Usage:
+    python scripts/migrate_quantized_embeddings.py                    # tạo cả halfvec + binary
+    python scripts/migrate_quantized_embeddings.py --mode halfvec
+    python scripts/migrate_quantized_embeddings.py --drop-full        # bỏ index float32 sau khi đã chuyển
+    python scripts/migrate_quantized_embeddings.py --sizes            # chỉ in kích thước index
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import psycopg2
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.verifier import DB_CONFIG, EMBEDDING_DIM
+
+# (tên index, bảng, biểu thức, operator class, điều kiện partial)
+QUANTIZED_INDEXES = {
+    "halfvec": [
+        ("claims_real_embedding_half_idx", "claims", f"(embedding::halfvec({EMBEDDING_DIM}))",
+         "halfvec_cosine_ops", "system_label = 'REAL'"),
+        ("articles_embedding_half_idx", "articles", f"(embedding::halfvec({EMBEDDING_DIM}))",
+         "halfvec_cosine_ops", None),
+    ],
+    "binary": [
+        ("claims_real_embedding_bit_idx", "claims", f"(binary_quantize(embedding)::bit({EMBEDDING_DIM}))",
+         "bit_hamming_ops", "system_label = 'REAL'"),
+        ("articles_embedding_bit_idx", "articles", f"(binary_quantize(embedding)::bit({EMBEDDING_DIM}))",
+         "bit_hamming_ops", None),
+    ],
+}
+
+# Index float32 do init_db_full.py tạo
+FULL_INDEXES = ["claims_embedding_idx", "claims_real_embedding_idx", "articles_embedding_idx"]
+
+def pgvector_version(cur):
+    cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    row = cur.fetchone()
+    return tuple(int(p) for p in row[0].split(".")[:2]) if row else (0, 0)
+
+def print_sizes(cur):
+    cur.execute("""
+        SELECT c.relname, t.relname, pg_relation_size(c.oid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE am.amname = 'hnsw' AND t.relname IN ('claims', 'articles')
+        ORDER BY t.relname, c.relname
+    """)
+    rows = cur.fetchall()
+    cur.execute("SELECT pg_size_bytes(current_setting('shared_buffers'))")
+    shared_buffers = cur.fetchone()[0]
+
+    print(f"\n📊 INDEX HNSW (shared_buffers = {shared_buffers / 2**20:.0f} MB)")
+    print(f"{'index':<34} {'bảng':<10} {'MB':>10}")
+    for index, table, size in rows:
+        print(f"{index:<34} {table:<10} {size / 2**20:>10.1f}")
+
+def create_indexes(cur, modes):
+    for mode in modes:
+        for name, table, expression, opclass, where in QUANTIZED_INDEXES[mode]:
+            print(f"🔨 {name} ...")
+            sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING hnsw ({expression} {opclass})"
+            if where:
+                sql += f" WHERE {where}"
+            cur.execute(sql)
+
+def drop_full_indexes(cur):
+    for name in FULL_INDEXES:
+        print(f"🗑️ DROP INDEX {name}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo index HNSW halfvec / binary cho claims và articles")
+    parser.add_argument("--mode", choices=["halfvec", "binary", "both"], default="both")
+    parser.add_argument("--drop-full", action="store_true",
+                        help="Xoá index float32 (chỉ làm khi Backend đã chạy PGVECTOR_QUANTIZATION != off)")
+    parser.add_argument("--sizes", action="store_true", help="Chỉ in kích thước index hiện có")
+    parser.add_argument("--maintenance-work-mem", default="1GB",
+                        help="Build HNSW nhanh hơn nhiều khi đồ thị nằm gọn trong maintenance_work_mem")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True # CREATE INDEX CONCURRENTLY không chạy trong transaction
+    cur = conn.cursor()
+
+    if not args.sizes:
+        version = pgvector_version(cur)
+        if version < (0, 7):
+            print(f"❌ Cần pgvector >= 0.7 (halfvec, binary_quantize), đang có {'.'.join(map(str, version))}")
+            sys.exit(1)
+        cur.execute("SELECT set_config('maintenance_work_mem', %s, false)", (args.maintenance_work_mem,))
+        create_indexes(cur, ["halfvec", "binary"] if args.mode == "both" else [args.mode])
+        if args.drop_full:
+            drop_full_indexes(cur)
+        print("✅ Xong. Bật trong Backend: PGVECTOR_QUANTIZATION=halfvec|binary")
+
+    print_sizes(cur)
+    cur.close()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Kiểm tra admission control (backend/admission.py): từ chối khi hàng đợi đầy / chờ quá lâu
+(kèm Retry-After), bài ngắn được ưu tiên, release() gọi nhiều lần vẫn an toàn.
+
+    python -m pytest test/test_admission.py -q
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.admission import AdmissionController, AdmissionRejected
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Hết thời gian chờ"
+        time.sleep(0.005)
+
+def start_waiter(controller, cost, admitted):
+    """Thread xin slot với cost cho trước, ghi cost vào `admitted` khi được cấp rồi giữ slot"""
+    def run():
+        ticket = controller.acquire(cost)
+        admitted.append((cost, ticket))
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def test_queue_full_rejects_with_retry_after():
+    controller = AdmissionController(max_concurrency=1, max_queue=0, max_wait=1)
+    ticket = controller.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        controller.acquire()
+    assert exc.value.reason == "queue_full"
+    assert exc.value.retry_after >= 1
+    ticket.release()
+    assert controller.stats()["rejected_total"] == 1
+
+def test_wait_timeout_rejects_and_leaves_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait=0.05)
+    ticket = controller.acquire()
+    t0 = time.monotonic()
+    with pytest.raises(AdmissionRejected) as exc:
+        controller.acquire()
+    assert exc.value.reason == "timeout"
+    assert exc.value.retry_after >= 1
+    assert time.monotonic() - t0 >= 0.04
+    assert controller.stats()["queue_depth"] == 0
+
+    # Waiter đã hết hạn không được cấp slot khi có release
+    ticket.release()
+    assert controller.stats()["in_flight"] == 0
+    controller.acquire().release()
+
+def test_shorter_articles_are_admitted_first():
+    controller = AdmissionController(max_concurrency=1, max_queue=8, max_wait=5, prefer_small=True)
+    running = controller.acquire()
+    admitted = []
+    threads = []
+    for cost in (5000, 300, 1200):
+        threads.append(start_waiter(controller, cost, admitted))
+        wait_until(lambda: controller.stats()["queue_depth"] == len(threads))
+
+    running.release()
+    for expected in (300, 1200, 5000):
+        wait_until(lambda: len(admitted) >= 1)
+        cost, ticket = admitted.pop(0)
+        assert cost == expected
+        ticket.release()
+    for thread in threads:
+        thread.join(timeout=2)
+
+def test_fifo_when_not_preferring_small():
+    controller = AdmissionController(max_concurrency=1, max_queue=8, max_wait=5, prefer_small=False)
+    running = controller.acquire()
+    admitted = []
+    for queued, cost in enumerate((5000, 300), start=1):
+        start_waiter(controller, cost, admitted)
+        wait_until(lambda: controller.stats()["queue_depth"] == queued)
+
+    running.release()
+    wait_until(lambda: len(admitted) == 1)
+    assert admitted[0][0] == 5000
+    admitted[0][1].release()
+    wait_until(lambda: len(admitted) == 2)
+    admitted[1][1].release()
+
+def test_release_is_idempotent():
+    controller = AdmissionController(max_concurrency=2, max_queue=0, max_wait=1)
+    ticket = controller.acquire()
+    other = controller.acquire()
+    ticket.release()
+    ticket.release()
+    assert controller.stats()["in_flight"] == 1
+    other.release()
+    assert controller.stats()["in_flight"] == 0
+
+def test_admit_releases_on_error():
+    controller = AdmissionController(max_concurrency=1, max_queue=0, max_wait=1)
+    with pytest.raises(ValueError):
+        with controller.admit():
+            raise ValueError("lỗi trong verify")
+    assert controller.stats()["in_flight"] == 0
@@ -0,0 +1,185 @@
+"""
+Kiểm tra ANN replica (backend/ann_index.py) và việc loại claim của chính bài khi
+tính verdict tính sẵn (iter_verify_many(..., article_ids=...)).
+
+    python -m pytest test/test_ann_index.py -q
+
+Phần chạy qua AdvancedFactChecker tự bỏ qua nếu chưa cài torch.
+"""
+
+import hashlib
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import ann_index
+from backend.ann_index import ClaimANNIndex
+
+DIM = 16
+
+def fake_embedding(text):
+    """Vector cố định theo nội dung câu (câu giống nhau -> vector giống nhau)"""
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+
+def encode(texts):
+    return np.stack([fake_embedding(t) for t in texts])
+
+ARTICLE_ID = 7
+OWN_CLAIMS = [
+    "Thổ Nhĩ Kỳ điều 500 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan",
+    "Giá xăng RON 95 giảm 320 đồng mỗi lít từ 15h chiều nay",
+]
+OTHER_CLAIM = "Bộ Y tế yêu cầu các địa phương đẩy mạnh tiêm chủng mùa đông"
+
+def make_replica():
+    replica = ClaimANNIndex(dimension=DIM)
+    claims = OWN_CLAIMS + [OTHER_CLAIM]
+    replica.load([1, 2, 3], claims, encode(claims), [ARTICLE_ID, ARTICLE_ID, None])
+    return replica
+
+def test_search_finds_exact_match_without_exclusion():
+    candidates = make_replica().search(encode(OWN_CLAIMS[:1]), top_k=1)
+    assert candidates[0][0][0] == 1
+    assert candidates[0][0][3] == pytest.approx(0.0, abs=1e-5)
+
+def test_search_excludes_claims_of_own_article():
+    replica = make_replica()
+    candidates = replica.search(encode(OWN_CLAIMS), top_k=1, exclude_articles=[ARTICLE_ID, ARTICLE_ID])
+    assert [c[0][0] for c in candidates] == [3, 3]
+
+def test_exclusion_is_per_query():
+    candidates = make_replica().search(encode(OWN_CLAIMS), top_k=1, exclude_articles=[ARTICLE_ID, None])
+    assert candidates[0][0][0] == 3
+    assert candidates[1][0][0] == 2
+
+class FakePool:
+    """DatabasePool giả: FETCH_CHANGED_SQL trả về các dòng cho trước"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @contextmanager
+    def connection(self):
+        pool = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                self.result = [r for r in pool.rows if r[0] in params[0]]
+
+            def fetchall(self):
+                return self.result
+
+        class Conn:
+            def cursor(self):
+                return Cursor()
+
+        yield Conn()
+
+def test_apply_changes_keeps_article_id():
+    claims = OWN_CLAIMS + [OTHER_CLAIM]
+    rows = [(i + 1, c, fake_embedding(c).tolist(), a) for i, (c, a) in enumerate(zip(claims, [ARTICLE_ID, ARTICLE_ID, None]))]
+    replica = ClaimANNIndex(db_pool=FakePool(rows), dimension=DIM)
+    replica.apply_changes([(1, "INSERT", 1), (2, "INSERT", 2), (3, "INSERT", 3)])
+    candidates = replica.search(encode(OWN_CLAIMS[:1]), top_k=1, exclude_articles=[ARTICLE_ID])
+    assert candidates[0][0][0] == 3
+
+def test_update_replaces_row_and_old_snapshot_stays_consistent(monkeypatch):
+    monkeypatch.setattr(ann_index, "ANN_MAX_TOMBSTONE_RATIO", 1.0) # Không build lại (FakePool không export được)
+    new_content = "Giá xăng RON 95 tăng 150 đồng mỗi lít từ 15h chiều nay"
+    replica = make_replica()
+    replica.db_pool = FakePool([(2, new_content, fake_embedding(new_content).tolist(), ARTICLE_ID)])
+    before = replica._snapshot()
+
+    replica.apply_changes([(10, "UPDATE", 2), (11, "DELETE", 3)])
+    candidates = replica.search(encode([new_content, OTHER_CLAIM]), top_k=1)
+    assert candidates[0][0][:2] == (2, new_content)
+    assert candidates[1][0][0] != 3
+    assert len(replica) == 2
+    assert replica.stats()["tombstones"] == 2
+
+    # Search đang chạy trên snapshot cũ vẫn thấy trạng thái trước khi cập nhật
+    assert len(before) == 3 and before.content(before.current_row(2)) == OWN_CLAIMS[1]
+
+def test_search_does_not_wait_for_writer():
+    replica = make_replica()
+    results = []
+    with replica._write_lock: # Writer (thread khác) đang dựng snapshot mới
+        reader = threading.Thread(target=lambda: results.append(replica.search(encode(OWN_CLAIMS[:1]), top_k=1)))
+        reader.start()
+        reader.join(timeout=5)
+    assert results and results[0][0][0][0] == 1
+
+def retrieval_predicate(sql):
+    """Điều kiện WHERE của query retrieval, viết lại cho SQLite (q.exclude_article -> :exclude)"""
+    where = re.search(r"WHERE (system_label = 'REAL'.*?)\n\s*ORDER BY", sql, re.S).group(1)
+    return " ".join(where.split()).replace("q.exclude_article", ":exclude")
+
+@pytest.mark.parametrize("exclude", [None, ARTICLE_ID])
+def test_pgvector_and_ann_filters_agree(exclude):
+    pytest.importorskip("torch")
+    verifier = pytest.importorskip("backend.verifier")
+    claims = OWN_CLAIMS + [OTHER_CLAIM, "Claim do admin thêm, không thuộc bài nào"]
+    article_ids = [ARTICLE_ID, ARTICLE_ID, 9, None]
+
+    # SQLite (>= 3.39) có IS DISTINCT FROM với cùng ngữ nghĩa NULL như Postgres.
+    # Replica chỉ chứa claim REAL -> thêm 1 claim FAKE vào bảng để kiểm tra cả điều kiện nhãn
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE claims (id INTEGER, system_label TEXT, article_id INTEGER)")
+    db.executemany("INSERT INTO claims VALUES (?, ?, ?)",
+                   [(i + 1, "REAL", a) for i, a in enumerate(article_ids)] + [(5, "FAKE", None)])
+    replica = ClaimANNIndex(dimension=DIM)
+    replica.load(list(range(1, len(claims) + 1)), claims, encode(claims), article_ids)
+    ann_ids = {c[0] for c in replica.search(encode(claims[:1]), top_k=len(claims), exclude_articles=[exclude])[0]}
+
+    for sql in (verifier.BATCH_RETRIEVAL_SQL, verifier.quantized_retrieval_sql("halfvec")):
+        rows = db.execute(f"SELECT id FROM claims WHERE {retrieval_predicate(sql)}", {"exclude": exclude})
+        sql_ids = {r[0] for r in rows}
+        assert 4 in sql_ids # Claim article_id NULL luôn là evidence hợp lệ
+        assert sql_ids == ann_ids
+
+@pytest.fixture
+def checker():
+    pytest.importorskip("torch")
+    from backend.cache import VerdictCache
+    from backend.verifier import AdvancedFactChecker
+
+    class Bundle:
+        version = "test"
+
+    checker = AdvancedFactChecker.__new__(AdvancedFactChecker)
+    checker.claim_classifier = None
+    checker.pair_scores = None
+    checker.verdict_cache = VerdictCache()
+    checker.ann_index = make_replica()
+    checker.encode = encode
+    checker.split_claims = lambda text: [s.strip() for s in text.split(".") if s.strip()]
+
+    @contextmanager
+    def use_verifier():
+        yield Bundle()
+
+    checker.use_verifier = use_verifier
+    return checker
+
+def test_precomputed_verdict_does_not_match_own_claims(checker):
+    article = ". ".join(OWN_CLAIMS) + "."
+    # Không loại trừ: mỗi claim tự khớp với chính nó (near-duplicate) -> REAL giả
+    assert dict(checker.iter_verify_many([article]))[0]["status"] == "REAL"
+
+    result = dict(checker.iter_verify_many([article], article_ids=[ARTICLE_ID]))[0]
+    assert all(d["claim_id"] not in (1, 2) for d in result["details"])
+    assert result["status"] != "REAL"
@@ -0,0 +1,100 @@
+"""
+Kiểm tra micro-batcher (backend/batching.py): flush khi đủ size / hết deadline,
+kết quả tách đúng cho từng caller, lỗi được trả về cho mọi caller trong batch.
+
+    python -m pytest test/test_batching.py -q
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.batching import MicroBatcher
+
+class RecordingFn:
+    """fn của batcher: ghi lại từng batch, trả về item * 10 (có thể chặn tới khi được mở)"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, items):
+        self.gate.wait(5)
+        self.batches.append(list(items))
+        if self.error:
+            raise self.error
+        return [item * 10 for item in items]
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(fn, max_batch_size=4, max_wait_ms=5000):
+        batcher = MicroBatcher(fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name="test")
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+def test_flush_when_batch_is_full(make_batcher):
+    fn = RecordingFn()
+    batcher = make_batcher(fn, max_batch_size=4, max_wait_ms=5000)
+
+    t0 = time.monotonic()
+    first, second = batcher.submit([1, 2]), batcher.submit([3, 4])
+    assert first.result(timeout=2) == [10, 20]
+    assert second.result(timeout=2) == [30, 40]
+    assert time.monotonic() - t0 < 2 # Không chờ hết max_wait 5s
+    assert fn.batches == [[1, 2, 3, 4]]
+
+def test_flush_on_deadline(make_batcher):
+    fn = RecordingFn()
+    batcher = make_batcher(fn, max_batch_size=100, max_wait_ms=50)
+
+    t0 = time.monotonic()
+    assert batcher.run([1, 2, 3]) == [10, 20, 30]
+    assert time.monotonic() - t0 >= 0.04
+    assert fn.batches == [[1, 2, 3]]
+
+def test_jobs_waiting_together_share_one_batch(make_batcher):
+    fn = RecordingFn()
+    fn.gate.clear() # Batch đầu bị chặn -> các job sau dồn lại trong hàng đợi
+    batcher = make_batcher(fn, max_batch_size=8, max_wait_ms=20)
+
+    blocked = batcher.submit([0])
+    time.sleep(0.05)
+    futures = [batcher.submit([i]) for i in range(1, 4)]
+    fn.gate.set()
+
+    assert blocked.result(timeout=2) == [0]
+    assert [f.result(timeout=2) for f in futures] == [[10], [20], [30]]
+    assert fn.batches == [[0], [1, 2, 3]]
+    assert batcher.stats()["batches"] == 2
+
+def test_error_reaches_every_waiter(make_batcher):
+    fn = RecordingFn(error=RuntimeError("CUDA OOM"))
+    batcher = make_batcher(fn, max_batch_size=3, max_wait_ms=5000)
+
+    futures = [batcher.submit([1]), batcher.submit([2]), batcher.submit([3])]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="CUDA OOM"):
+            future.result(timeout=2)
+    assert fn.batches == [[1, 2, 3]]
+
+    # Worker vẫn sống sau lỗi
+    fn.error = None
+    assert batcher.run([4, 5, 6]) == [40, 50, 60]
+
+def test_empty_submit_returns_immediately(make_batcher):
+    fn = RecordingFn()
+    batcher = make_batcher(fn)
+    assert batcher.submit([]).result(timeout=1) == []
+    assert fn.batches == []
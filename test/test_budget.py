@@ -0,0 +1,69 @@
+"""
+Kiểm tra ngân sách verify (backend/budget.py): xếp claim theo salience, cắt max_claims,
+dừng trước deadline và đánh dấu partial.
+
+    python -m pytest test/test_budget.py -q
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import budget as budget_module
+from backend.budget import VerifyBudget, salience_scores
+
+CLAIMS = [
+    "Thời tiết hôm nay khá dễ chịu với nhiều người dân",
+    "Bộ Tài chính cho biết giá xăng RON 95 giảm 320 đồng từ ngày 15/3",
+    "nhiều người cho rằng đây là tin vui",
+]
+
+def test_create_returns_none_without_limits(monkeypatch):
+    monkeypatch.setattr(budget_module, "VERIFY_TIME_BUDGET_MS", 0)
+    monkeypatch.setattr(budget_module, "VERIFY_MAX_CLAIMS", 0)
+    assert VerifyBudget.create() is None
+    assert VerifyBudget.create(max_claims=3) is not None
+    assert VerifyBudget.create(time_budget_ms=500).deadline is not None
+
+def test_request_overrides_server_default(monkeypatch):
+    monkeypatch.setattr(budget_module, "VERIFY_MAX_CLAIMS", 10)
+    assert VerifyBudget().max_claims == 10
+    assert VerifyBudget(max_claims=2).max_claims == 2
+
+def test_salience_prefers_numbers_and_proper_nouns():
+    scores = salience_scores(CLAIMS)
+    assert scores[1] > scores[0] > scores[2]
+    # Xác suất của claim extractor nhân vào điểm
+    assert salience_scores(CLAIMS, {CLAIMS[1]: 0.1})[1] < scores[1]
+
+def test_select_ranks_and_truncates():
+    budget = VerifyBudget(max_claims=2)
+    assert budget.select(CLAIMS) == [CLAIMS[1], CLAIMS[0]]
+    assert budget.dropped == 1
+    assert budget.partial
+    assert budget.stats()["claims_dropped"] == 1
+
+def test_select_keeps_all_without_max_claims():
+    budget = VerifyBudget(time_budget_ms=1000)
+    assert sorted(budget.select(CLAIMS)) == sorted(CLAIMS)
+    assert not budget.partial
+
+def test_chunk_size_capped_only_with_deadline(monkeypatch):
+    monkeypatch.setattr(budget_module, "BUDGET_CHUNK_SIZE", 8)
+    assert VerifyBudget(time_budget_ms=1000).chunk_size(32) == 8
+    assert VerifyBudget(max_claims=5).chunk_size(32) == 32
+
+def test_should_stop_before_deadline_overrun():
+    budget = VerifyBudget(time_budget_ms=1000)
+    assert not budget.should_stop(0.1, remaining=10)
+    assert not budget.partial
+
+    budget.deadline = time.perf_counter() + 0.05
+    assert budget.should_stop(0.1, remaining=7)
+    assert budget.unprocessed == 7
+    assert budget.partial
+    assert budget.stats()["claims_unprocessed"] == 7
+
+def test_should_stop_never_without_deadline():
+    assert not VerifyBudget(max_claims=3).should_stop(1e9, remaining=5)
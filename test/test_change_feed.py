@@ -0,0 +1,124 @@
+"""
+Kiểm tra horizon của change feed (backend/change_feed.py) trên 1 bảng claims_changes giả:
+thay đổi có seq nhỏ nhưng COMMIT muộn không được bị bỏ sót.
+
+    python -m pytest test/test_change_feed.py -q
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import change_feed
+from backend.change_feed import ClaimsChangeFeed, HORIZON_SQL, FETCH_CHANGES_SQL
+
+class FakeClaimsChanges:
+    """claims_changes + các transaction đang mở, theo đúng ngữ nghĩa visibility của Postgres"""
+
+    def __init__(self):
+        self.rows = []        # (seq, op, claim_id, xid)
+        self.in_flight = set()
+        self.committed = set()
+        self.next_xid = 100
+        self.next_seq = 1
+        self.now = datetime(2025, 1, 1)
+
+    def begin(self):
+        xid = self.next_xid
+        self.next_xid += 1
+        self.in_flight.add(xid)
+        return xid
+
+    def write(self, xid, op, claim_id):
+        self.rows.append((self.next_seq, op, claim_id, xid))
+        self.next_seq += 1
+
+    def commit(self, xid):
+        self.in_flight.discard(xid)
+        self.committed.add(xid)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        db = self.db
+        if sql == HORIZON_SQL:
+            self.result = [(min(db.in_flight) if db.in_flight else db.next_xid, db.now)]
+        elif sql == FETCH_CHANGES_SQL:
+            xid, seq, horizon, limit = params
+            visible = sorted(
+                (r for r in db.rows if r[3] in db.committed and (r[3], r[0]) > (xid, seq) and r[3] < horizon),
+                key=lambda r: (r[3], r[0]),
+            )
+            self.result = visible[:limit]
+        else:
+            raise AssertionError(f"SQL không mong đợi: {sql}")
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+def make_feed(db, since):
+    feed = ClaimsChangeFeed({}, since=since)
+    feed._conn = db
+    received = []
+    feed.subscribe(lambda changes: received.extend(seq for seq, _, _ in changes))
+    return feed, received
+
+def test_late_commit_with_lower_seq_is_not_skipped():
+    db = FakeClaimsChanges()
+    feed, received = make_feed(db, since=db.next_xid)
+
+    slow = db.begin()
+    db.write(slow, "INSERT", 1)  # seq 1, commit muộn (vd execute_values của rebuild)
+    fast = db.begin()
+    db.write(fast, "INSERT", 2)  # seq 2, commit ngay (consumer autocommit)
+    db.commit(fast)
+
+    feed._catch_up()
+    assert received == []  # seq 2 chưa an toàn: transaction seq 1 vẫn đang mở
+
+    db.commit(slow)
+    feed._catch_up()
+    assert sorted(received) == [1, 2]
+
+    feed._catch_up()
+    assert sorted(received) == [1, 2]  # không gửi lại
+
+def test_batches_cover_whole_range(monkeypatch):
+    monkeypatch.setattr(change_feed, "CHANGE_FEED_BATCH", 3)
+    db = FakeClaimsChanges()
+    feed, received = make_feed(db, since=db.next_xid)
+    for claim_id in range(10):
+        xid = db.begin()
+        db.write(xid, "INSERT", claim_id)
+        db.write(xid, "UPDATE", claim_id)
+        db.commit(xid)
+
+    feed._catch_up()
+    assert sorted(received) == list(range(1, 21))
+
+def test_stale_horizon_reports_gap():
+    db = FakeClaimsChanges()
+    feed = ClaimsChangeFeed({}, since=db.next_xid)
+    feed._conn = db
+    gaps = []
+    feed.subscribe(lambda changes: None, on_gap=lambda: gaps.append(True))
+
+    feed._catch_up()
+    db.now += timedelta(hours=change_feed.CHANGE_FEED_RETENTION_HOURS + 1)
+    feed._catch_up()
+    assert gaps == [True]
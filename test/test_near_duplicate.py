@@ -0,0 +1,40 @@
+"""
+Kiểm tra lối tắt near-duplicate của cascade (backend/verifier.py): distance nhỏ thôi chưa đủ,
+claim lệch số liệu so với evidence phải đi qua CrossEncoder.
+
+    python -m pytest test/test_near_duplicate.py -q
+
+Tự bỏ qua nếu chưa cài torch.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+pytest.importorskip("torch")
+verifier = pytest.importorskip("backend.verifier")
+
+EVIDENCE = "Thổ Nhĩ Kỳ điều 5 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan."
+
+def test_same_sentence_is_near_duplicate():
+    claim = "thổ nhĩ kỳ điều 5 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan"
+    assert verifier.is_near_duplicate(claim, EVIDENCE, 0.0)
+
+def test_different_number_is_not_near_duplicate():
+    claim = "Thổ Nhĩ Kỳ điều 500 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan"
+    assert not verifier.is_near_duplicate(claim, EVIDENCE, 0.001)
+
+def test_different_date_is_not_near_duplicate():
+    evidence = "Giá xăng giảm 320 đồng mỗi lít từ ngày 15/3/2024"
+    claim = "Giá xăng giảm 320 đồng mỗi lít từ ngày 15/4/2024"
+    assert not verifier.is_near_duplicate(claim, evidence, 0.001)
+
+def test_same_numbers_with_rewording_is_near_duplicate():
+    evidence = "Giá xăng giảm 320 đồng mỗi lít từ ngày 15/3/2024"
+    claim = "Từ ngày 15/3/2024, giá xăng giảm 320 đồng/lít"
+    assert verifier.is_near_duplicate(claim, evidence, 0.01)
+
+def test_distance_above_threshold_is_not_near_duplicate():
+    assert not verifier.is_near_duplicate(EVIDENCE, EVIDENCE, verifier.NEAR_DUPLICATE_DISTANCE)
@@ -0,0 +1,87 @@
+"""
+Kiểm tra pair-score store (backend/cache.py): tra nhiều key trong 1 query, xoá điểm
+khi evidence bị sửa / xoá, dọn theo model_version / tuổi / kích thước.
+
+    python -m pytest test/test_pair_score_store.py -q
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.cache import PairScoreStore
+
+CLAIM = "Thổ Nhĩ Kỳ điều 500 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan"
+EVIDENCE = "Thổ Nhĩ Kỳ điều 5 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan"
+PROBS = (0.9, 0.05, 0.05)
+
+@pytest.fixture
+def store(tmp_path):
+    store = PairScoreStore(str(tmp_path / "pair_scores.sqlite3"), ttl_days=30, max_rows=0)
+    yield store
+    store.close()
+
+def test_get_many_uses_one_query(store):
+    keys = [PairScoreStore.make_key(f"{CLAIM} {i}", i, EVIDENCE, "v1") for i in range(50)]
+    store.put_many([(key, PROBS) for key in keys[:30]])
+
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    found = store.get_many(keys)
+    store._conn.set_trace_callback(None)
+
+    assert set(found) == set(keys[:30])
+    assert found[keys[0]] == pytest.approx(PROBS)
+    assert len(statements) == 1
+    assert store.stats()["hits"] == 30 and store.stats()["misses"] == 20
+
+def test_content_update_on_same_id_misses(store):
+    store.put_many([(PairScoreStore.make_key(CLAIM, 1, EVIDENCE, "v1"), PROBS)])
+    edited = EVIDENCE.replace("5 phi cơ", "500 phi cơ")
+    assert store.get_many([PairScoreStore.make_key(CLAIM, 1, edited, "v1")]) == {}
+
+def test_invalidate_evidence(store):
+    store.put_many([(PairScoreStore.make_key(CLAIM, i, EVIDENCE, "v1"), PROBS) for i in (1, 2, 3)])
+    assert store.invalidate_evidence([2, 3, 3]) == 2
+    remaining = store.get_many([PairScoreStore.make_key(CLAIM, i, EVIDENCE, "v1") for i in (1, 2, 3)])
+    assert [key[1] for key in remaining] == [1]
+
+def test_prune_drops_inactive_versions_and_old_rows(store):
+    old, current, stale = (PairScoreStore.make_key(CLAIM, i, EVIDENCE, v) for i, v in ((1, "v1"), (2, "v2"), (3, "v2")))
+    store.put_many([(old, PROBS), (current, PROBS), (stale, PROBS)])
+    store._conn.execute("UPDATE pair_scores SET created_at = ? WHERE evidence_id = 3", (time.time() - 31 * 86400,))
+
+    assert store.prune(keep_versions=["v2"]) == 2
+    assert set(store.get_many([old, current, stale])) == {current}
+
+def test_prune_caps_size_keeping_newest(store):
+    store.max_rows = 2
+    keys = [PairScoreStore.make_key(CLAIM, i, EVIDENCE, "v1") for i in range(5)]
+    for i, key in enumerate(keys):
+        store.put_many([(key, PROBS)])
+        store._conn.execute("UPDATE pair_scores SET created_at = ? WHERE evidence_id = ?", (time.time() - 100 + i, i))
+    store.prune()
+    assert set(store.get_many(keys)) == set(keys[-2:])
+
+def test_legacy_schema_is_recreated(tmp_path):
+    path = tmp_path / "legacy.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE pair_scores (
+            claim_hash TEXT NOT NULL, evidence_id INTEGER NOT NULL, model_version TEXT NOT NULL,
+            p_refuted REAL NOT NULL, p_supported REAL NOT NULL, p_nei REAL NOT NULL, created_at REAL NOT NULL,
+            PRIMARY KEY (claim_hash, evidence_id, model_version)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+    conn.close()
+
+    store = PairScoreStore(str(path))
+    key = PairScoreStore.make_key(CLAIM, 1, EVIDENCE, "v1")
+    store.put_many([(key, PROBS)])
+    assert key in store.get_many([key])
+    store.close()
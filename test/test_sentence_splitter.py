@@ -0,0 +1,70 @@
+"""
+Kiểm tra bộ tách câu rule-based (processor/sentence_splitter.py).
+
+    python -m pytest test/test_sentence_splitter.py -q
+    SPLITTER_CORPUS=articles.txt python -m pytest test/test_sentence_splitter.py -q  # Parity trên corpus thật
+
+Phần parity với underthesea tự bỏ qua nếu chưa cài underthesea.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processor.sentence_splitter import fast_sent_tokenize, get_sentence_splitter
+from scripts.benchmark_sentence_splitter import load_corpus, parity
+
+# Ngưỡng F1 ranh giới câu tối thiểu so với underthesea
+MIN_BOUNDARY_F1 = float(os.getenv("SPLITTER_MIN_F1", "0.95"))
+
+SAMPLE_ARTICLES = [
+    "Bộ Y tế yêu cầu các địa phương đẩy mạnh tiêm chủng. Người dân cần đến trạm y tế gần nhất để được tư vấn.",
+    "Theo Tổng cục Thống kê, GDP quý III tăng 7,4% so với cùng kỳ. Đây là mức tăng cao nhất trong 3 năm.",
+    "Giá xăng RON 95 giảm 320 đồng mỗi lít từ 15h chiều nay. Giá dầu diesel giữ nguyên!",
+    "Trận mưa lớn kéo dài khiến nhiều tuyến phố ngập sâu. Liệu hệ thống thoát nước có quá tải? Chuyên gia cho rằng cần đầu tư thêm.",
+    "Ngày 10/12/2025, Chính phủ công bố kế hoạch phát triển kinh tế số. Kế hoạch gồm 5 nhóm giải pháp chính.",
+]
+
+@pytest.mark.parametrize("text, expected", [
+    # Câu cơ bản
+    ("Hà Nội mưa lớn. Nhiều tuyến phố ngập.", ["Hà Nội mưa lớn.", "Nhiều tuyến phố ngập."]),
+    ("Thật sao? Đúng vậy! Tin này sai.", ["Thật sao?", "Đúng vậy!", "Tin này sai."]),
+    # Từ viết tắt, chữ cái viết tắt tên riêng
+    ("Theo PGS. TS. Nguyễn V. An, giá tăng. Thị trường ổn định.",
+     ["Theo PGS. TS. Nguyễn V. An, giá tăng.", "Thị trường ổn định."]),
+    ("Tại TP. HCM, UBND Q. 1 họp khẩn.", ["Tại TP. HCM, UBND Q. 1 họp khẩn."]),
+    ("Ban Chấp hành T.Ư. Đoàn họp.", ["Ban Chấp hành T.Ư. Đoàn họp."]),
+    ("Cuộc họp diễn ra tại TP.HCM. Ông Nam phát biểu khai mạc.",
+     ["Cuộc họp diễn ra tại TP.HCM.", "Ông Nam phát biểu khai mạc."]),
+    ("Đội Việt Nam nằm ở bảng B. Trận đầu gặp Thái Lan.",
+     ["Đội Việt Nam nằm ở bảng B.", "Trận đầu gặp Thái Lan."]),
+    # Số, ngày tháng
+    ("Giá giảm 1.000 đồng từ ngày 15.12.2025. Tỉ lệ 7.4% là cao.",
+     ["Giá giảm 1.000 đồng từ ngày 15.12.2025.", "Tỉ lệ 7.4% là cao."]),
+    ("Vụ tai nạn xảy ra lúc 8h. 10 người bị thương.", ["Vụ tai nạn xảy ra lúc 8h.", "10 người bị thương."]),
+    # Dấu nháy, ngoặc, dấu ba chấm, xuống dòng
+    ('"Chúng tôi sẽ làm rõ!" Ông nói.', ['"Chúng tôi sẽ làm rõ!"', "Ông nói."]),
+    ("Mưa lớn... Nhiều nơi ngập (theo VnExpress). Đường trơn.",
+     ["Mưa lớn...", "Nhiều nơi ngập (theo VnExpress).", "Đường trơn."]),
+    ("Tiêu đề bài báo\nNội dung đầu tiên. nội dung tiếp", ["Tiêu đề bài báo", "Nội dung đầu tiên. nội dung tiếp"]),
+    ("", []),
+])
+def test_fast_splitter_rules(text, expected):
+    assert fast_sent_tokenize(text) == expected
+
+def test_get_sentence_splitter():
+    assert get_sentence_splitter("fast") is fast_sent_tokenize
+    with pytest.raises(ValueError):
+        get_sentence_splitter("unknown")
+
+def test_parity_with_underthesea():
+    pytest.importorskip("underthesea")
+    corpus_path = os.getenv("SPLITTER_CORPUS")
+    corpus = load_corpus(corpus_path, limit=1000) if corpus_path else SAMPLE_ARTICLES
+
+    report, _ = parity(corpus, get_sentence_splitter("underthesea"), fast_sent_tokenize)
+    print(f"📊 Parity: {report}")
+    assert report["f1"] >= MIN_BOUNDARY_F1
@@ -0,0 +1,73 @@
+"""
+Kiểm tra verdict cache (backend/cache.py): LRU theo số phần tử và hết hạn theo TTL.
+
+    python -m pytest test/test_verdict_cache.py -q
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend import cache
+from backend.cache import VerdictCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_key_depends_on_text_and_model_version():
+    key = VerdictCache.make_key("Hà Nội mưa lớn.", "v1")
+    assert key == VerdictCache.make_key("Hà Nội mưa lớn.", "v1")
+    assert key != VerdictCache.make_key("Hà Nội mưa lớn.", "v2")
+    assert key != VerdictCache.make_key("Hà Nội mưa nhỏ.", "v1")
+
+def test_lru_evicts_least_recently_used():
+    verdicts = VerdictCache(max_size=2, ttl=60)
+    verdicts.put("a", {"status": "REAL"})
+    verdicts.put("b", {"status": "FAKE"})
+    assert verdicts.get("a") == {"status": "REAL"} # "a" mới được dùng -> "b" bị đẩy ra
+    verdicts.put("c", {"status": "NEUTRAL"})
+
+    assert verdicts.get("b") is None
+    assert verdicts.get("a") == {"status": "REAL"}
+    assert verdicts.get("c") == {"status": "NEUTRAL"}
+    stats = verdicts.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock.monotonic)
+    verdicts = VerdictCache(max_size=10, ttl=60)
+    verdicts.put("a", {"status": "REAL"})
+
+    clock.now += 59
+    assert verdicts.get("a") == {"status": "REAL"}
+    clock.now += 2
+    assert verdicts.get("a") is None
+    assert verdicts.stats()["size"] == 0
+
+def test_put_refreshes_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock.monotonic)
+    verdicts = VerdictCache(max_size=10, ttl=60)
+    verdicts.put("a", {"status": "REAL"})
+    clock.now += 50
+    verdicts.put("a", {"status": "FAKE"})
+    clock.now += 50
+    assert verdicts.get("a") == {"status": "FAKE"}
+
+def test_disabled_cache_stores_nothing():
+    verdicts = VerdictCache(max_size=0)
+    verdicts.put("a", {"status": "REAL"})
+    assert verdicts.get("a") is None
+    assert verdicts.stats()["size"] == 0
+
+def test_clear():
+    verdicts = VerdictCache(max_size=10, ttl=60)
+    verdicts.put("a", {"status": "REAL"})
+    verdicts.clear()
+    assert verdicts.get("a") is None
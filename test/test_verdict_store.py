@@ -0,0 +1,113 @@
+"""
+Kiểm tra chuẩn hoá URL của verdict tính sẵn (backend/verdict_store.py):
+URL tab của extension phải khớp URL crawler đã lưu. Verdict khớp theo URL không được
+cache theo văn bản của request.
+
+    python -m pytest test/test_verdict_store.py -q
+
+Phần chạy qua AdvancedFactChecker tự bỏ qua nếu chưa cài torch.
+"""
+
+import sys
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.verdict_store import normalize_url
+
+ARTICLE = "https://vnexpress.net/tho-nhi-ky-so-tan-cong-dan-khoi-sudan-4598765.html"
+
+@pytest.mark.parametrize("url", [
+    ARTICLE,
+    ARTICLE + "#box_comment_vne",
+    ARTICLE + "?utm_source=facebook&utm_medium=social",
+    ARTICLE + "?fbclid=IwAR0abc",
+    ARTICLE + "?zarsrc=30&gclid=xyz",
+    ARTICLE + "/",
+    "  HTTPS://VnExpress.net/tho-nhi-ky-so-tan-cong-dan-khoi-sudan-4598765.html  ",
+])
+def test_tracking_variants_normalize_to_same_url(url):
+    assert normalize_url(url) == ARTICLE
+
+def test_content_params_are_kept():
+    assert normalize_url("https://tuoitre.vn/search?q=xang&utm_campaign=x&page=2") == \
+        "https://tuoitre.vn/search?q=xang&page=2"
+
+def test_path_case_is_kept():
+    assert normalize_url("https://example.vn/Tin-Tuc/ABC") == "https://example.vn/Tin-Tuc/ABC"
+
+def test_root_and_empty():
+    assert normalize_url("https://dantri.com.vn") == "https://dantri.com.vn/"
+    assert normalize_url("https://dantri.com.vn/") == "https://dantri.com.vn/"
+    assert normalize_url("") is None
+    assert normalize_url(None) is None
+
+class FakePool:
+    @contextmanager
+    def connection(self):
+        class Conn:
+            def cursor(self):
+                return nullcontext(None)
+        yield Conn()
+
+class FakeArticleVerdicts:
+    """article_verdicts giả: 1 bài đã crawl tại ARTICLE, có hoặc không cùng nội dung với văn bản gửi lên"""
+
+    def __init__(self):
+        self.same_text = False
+
+    def lookup(self, cur, model_version, url=None, cleaned_text=None):
+        verdict = {"status": "FAKE", "details": []}
+        if url == ARTICLE:
+            return verdict, "url"
+        if self.same_text:
+            return verdict, "hash"
+        return None
+
+@pytest.fixture
+def store(monkeypatch):
+    pytest.importorskip("torch")
+    verifier = pytest.importorskip("backend.verifier")
+    store = FakeArticleVerdicts()
+    monkeypatch.setattr(verifier, "ENABLE_PRECOMPUTED_VERDICTS", True)
+    monkeypatch.setattr(verifier, "lookup_verdict", store.lookup)
+    return store
+
+@pytest.fixture
+def checker(store):
+    from backend.cache import VerdictCache
+    from backend.verifier import AdvancedFactChecker
+
+    class Bundle:
+        version = "test"
+
+    checker = AdvancedFactChecker.__new__(AdvancedFactChecker)
+    checker.verdict_cache = VerdictCache()
+    checker.db_pool = FakePool()
+
+    @contextmanager
+    def use_verifier():
+        yield Bundle()
+
+    def verify_from_scratch(*args, **kwargs):
+        yield "start", {"model_version": "test", "total_claims": 0}
+        yield "result", {"status": "REAL", "details": [], "partial": False}
+
+    checker.use_verifier = use_verifier
+    checker._iter_verify_cleaned = verify_from_scratch
+    return checker
+
+TEXT = "Thổ Nhĩ Kỳ điều 500 phi cơ vận tải quân sự để sơ tán công dân khỏi Sudan."
+
+def test_url_match_is_not_cached_for_the_text(checker):
+    assert checker.verify(TEXT, url=ARTICLE)["status"] == "FAKE"
+    # Cùng văn bản, không có URL: không được nhận verdict của bài tại ARTICLE qua verdict cache
+    assert checker.verify(TEXT)["status"] == "REAL"
+
+def test_content_hash_match_is_cached(checker, store):
+    store.same_text = True
+    assert checker.verify(TEXT)["status"] == "FAKE"
+    store.same_text = False
+    assert checker.verify(TEXT)["status"] == "FAKE" # Từ verdict cache